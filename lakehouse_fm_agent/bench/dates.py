@@ -0,0 +1,64 @@
+"""
+Benchmark: fiscal calendar index throughput on large date columns.
+
+  python -m lakehouse_fm_agent.bench.dates --rows 100000000 --chunk 10000000
+
+Rows are resolved in chunks (as a batch pipeline would) so the benchmark
+itself stays within a few GB of RAM.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import time
+
+import numpy as np
+import pyarrow as pa
+
+
+def make_calendar(start: dt.date, years: int) -> pa.Table:
+    """Calendar-year variant K4 and April-March variant V3, weekends off."""
+    days = np.arange(np.datetime64(start), np.datetime64(start.replace(year=start.year + years)))
+    months = days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    years_ = days.astype("datetime64[Y]").astype(np.int64) + 1970
+    weekday = (days.astype(np.int64) + 3) % 7          # 1970-01-01 was a Thursday
+    working = weekday < 5
+    n = len(days)
+    return pa.table({
+        "fiscal_variant": ["K4"] * n + ["V3"] * n,
+        "date": pa.array(np.concatenate([days, days]).astype("datetime64[D]")),
+        "fiscal_year": np.concatenate([years_, np.where(months >= 4, years_, years_ - 1)]),
+        "fiscal_period": np.concatenate([months, (months - 4) % 12 + 1]),
+        "is_working_day": np.concatenate([working, working]),
+    })
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser("bench.dates")
+    ap.add_argument("--rows", type=int, default=100_000_000)
+    ap.add_argument("--chunk", type=int, default=10_000_000)
+    ap.add_argument("--variant", default="K4")
+    args = ap.parse_args(argv)
+
+    from lakehouse_fm_agent.core.dates import CalendarIndex
+
+    t0 = time.perf_counter()
+    index = CalendarIndex.from_table(make_calendar(dt.date(2000, 1, 1), 40))
+    print(f"index build seconds={time.perf_counter() - t0:.3f}")
+
+    rng = np.random.default_rng(3)
+    lo = (np.datetime64("2001-01-01") - np.datetime64("1970-01-01")).astype(np.int64)
+    done, elapsed = 0, 0.0
+    while done < args.rows:
+        n = min(args.chunk, args.rows - done)
+        dates = pa.array(rng.integers(lo, lo + 365 * 35, n).astype(np.int32)).cast(pa.date32())
+        t0 = time.perf_counter()
+        index.resolve(dates, args.variant)
+        elapsed += time.perf_counter() - t0
+        done += n
+    print(f"resolve rows={done} seconds={elapsed:.3f} rows_per_sec={done / elapsed:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
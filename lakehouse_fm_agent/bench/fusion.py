@@ -0,0 +1,184 @@
+"""
+Benchmark: fused vs unfused chain of column-transform handlers.
+
+  python -m lakehouse_fm_agent.bench.fusion --rows 5000000
+
+Runs the CHAIN below (ALPHA -> UoM -> currency -> calendar handlers) over a
+synthetic billing-item extract (VBRP-like columns), once handler by handler
+(each builds a new Table) and once fused into a single pass per batch, in
+which the calendar handlers share one lookup per batch. Peak RSS is a
+process-wide high-water mark, so compare it with --mode fused / --mode
+unfused in separate invocations.
+
+  python -m lakehouse_fm_agent.bench.fusion --check
+
+--check instead runs `fmtool run --input` on a branching lineage (a transform
+chain next to a sibling cleansing FM) with and without --no-fuse and checks
+that both write the same output.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+CHAIN = (
+    "CONVERSION_EXIT_ALPHA_INPUT",
+    "UNIT_CONVERSION_SIMPLE",
+    "CONVERT_TO_LOCAL_CURRENCY",
+    "LAST_DAY_OF_MONTHS",
+    "DATE_TO_PERIOD_CONVERT",
+    "DATE_CONVERT_TO_FACTORYDATE",
+)
+
+_UNITS = ["EA", "PAK", "CS", "KG", "G"]
+_CURRENCIES = ["EUR", "USD", "GBP", "CHF", "JPY"]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def make_billing_items(rows: int, seed: int = 11) -> pa.Table:
+    """Billing document items: keys, unpadded material/customer numbers, qty, amounts, dates."""
+    rng = np.random.default_rng(seed)
+    day0 = (np.datetime64("2020-01-01") - np.datetime64("1970-01-01")).astype(np.int64)
+    units = rng.integers(0, len(_UNITS), rows)
+    return pa.table({
+        "VBELN": pa.array(9_000_000_000 + np.arange(rows) // 8).cast(pa.string()),
+        "POSNR": pa.array((np.arange(rows) % 8 + 1) * 10).cast(pa.string()),
+        "MATNR": pa.array(rng.integers(1, 200_000, rows)).cast(pa.string()),
+        "KUNNR": pa.array(rng.integers(1, 50_000, rows)).cast(pa.string()),
+        "QUANTITY": rng.integers(1, 500, rows).astype(np.float64),
+        "UNIT": pa.DictionaryArray.from_arrays(units.astype(np.int32), _UNITS).cast(pa.string()),
+        "BASE_UOM": pa.array(np.where(units >= 3, "KG", "EA")),
+        "AMOUNT": np.round(rng.random(rows) * 10_000, 2),
+        "DOC_CURRENCY": pa.array(np.array(_CURRENCIES)[rng.integers(0, len(_CURRENCIES), rows)]),
+        "LOCAL_CURRENCY": pa.array(np.full(rows, "EUR")),
+        "TRANS_DATE": pa.array(rng.integers(day0, day0 + 4 * 365, rows).astype(np.int32)).cast(pa.date32()),
+    })
+
+
+def make_context():
+    from lakehouse_fm_agent.bench.dates import make_calendar
+    from lakehouse_fm_agent.runtime.config import load_rules
+    from lakehouse_fm_agent.runtime.context import Context
+
+    days = pa.array([dt.date(2019, 1, 1) + dt.timedelta(days=30 * k) for k in range(70)], pa.date32())
+    fx = []
+    for cur in _CURRENCIES[1:]:
+        fx.append(pa.table({
+            "rate_type": ["M"] * len(days), "from_curr": [cur] * len(days), "to_curr": ["EUR"] * len(days),
+            "valid_from": days, "rate": np.linspace(0.5, 1.5, len(days)),
+        }))
+    tables = {
+        "ref.uom_factors": pa.table({
+            "material": pa.array([None] * 3, pa.string()),
+            "from_uom": ["PAK", "CS", "G"], "to_uom": ["EA", "PAK", "KG"],
+            "numerator": [6, 4, 1], "denominator": [1, 1, 1000],
+        }),
+        "ref.fx_rates": pa.concat_tables(fx),
+        "ref.currency_decimals": pa.table({"currency": ["JPY"], "decimals": [0]}),
+        "ref.calendar": make_calendar(dt.date(2015, 1, 1), 15),
+    }
+    return Context(rules=load_rules(None), tables=tables)
+
+
+def run(mode: str, data: pa.Table):
+    from lakehouse_fm_agent.runtime.fusion import fuse
+    from lakehouse_fm_agent.runtime.registry import resolve_handler
+
+    ctx = make_context()
+    handlers = [resolve_handler(fm) for fm in CHAIN]
+    # Build the lookups (factor closures, FX index, calendar) outside the timing
+    ctx.current_df = data.slice(0, 1)
+    for h in handlers:
+        h(ctx)
+    ctx.current_df = data
+    base = _peak_rss_mb()
+    t0 = time.perf_counter()
+    if mode == "fused":
+        fuse(handlers)(ctx)
+    else:
+        for h in handlers:
+            h(ctx)
+    seconds = time.perf_counter() - t0
+    return ctx.current_df, seconds, _peak_rss_mb() - base
+
+
+BRANCHING = (
+    "ROOT -> LAST_DAY_OF_MONTHS [ FM ]\n"
+    "LAST_DAY_OF_MONTHS -> CONVERSION_EXIT_ALPHA_INPUT [ FM ]\n"
+    "ROOT -> RSKC_CHAVL_OF_IOBJ_CHECK [ FM ]\n"
+)
+
+
+def check_branching(workdir: Path, rows: int = 10_000) -> None:
+    """
+    Fused and unfused runs of BRANCHING must write the same output. The serial
+    order puts the sibling cleansing FM between the two chain members, so a
+    fused step must not pull ALPHA ahead of it (ALPHA of '12\\x01' keeps the
+    control character; cleansed first, it pads to '000000000000000012').
+    """
+    import pyarrow.parquet as pq
+
+    from lakehouse_fm_agent import fmtool
+
+    data = make_billing_items(rows).select(["VBELN", "MATNR", "TRANS_DATE"])
+    matnr = data["MATNR"].to_pylist()
+    matnr[::7] = ["12\x01"] * len(matnr[::7])
+    data = data.set_column(1, "MATNR", pa.array(matnr))
+    extract = workdir / "extract.parquet"
+    pq.write_table(data, extract)
+    lineage = workdir / "LINEAGE.txt"
+    lineage.write_text(BRANCHING, encoding="utf-8")
+
+    out = {}
+    for flags in ((), ("--no-fuse",)):
+        path = workdir / f"out{len(out)}.parquet"
+        fmtool.main(["run", "--lineage", str(lineage), "--input", str(extract), "--output", str(path),
+                     "--no-cache", "--no-preload", *flags])
+        out[flags] = pq.read_table(path)
+    if not out[()].equals(out[("--no-fuse",)]):
+        raise AssertionError("fused and unfused runs differ on a branching lineage")
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser("bench.fusion")
+    ap.add_argument("--rows", type=int, default=5_000_000)
+    ap.add_argument("--mode", choices=("fused", "unfused", "both"), default="both")
+    ap.add_argument("--check", action="store_true",
+                    help="Check fused == unfused for fmtool run on a branching lineage instead")
+    args = ap.parse_args(argv)
+
+    if args.check:
+        with tempfile.TemporaryDirectory() as tmp:
+            check_branching(Path(tmp))
+        print("branching lineage: fused and unfused outputs match")
+        return
+
+    data = make_billing_items(args.rows)
+    results = {}
+    for mode in (("unfused", "fused") if args.mode == "both" else (args.mode,)):
+        out, seconds, peak_mb = run(mode, data)
+        results[mode] = (out, seconds)
+        print(f"mode={mode:<8} rows={args.rows} steps={len(CHAIN)} seconds={seconds:.3f} "
+              f"rows_per_sec={args.rows / seconds:,.0f} peak_rss_growth_mb={peak_mb:.0f}")
+    if len(results) == 2:
+        (a, ta), (b, tb) = results["unfused"], results["fused"]
+        assert a.equals(b), "fused and unfused results differ"
+        print(f"speedup x{ta / tb:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: directory ingest of many LINEAGE files across worker counts.
+
+  python -m lakehouse_fm_agent.bench.ingest --edges 1000000 --files 200 --workers 1,2,4,8
+  python -m lakehouse_fm_agent.bench.ingest --dir /path/to/extract --workers 1,8
+
+Synthetic files are slices of one generated lineage that overlap by
+--overlap lines, like per-entry-FM extracts sharing subtrees, so the merge
+has duplicates to drop.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+def split_lineage(src: Path, out_dir: Path, files: int, overlap: int) -> None:
+    lines = src.read_text(encoding="utf-8").splitlines()
+    size = len(lines) // files + 1
+    for k in range(files):
+        chunk = lines[k * size:(k + 1) * size + overlap]
+        (out_dir / f"FM{k:05d}_LINEAGE.txt").write_text("\n".join(chunk) + "\n", encoding="utf-8")
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser("bench.ingest")
+    ap.add_argument("--dir", help="Existing directory of LINEAGE files (default: synthetic)")
+    ap.add_argument("--edges", type=int, default=1_000_000, help="Synthetic edge count")
+    ap.add_argument("--files", type=int, default=200, help="Synthetic file count")
+    ap.add_argument("--overlap", type=int, default=500, help="Lines shared by neighbouring files")
+    ap.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="Comma-separated worker counts")
+    args = ap.parse_args(argv)
+
+    from lakehouse_fm_agent.bench.synth import nodes_for, write_lineage
+    from lakehouse_fm_agent.runtime.ingest import ingest_lineage, lineage_files
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.dir
+        if not path:
+            path = Path(tmp) / "extract"
+            path.mkdir()
+            write_lineage(Path(tmp) / "ALL.txt", nodes_for(args.edges, 4, 10))
+            split_lineage(Path(tmp) / "ALL.txt", path, args.files, args.overlap)
+        files = lineage_files(path)
+        base = None
+        for w in (int(x) for x in args.workers.split(",")):
+            t0 = time.perf_counter()
+            graph = ingest_lineage(files, workers=w)
+            dt = time.perf_counter() - t0
+            base = base or dt
+            print(f"workers={w:<3} files={len(files)} edges={graph.n_edges} seconds={dt:.3f} "
+                  f"edges_per_sec={graph.n_edges / dt:,.0f} speedup=x{base / dt:.2f}")
+
+
+if __name__ == "__main__":
+    main()
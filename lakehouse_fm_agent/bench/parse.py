@@ -0,0 +1,87 @@
+"""
+Benchmark: streaming LINEAGE parser throughput and peak RSS.
+
+  python -m lakehouse_fm_agent.bench.parse --lines 2000000
+  python -m lakehouse_fm_agent.bench.parse --lineage /path/LINEAGE.txt --mmap
+
+Peak RSS is a process-wide high-water mark, so each mode should be measured
+in its own invocation (use --legacy for the old read_text().splitlines() path).
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def write_sample(path: Path, lines: int, skipped_every: int = 10) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        for i in range(lines):
+            if i % skipped_every == 0:
+                fh.write(f"SKIPPED: Z_FM_{i} -> Z_FM_{i + 1} [ FM ]\n")
+            else:
+                fh.write(f"Z_FM_{i // 3} -> Z_FM_{i} [ FM ]\n")
+
+
+def _legacy(path: str) -> int:
+    from lakehouse_fm_agent.runtime.lineage import EDGE_RE, SKIP_RE
+    rows = []
+    for raw in Path(path).read_text(encoding="utf-8", errors="ignore").splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        m = SKIP_RE.search(line)
+        if m:
+            rows.append((m.group("p").strip(), m.group("c").strip(), "FM", True))
+            continue
+        m = EDGE_RE.search(line.replace("  ", " ").replace(" -", "-"))
+        if m:
+            rows.append((m.group("p").strip(), m.group("c").strip(),
+                         m.group("k").strip().upper(), False))
+    return len(rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser("bench.parse")
+    ap.add_argument("--lineage", help="Existing LINEAGE file (default: synthetic)")
+    ap.add_argument("--lines", type=int, default=1_000_000, help="Synthetic line count")
+    ap.add_argument("--mmap", action="store_true", help="Use the mmap-backed reader")
+    ap.add_argument("--legacy", action="store_true", help="Measure the pre-streaming parser")
+    args = ap.parse_args(argv)
+
+    from lakehouse_fm_agent.runtime.lineage import iter_edges
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.lineage
+        if not path:
+            path = str(Path(tmp) / "LINEAGE.txt")
+            write_sample(Path(path), args.lines)
+        with open(path, "rb") as fh:
+            n_lines = sum(1 for _ in fh)
+
+        base_rss = _peak_rss_mb()
+        t0 = time.perf_counter()
+        if args.legacy:
+            n_edges = _legacy(path)
+        else:
+            n_edges = sum(1 for _ in iter_edges(path, use_mmap=args.mmap))
+        dt = time.perf_counter() - t0
+
+    mode = "legacy" if args.legacy else ("mmap" if args.mmap else "stream")
+    print(f"mode={mode} lines={n_lines} edges={n_edges} seconds={dt:.3f} "
+          f"lines_per_sec={n_lines / dt:,.0f} "
+          f"peak_rss_mb={_peak_rss_mb():.1f} (baseline {base_rss:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: fmtool CLI startup time (handlers are imported lazily).
+
+  python -m lakehouse_fm_agent.bench.startup
+  python -m lakehouse_fm_agent.bench.startup --repeat 10 --budget-ms 100 --imports 10
+
+Each command runs in a fresh interpreter; the best of --repeat runs is
+reported next to a bare `python -c pass`. Exits non-zero when a command
+exceeds --budget-ms. --imports lists the slowest modules from -X importtime.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SAMPLE = Path(__file__).resolve().parent.parent / "samples" / "sample_LINEAGE.txt"
+
+
+def _best_ms(cmd: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def slowest_imports(args: list[str], n: int) -> list[tuple[int, str]]:
+    """(cumulative us, module) for the n slowest imports of `fmtool <args>`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-m", "lakehouse_fm_agent.fmtool", *args],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser("bench.startup")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=100.0)
+    ap.add_argument("--imports", type=int, default=0, help="Show the N slowest imports per command")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        commands = {
+            "--help": ["--help"],
+            "graph": ["graph", "--lineage", str(SAMPLE), "--out", str(Path(tmp) / "g.mmd")],
+            "plan": ["plan", "--plan-id", "bench", "--out", str(Path(tmp) / "m.json")],
+        }
+        base = _best_ms([sys.executable, "-c", "pass"], args.repeat)
+        print(f"interpreter ms={base:.1f}")
+        over = []
+        for name, cmd_args in commands.items():
+            ms = _best_ms([sys.executable, "-m", "lakehouse_fm_agent.fmtool", *cmd_args], args.repeat)
+            print(f"command={name} ms={ms:.1f} over_interpreter_ms={ms - base:.1f}")
+            for us, module in slowest_imports(cmd_args, args.imports):
+                print(f"    {us / 1000:8.1f} ms  {module}")
+            if ms > args.budget_ms:
+                over.append(name)
+    if over:
+        sys.exit(f"over {args.budget_ms:.0f} ms budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
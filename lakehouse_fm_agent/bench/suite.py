@@ -0,0 +1,147 @@
+"""
+Benchmark suite behind `fmtool bench`: lineage parsing, layering, graph
+rendering and handler execution on synthetic lineages of growing size.
+
+  python -m lakehouse_fm_agent.fmtool bench --scales 1000,10000,100000 --out bench.json
+  python -m lakehouse_fm_agent.fmtool bench --scales 1000,10000,100000 --compare bench.json
+
+Results are JSON ({"meta": ..., "results": [{step, edges, seconds, ...}]});
+--compare matches (step, edges) against a previous run and reports steps that
+slowed down by more than --threshold.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from lakehouse_fm_agent.bench.synth import node_name, nodes_for, write_lineage
+from lakehouse_fm_agent.runtime.executor import side_effect_only
+
+STEPS = ("load_edges", "topo_layers", "graph", "graph_cached", "run", "run_dag")
+RUN_STEPS = ("run", "run_dag")
+DEFAULT_SCALES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+@side_effect_only
+def _noop(ctx) -> None:
+    pass
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _fmtool(argv: list[str]) -> None:
+    from lakehouse_fm_agent import fmtool
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fmtool.main(argv)
+
+
+def bench_scale(edges: int, workdir: Path, steps=STEPS, repeat: int = 3, fanout: int = 4,
+                depth: int = 10, skipped: float = 0.05, cycles: int = 0,
+                workers: int = 4, run_limit: int = 1_000_000) -> list[dict]:
+    from lakehouse_fm_agent.runtime import registry
+    from lakehouse_fm_agent.runtime.lineage import load_edges, topo_layers
+
+    nodes = nodes_for(edges, fanout, depth)
+    lineage = workdir / f"LINEAGE_{edges}.txt"
+    t0 = time.perf_counter()
+    n_edges = write_lineage(lineage, nodes, fanout, depth, skipped, cycles)
+    results = [{"step": "generate", "edges": n_edges, "nodes": nodes, "seconds": time.perf_counter() - t0}]
+
+    out = str(workdir / "graph.mmd")
+    cache = str(workdir / "cache")
+    timings = {
+        "load_edges": lambda: load_edges(str(lineage)),
+        "graph": lambda: _fmtool(["graph", "--lineage", str(lineage), "--out", out, "--no-cache"]),
+        "graph_cached": lambda: _fmtool(["graph", "--lineage", str(lineage), "--out", out]),
+        "run": lambda: _fmtool(["run", "--lineage", str(lineage), "--no-cache"]),
+        "run_dag": lambda: _fmtool(["run", "--lineage", str(lineage), "--no-cache",
+                                    "--workers", str(workers)]),
+    }
+    edge_list = load_edges(str(lineage)) if "topo_layers" in steps else None
+    timings["topo_layers"] = lambda: topo_layers(edge_list)
+
+    registered = []
+    old_cache = os.environ.get("FMTOOL_CACHE_DIR")
+    os.environ["FMTOOL_CACHE_DIR"] = cache
+    try:
+        if "graph_cached" in steps:
+            _fmtool(["graph", "--lineage", str(lineage), "--out", out])  # warm the cache
+        for step in steps:
+            if step in RUN_STEPS:
+                if n_edges > run_limit:
+                    continue
+                if not registered:
+                    # Every synthetic FM gets a no-op handler: this measures scheduling overhead
+                    registered = [node_name(i) for i in range(nodes)]
+                    for fm in registered:
+                        registry.register(fm, _noop)
+            seconds = _best(timings[step], repeat)
+            results.append({"step": step, "edges": n_edges, "nodes": nodes, "seconds": seconds,
+                            "edges_per_sec": n_edges / seconds if seconds else None})
+    finally:
+        for fm in registered:
+            registry.REGISTRY.pop(fm, None)
+            registry._resolved.pop(fm, None)
+        if old_cache is None:
+            os.environ.pop("FMTOOL_CACHE_DIR", None)
+        else:
+            os.environ["FMTOOL_CACHE_DIR"] = old_cache
+    return results
+
+
+def run_suite(scales=DEFAULT_SCALES, steps=STEPS, repeat: int = 3, on_result=None, **params) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for edges in scales:
+            for rec in bench_scale(edges, Path(tmp), steps=steps, repeat=repeat, **params):
+                results.append(rec)
+                if on_result:
+                    on_result(rec)
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+            "params": params,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> list[dict]:
+    """Per (step, edges) ratio current/baseline; regressed when ratio > 1 + threshold."""
+    base = {(r["step"], r["edges"]): r["seconds"] for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        old = base.get((r["step"], r["edges"]))
+        if r["step"] == "generate" or not old:
+            continue
+        ratio = r["seconds"] / old
+        rows.append({"step": r["step"], "edges": r["edges"], "baseline": old,
+                     "seconds": r["seconds"], "ratio": ratio, "regressed": ratio > 1 + threshold})
+    return rows
+
+
+def format_result(rec: dict) -> str:
+    rate = f" edges_per_sec={rec['edges_per_sec']:,.0f}" if rec.get("edges_per_sec") else ""
+    return f"{rec['step']:<13} edges={rec['edges']:>10,} seconds={rec['seconds']:.4f}{rate}"
+
+
+def load_results(path: str | Path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
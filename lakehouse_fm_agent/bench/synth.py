@@ -0,0 +1,94 @@
+"""
+Synthetic LINEAGE.txt generator for benchmarks.
+
+  python -m lakehouse_fm_agent.bench.synth --out /tmp/LINEAGE.txt --edges 1000000 --fanout 4 --depth 12
+
+Nodes are split evenly over `depth` levels; every node above the last level
+links to `fanout` random nodes of the next level. A `skipped` fraction of the
+edges is written as SKIPPED lines and `cycles` back edges (deeper -> shallower
+level) close cycles. Header/separator noise lines are mixed in like real
+extractor output.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+_NOISE = ("=== FM LINEAGE EXTRACT ===", "", "----------------------------------------")
+
+
+def node_name(i: int) -> str:
+    return f"Z_FM_{i:08d}"
+
+
+def nodes_for(edges: int, fanout: int, depth: int) -> int:
+    """Node count giving about `edges` edges (the last level has no children)."""
+    depth = max(2, depth)
+    return max(depth, round(edges / fanout * depth / (depth - 1)))
+
+
+def synth_edges(nodes: int, fanout: int = 4, depth: int = 10, skipped: float = 0.05,
+                cycles: int = 0, seed: int = 42) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(src, dst, is_skipped) arrays for a layered random DAG plus back edges."""
+    rng = np.random.default_rng(seed)
+    depth = max(2, min(depth, nodes))
+    bounds = np.linspace(0, nodes, depth + 1).astype(np.int64)
+    src_parts, dst_parts = [], []
+    for lvl in range(depth - 1):
+        lo, hi, nlo, nhi = bounds[lvl], bounds[lvl + 1], bounds[lvl + 1], bounds[lvl + 2]
+        src_parts.append(np.repeat(np.arange(lo, hi), fanout))
+        dst_parts.append(rng.integers(nlo, nhi, (hi - lo) * fanout))
+    if cycles:
+        # Back edge from a node in a deeper level to one in a shallower level
+        lvl = rng.integers(1, depth, cycles)
+        src_parts.append(rng.integers(bounds[lvl], bounds[lvl + 1]))
+        up = rng.integers(0, lvl)
+        dst_parts.append(rng.integers(bounds[up], bounds[up + 1]))
+    src = np.concatenate(src_parts)
+    dst = np.concatenate(dst_parts)
+    return src, dst, rng.random(len(src)) < skipped
+
+
+def write_lineage(path: str | Path, nodes: int, fanout: int = 4, depth: int = 10,
+                  skipped: float = 0.05, cycles: int = 0, seed: int = 42,
+                  noise_every: int = 1000) -> int:
+    """Write a synthetic LINEAGE file; returns the number of edge lines."""
+    src, dst, skip = synth_edges(nodes, fanout, depth, skipped, cycles, seed)
+    chunk = 100_000
+    with open(path, "w", encoding="utf-8") as fh:
+        for start in range(0, len(src), chunk):
+            lines = []
+            for k, (s, d, f) in enumerate(zip(src[start:start + chunk].tolist(),
+                                              dst[start:start + chunk].tolist(),
+                                              skip[start:start + chunk].tolist()), start):
+                if noise_every and k % noise_every == 0:
+                    lines.append(_NOISE[(k // noise_every) % len(_NOISE)])
+                if f:
+                    lines.append(f"SKIPPED: {node_name(s)} -> {node_name(d)} [ FM ]")
+                else:
+                    lines.append(f"{node_name(s)} -> {node_name(d)} [ FM ]")
+            fh.write("\n".join(lines))
+            fh.write("\n")
+    return len(src)
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser("bench.synth")
+    ap.add_argument("--out", required=True, help="Output LINEAGE file")
+    ap.add_argument("--edges", type=int, default=100_000, help="Approximate edge count")
+    ap.add_argument("--fanout", type=int, default=4)
+    ap.add_argument("--depth", type=int, default=10)
+    ap.add_argument("--skipped", type=float, default=0.05, help="Fraction of SKIPPED edges")
+    ap.add_argument("--cycles", type=int, default=0, help="Number of back edges")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+    n = write_lineage(args.out, nodes_for(args.edges, args.fanout, args.depth), args.fanout,
+                      args.depth, args.skipped, args.cycles, args.seed)
+    print(f"Synthetic lineage saved: {args.out} ({n} edges)")
+
+
+if __name__ == "__main__":
+    main()
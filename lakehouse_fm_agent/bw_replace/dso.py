@@ -1,2 +1,358 @@
+import json
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from lakehouse_fm_agent.core.hashing import hash_strings, key_strings
+
+HASH_COL = '_KEY_HASH'
+RECORDMODE = 'RECORDMODE'
+REQUEST = 'REQUEST'
+DELETE_MODES = ('D', 'R')
+
+DEFAULT_PARTITIONS = 64
+DEFAULT_BATCH_SIZE = 500_000
+DEFAULT_MAX_FILE_ROWS = 1_000_000
+DEFAULT_MAX_DELTAS = 8
+
+_BLOOM_BITS_PER_KEY = 10
+_BLOOM_PROBES = 4
+_ROW_GROUP = 65_536
+
+
+def _bloom_positions(hashes, n_bits):
+    # Double hashing: probe i lands on (h1 + i * h2) mod n_bits
+    h1 = hashes & np.uint64(0xFFFFFFFF)
+    h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+    return [(h1 + np.uint64(i) * h2) % np.uint64(n_bits) for i in range(_BLOOM_PROBES)]
+
+
+def bloom_build(hashes):
+    """Packed uint64 Bloom filter (~1% false positives) over key hashes."""
+    n_bits = max(64, 1 << int(np.ceil(np.log2(max(len(hashes), 1) * _BLOOM_BITS_PER_KEY))))
+    words = np.zeros(n_bits // 64, np.uint64)
+    for pos in _bloom_positions(hashes, n_bits):
+        np.bitwise_or.at(words, (pos >> np.uint64(6)).astype(np.int64), np.uint64(1) << (pos & np.uint64(63)))
+    return words
+
+
+def bloom_probe(words, hashes):
+    """True where a hash may be in the filter; False is definite."""
+    n_bits = len(words) * 64
+    hit = np.ones(len(hashes), bool)
+    for pos in _bloom_positions(hashes, n_bits):
+        hit &= (words[(pos >> np.uint64(6)).astype(np.int64)] & (np.uint64(1) << (pos & np.uint64(63)))) != 0
+    return hit
+
+
+class DsoTarget:
+    """
+    Local directory-of-Parquet stand-in for a standard DSO / Delta target,
+    replacing RSDRI_ODSO_UPDATE activation with a MERGE on the business keys.
+
+    Layout::
+
+        <root>/_dso.json                      keys, partitions, request counter, file map
+        <root>/active/p=NNN/*.parquet         active data, sorted by key hash
+        <root>/active/p=NNN/*.bloom.npy       Bloom filter per data file
+        <root>/active/p=NNN/*.dv.npy          deletion vector (masked row ids)
+        <root>/changelog/NNNNNNNN.parquet     one file per activated request
+
+    Rows are hash-partitioned on the business key. Inside a partition, key
+    hash ranges are split into groups of at most max_file_rows rows, each a
+    base file plus append-only delta files. A batch only probes the Bloom
+    filters of the groups owning its keys; on a hit only the key hash
+    column and the row groups holding candidate rows are read. Replaced
+    rows are masked by a deletion vector and upserts appended as a delta
+    file, so bytes written per batch track the batch, not the table. The
+    Bloom filters only prune small batches: a batch of thousands of keys
+    hits nearly every file, and then reads the key hash column of the
+    groups it touches plus the row groups holding replaced rows, which
+    grows with the table (see bench/dso.py). Deltas
+    are folded together after max_deltas files; a group is rewritten once
+    its deltas rival the base or masked rows outnumber live ones.
+
+    The change log follows BW conventions: 'N' new image, 'X' before image
+    and ' ' after image for updates, 'R' reverse image for deletions, with
+    key figures (key_figures, default: float/decimal columns) negated in
+    before/reverse images.
+    """
+
+    def __init__(self, root, keys=None, partitions=DEFAULT_PARTITIONS,
+                 max_file_rows=DEFAULT_MAX_FILE_ROWS, max_deltas=DEFAULT_MAX_DELTAS,
+                 key_figures=None):
+        self.root = Path(root)
+        meta_path = self.root / '_dso.json'
+        if meta_path.exists():
+            self.meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        else:
+            if not keys:
+                raise ValueError(f"New DSO target {self.root} needs business keys")
+            self.meta = {'keys': list(keys), 'partitions': int(partitions),
+                         'request': 0, 'groups': {}}
+        self.keys = self.meta['keys']
+        self.partitions = self.meta['partitions']
+        self.max_file_rows = max_file_rows
+        self.max_deltas = max_deltas
+        self.key_figures = key_figures
+
+    # -- metadata ---------------------------------------------------------------
+    def _commit(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f'_dso.json.tmp{os.getpid()}'
+        tmp.write_text(json.dumps(self.meta), encoding='utf-8')
+        os.replace(tmp, self.root / '_dso.json')
+
+    def _all_files(self):
+        return [f for groups in self.meta['groups'].values() for g in groups for f in g['files']]
+
+    @property
+    def num_rows(self):
+        return sum(f['rows'] - f.get('deleted', 0) for f in self._all_files())
+
+    def read_active(self, columns=None):
+        tables = [self._read(f, columns) for f in self._all_files()]
+        if not tables:
+            return None
+        table = pa.concat_tables(tables)
+        return table.drop_columns([HASH_COL]) if HASH_COL in table.column_names else table
+
+    def _schema(self):
+        files = self._all_files()
+        return pq.read_schema(self.root / files[0]['file']) if files else None
+
+    # -- file helpers -----------------------------------------------------------
+    def _write(self, part, table):
+        table = table.take(pc.sort_indices(table[HASH_COL]))
+        name = f"active/p={part:03d}/{uuid.uuid4().hex}.parquet"
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, path, row_group_size=_ROW_GROUP)
+        np.save(path.with_suffix('.bloom.npy'), bloom_build(table[HASH_COL].to_numpy()))
+        return {'file': name, 'rows': len(table)}
+
+    def _write_dv(self, entry, deleted):
+        name = str(Path(entry['file']).with_suffix(f'.{uuid.uuid4().hex[:8]}.dv.npy'))
+        np.save(self.root / name, deleted)
+        return {'file': entry['file'], 'rows': entry['rows'], 'dv': name, 'deleted': len(deleted)}
+
+    def _paths(self, entry, data=True):
+        path = self.root / entry['file']
+        out = [path, path.with_suffix('.bloom.npy')] if data else []
+        if entry.get('dv'):
+            out.append(self.root / entry['dv'])
+        return out
+
+    def _bloom(self, entry):
+        return np.load((self.root / entry['file']).with_suffix('.bloom.npy'), mmap_mode='r')
+
+    def _deleted(self, entry):
+        """Sorted physical row ids masked out by the entry's deletion vector."""
+        if not entry.get('dv'):
+            return np.zeros(0, np.int64)
+        return np.load(self.root / entry['dv'])
+
+    def _read(self, entry, columns=None):
+        table = pq.read_table(self.root / entry['file'], columns=columns)
+        deleted = self._deleted(entry)
+        if len(deleted):
+            keep = np.ones(len(table), bool)
+            keep[deleted] = False
+            table = table.filter(pa.array(keep))
+        return table
+
+    def _read_rows(self, entry, rows):
+        """Physical rows of a data file, reading only the row groups holding them."""
+        pf = pq.ParquetFile(self.root / entry['file'])
+        sizes = [pf.metadata.row_group(i).num_rows for i in range(pf.num_row_groups)]
+        starts = np.concatenate([[0], np.cumsum(sizes)])
+        owner = np.searchsorted(starts, rows, side='right') - 1
+        groups = np.unique(owner)
+        local = np.concatenate([[0], np.cumsum([sizes[g] for g in groups])])
+        pos = local[np.searchsorted(groups, owner)] + rows - starts[owner]
+        return pf.read_row_groups(groups.tolist()).take(pa.array(pos))
+
+    # -- change log -------------------------------------------------------------
+    def _key_figures(self, schema):
+        """
+        Columns negated in before/reverse images: dso.key_figures when set,
+        else the float/decimal non-key columns. Integer columns are often
+        characteristics (GJAHR, POSNR), so integer key figures must be listed.
+        """
+        if self.key_figures is not None:
+            return [c for c in self.key_figures if c in schema.names]
+        amounts = (pa.types.is_floating, pa.types.is_decimal)
+        return [f.name for f in schema
+                if f.name not in self.keys and f.name != HASH_COL and any(t(f.type) for t in amounts)]
+
+    def _negate(self, table):
+        for name in self._key_figures(table.schema):
+            i = table.schema.get_field_index(name)
+            table = table.set_column(i, name, pc.negate(table[name]))
+        return table
+
+    def _log(self, log, table, mode):
+        if len(table):
+            table = table.drop_columns([HASH_COL])
+            log.append(table.append_column(RECORDMODE, pa.array([mode] * len(table), pa.string())))
+
+    # -- merge ------------------------------------------------------------------
+    def _merge_group(self, part, group, upserts, deletes, log, obsolete):
+        """Apply one group's share of a batch; returns the group(s) replacing it."""
+        probe = np.concatenate([upserts[HASH_COL].to_numpy(), deletes[HASH_COL].to_numpy()])
+        upsert_keys = key_strings(upserts, self.keys)
+        touched_keys = pa.concat_arrays([upsert_keys, key_strings(deletes, self.keys)])
+        files, replaced_keys = [], []
+        for entry in group['files']:
+            maybe = bloom_probe(self._bloom(entry), probe)
+            cand = np.zeros(0, np.int64)
+            if maybe.any():
+                hashes = pq.read_table(self.root / entry['file'], columns=[HASH_COL])[HASH_COL].to_numpy()
+                cand = np.flatnonzero(np.isin(hashes, probe[maybe]))
+                cand = cand[~np.isin(cand, self._deleted(entry))]
+            if not len(cand):
+                files.append(entry)
+                continue
+            # Exact key comparison only on the rows whose hash matched
+            old = self._read_rows(entry, cand)
+            hit = pc.is_in(key_strings(old, self.keys), value_set=touched_keys).to_numpy(zero_copy_only=False)
+            if not hit.any():
+                files.append(entry)
+                continue
+            old = old.filter(pa.array(hit))
+            old_keys = key_strings(old, self.keys)
+            updated = pc.is_in(old_keys, value_set=upsert_keys).to_numpy(zero_copy_only=False)
+            self._log(log, self._negate(old.filter(pa.array(updated))), 'X')
+            self._log(log, self._negate(old.filter(pa.array(~updated))), 'R')
+            replaced_keys.append(old_keys)
+            # Mask the replaced rows instead of rewriting the file
+            deleted = np.union1d(self._deleted(entry), cand[hit])
+            obsolete.extend(self._paths(entry, data=False))
+            if len(deleted) == entry['rows']:
+                obsolete.extend(self._paths(entry))
+            else:
+                files.append(self._write_dv(entry, deleted))
+
+        if len(upserts):
+            seen = pa.concat_arrays(replaced_keys) if replaced_keys else pa.array([], pa.string())
+            updated = pc.is_in(upsert_keys, value_set=seen).to_numpy(zero_copy_only=False)
+            self._log(log, upserts.filter(pa.array(updated)), ' ')
+            self._log(log, upserts.filter(pa.array(~updated)), 'N')
+            files.append(self._write(part, upserts))
+        return self._compact(part, {'lo': group['lo'], 'files': files}, obsolete)
+
+    def _compact(self, part, group, obsolete):
+        files = group['files']
+        live = sum(f['rows'] - f.get('deleted', 0) for f in files)
+        dead = sum(f.get('deleted', 0) for f in files)
+        if len(files) <= self.max_deltas + 1 and dead <= live:
+            return [group]
+        base, deltas = files[0], files[1:]
+        if dead <= live and sum(f['rows'] for f in deltas) < base['rows']:
+            # Minor: fold the deltas into one file, leave the base alone
+            merged = pa.concat_tables(self._read(f) for f in deltas)
+            for f in deltas:
+                obsolete.extend(self._paths(f))
+            return [{'lo': group['lo'], 'files': [base, self._write(part, merged)]}]
+        # Major: rewrite the group sorted by hash, drop masked rows, split by max_file_rows
+        merged = pa.concat_tables(self._read(f) for f in files)
+        merged = merged.take(pc.sort_indices(merged[HASH_COL]))
+        for f in files:
+            obsolete.extend(self._paths(f))
+        groups = []
+        for start in range(0, len(merged), self.max_file_rows):
+            chunk = merged.slice(start, self.max_file_rows)
+            lo = group['lo'] if start == 0 else int(chunk[HASH_COL][0].as_py())
+            groups.append({'lo': lo, 'files': [self._write(part, chunk)]})
+        return groups or [{'lo': group['lo'], 'files': []}]
+
+    def merge(self, batch, recordmode_column=RECORDMODE):
+        """
+        Activate one batch (Table/RecordBatch) into the target and write its
+        change log as one request. Within the batch the last record per key
+        wins; rows whose recordmode column is 'D'/'R' delete the key.
+        Returns the request number.
+        """
+        data = pa.Table.from_batches([batch]) if isinstance(batch, pa.RecordBatch) else batch
+        keys = key_strings(data, self.keys)
+        hashes = hash_strings(keys)
+        # Last occurrence per business key wins (request order)
+        codes = pc.dictionary_encode(keys).indices.to_numpy()
+        _, first_rev = np.unique(codes[::-1], return_index=True)
+        last = np.sort(len(codes) - 1 - first_rev)
+        data = data.take(pa.array(last))
+        hashes = hashes[last]
+
+        is_delete = np.zeros(len(data), bool)
+        if recordmode_column in data.column_names:
+            is_delete = pc.fill_null(pc.is_in(data[recordmode_column], value_set=pa.array(DELETE_MODES)),
+                                     False).to_numpy(zero_copy_only=False)
+            data = data.drop_columns([recordmode_column])
+        data = data.append_column(HASH_COL, pa.array(hashes, pa.uint64()))
+        schema = self._schema()
+        if schema is not None:
+            data = data.select(schema.names).cast(schema)
+
+        self.meta['request'] += 1
+        request = self.meta['request']
+        part_of = hashes % np.uint64(self.partitions)
+        order = np.argsort(part_of, kind='stable')
+        parts, part_starts = np.unique(part_of[order], return_index=True)
+        log, obsolete = [], []
+        for part, rows in zip(parts.tolist(), np.split(order, part_starts[1:])):
+            groups = self.meta['groups'].get(str(part)) or [{'lo': 0, 'files': []}]
+            los = np.array([g['lo'] for g in groups], np.uint64)
+            owner = np.searchsorted(los, hashes[rows], side='right') - 1
+            new_groups = []
+            for i, group in enumerate(groups):
+                sel = rows[owner == i]
+                if not len(sel):
+                    new_groups.append(group)
+                    continue
+                upserts = data.take(pa.array(sel[~is_delete[sel]]))
+                deletes = data.take(pa.array(sel[is_delete[sel]]))
+                new_groups.extend(self._merge_group(part, group, upserts, deletes, log, obsolete))
+            self.meta['groups'][str(part)] = new_groups
+
+        if log:
+            changes = pa.concat_tables(log, promote_options='default')
+            changes = changes.append_column(REQUEST, pa.array([request] * len(changes), pa.int64()))
+            (self.root / 'changelog').mkdir(parents=True, exist_ok=True)
+            pq.write_table(changes, self.root / 'changelog' / f'{request:08d}.parquet')
+        self._commit()
+        for path in obsolete:
+            path.unlink(missing_ok=True)
+        return request
+
+    def merge_table(self, data, batch_size=DEFAULT_BATCH_SIZE):
+        """Merge a Table (or iterable of batches) in batches of batch_size rows."""
+        batches = data.to_batches(max_chunksize=batch_size) if isinstance(data, pa.Table) else data
+        return [self.merge(b) for b in batches]
+
+
 def merge_into_delta(ctx):
-    pass
+    if ctx is None or ctx.current_df is None:
+        return
+    cfg = ctx.rules.get('dso') or {}
+    if not cfg.get('target'):
+        raise ValueError("dso.target is not configured in rules.yml")
+    target = ctx.lookup(('dso', cfg['target']), lambda c: DsoTarget(
+        cfg['target'], keys=cfg.get('keys'),
+        partitions=cfg.get('partitions', DEFAULT_PARTITIONS),
+        max_file_rows=cfg.get('max_file_rows', DEFAULT_MAX_FILE_ROWS),
+        max_deltas=cfg.get('max_deltas', DEFAULT_MAX_DELTAS),
+        key_figures=cfg.get('key_figures')))
+    batch_size = cfg.get('batch_size', DEFAULT_BATCH_SIZE)
+    if cfg.get('materialize'):
+        ctx.materialize()  # whole load as one request; bounded by stream.memory_limit_mb
+    if ctx.streaming:
+        # One activation request per data package, as BW loads them; in-load
+        # ordering (last record per key wins) holds across packages
+        target.merge_table(ctx.current_df.chunks(batch_size))
+    else:
+        target.merge_table(ctx.current_df, batch_size=batch_size)
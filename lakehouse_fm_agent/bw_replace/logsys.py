@@ -1,2 +1,147 @@
-def map_logsys_from_id(ctx):
-    pass
+import threading
+import time
+from collections import Counter
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from lakehouse_fm_agent.core.columns import column_transform
+from lakehouse_fm_agent.runtime.preload import requires
+
+MAP_TABLE = 'ref.logsys_map'
+DEFAULT_TTL = 300             # seconds before the map's table version is checked again
+UNMAPPED_KEY = 'logsys_unmapped'
+
+DEFAULT_COLUMNS = {
+    'source': 'SOURSYSTEM',   # source system ID as stored on the records
+    'out': 'LOGSYS',
+}
+
+_cache = {}                   # (catalog, table) -> [checked_at, version, LogsysMap, local table]
+_cache_lock = threading.Lock()
+
+
+class LogsysMap:
+    """
+    RSDG_LOGSYS_GET_FROM_ID for whole columns: ref.logsys_map (source_id,
+    logsys) held as an array of unique IDs plus a dictionary of logical system
+    names. A column resolves to integer codes with one hash lookup per batch
+    (per distinct value for dictionary-encoded input), and the output is a
+    dictionary array over the shared names, so no strings are copied.
+    """
+
+    def __init__(self, ids, names, codes):
+        self.ids = ids          # pa.StringArray, unique source IDs
+        self.names = names      # pa.StringArray, distinct logical systems
+        self.codes = codes      # pa.Int32Array, ids[i] -> names[codes[i]]
+
+    @classmethod
+    def from_table(cls, table):
+        table = table.filter(pc.is_valid(table['source_id']))
+        ids = pc.cast(table['source_id'], pa.string()).combine_chunks()
+        counts = pc.value_counts(ids)
+        if len(counts) != len(ids):
+            dupes = pc.filter(counts.field('values'), pc.greater(counts.field('counts'), 1))
+            raise ValueError(f"{MAP_TABLE} maps source IDs more than once: {dupes.to_pylist()[:10]}")
+        encoded = pc.dictionary_encode(pc.cast(table['logsys'], pa.string())).combine_chunks()
+        return cls(ids, encoded.dictionary, encoded.indices)
+
+    def lookup_codes(self, ids):
+        """Per-row index into self.names (int32, null where unmapped or null)."""
+        if pa.types.is_dictionary(ids.type):
+            # Resolve the distinct values only, then gather by the row indices
+            per_value = pc.take(self.codes, pc.index_in(ids.dictionary, value_set=self.ids))
+            return pc.take(per_value, ids.indices)
+        return pc.take(self.codes, pc.index_in(ids, value_set=self.ids))
+
+    def map(self, ids):
+        """Logical system per row as dictionary<int32, string> over self.names."""
+        if isinstance(ids, pa.ChunkedArray):
+            return pa.chunked_array([self.map(c) for c in ids.chunks],
+                                    pa.dictionary(pa.int32(), pa.string()))
+        return pa.DictionaryArray.from_arrays(self.lookup_codes(ids), self.names)
+
+    def unmapped(self, ids, mapped):
+        """Counter of the source IDs that are not null but did not map."""
+        if mapped.null_count == ids.null_count:
+            return Counter()
+        missing = pc.filter(ids, pc.and_(pc.is_valid(ids), pc.is_null(mapped)))
+        counts = pc.value_counts(pc.cast(missing, pa.string()))
+        return Counter(dict(zip(counts.field('values').to_pylist(), counts.field('counts').to_pylist())))
+
+
+def _fresh(entry, ctx, table, now, ttl):
+    """Can the cached entry serve ctx without asking Delta for the table version?"""
+    if entry is None:
+        return False
+    if table is not None:
+        return entry[3] is table
+    if entry[3] is not None:
+        return False
+    if MAP_TABLE in ctx.versions:
+        return entry[1] == ctx.versions[MAP_TABLE]
+    return now - entry[0] < ttl
+
+
+def load_map(ctx, ttl=DEFAULT_TTL):
+    """
+    The process-wide LogsysMap for ctx's catalog, keyed on the Delta version
+    of the map table. A version preloaded into ctx is compared on every call
+    (no query); otherwise, within ttl seconds of the last check the map is
+    returned as is and after that the latest version is fetched and the map
+    rebuilt only when it changed. A registered local table has no version:
+    its map is reused for that same table object only, which the entry holds.
+    """
+    key = (ctx.catalog, MAP_TABLE)
+    now = time.monotonic()
+    table = ctx.tables.get(MAP_TABLE) if MAP_TABLE not in ctx.versions else None
+    entry = _cache.get(key)
+    if _fresh(entry, ctx, table, now, ttl):
+        return entry[2]
+    with _cache_lock:
+        entry = _cache.get(key)
+        if _fresh(entry, ctx, table, now, ttl):
+            return entry[2]
+        if table is not None:
+            entry = [now, None, LogsysMap.from_table(table), table]
+        else:
+            version = ctx.table_version(MAP_TABLE)
+            if entry is None or entry[3] is not None or version is None or version != entry[1]:
+                entry = [now, version, LogsysMap.from_table(ctx.read_uc(MAP_TABLE, version)), None]
+            else:
+                entry[0] = now
+        _cache[key] = entry
+        return entry[2]
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def unmapped_report(ctx):
+    """Source IDs seen without a mapping in this context's runs, with row counts."""
+    return ctx.lookup(UNMAPPED_KEY, lambda c: Counter())
+
+
+def _map(ctx):
+    return load_map(ctx, (ctx.rules.get('logsys') or {}).get('ttl_seconds', DEFAULT_TTL))
+
+
+@requires(MAP_TABLE, build=_map)
+@column_transform
+def map_logsys_from_id(ctx, df):
+    cfg = ctx.rules.get('logsys') or {}
+    cols = dict(DEFAULT_COLUMNS, **(cfg.get('columns') or {}))
+    logsys = _map(ctx)
+    ids = df[cols['source']]
+    out = logsys.map(ids)
+    missing = logsys.unmapped(ids, out)
+    if missing:
+        unmapped_report(ctx).update(missing)
+        if cfg.get('fail_on_unmapped'):
+            raise ValueError(f"Unmapped source system IDs in {MAP_TABLE}: "
+                             + ', '.join(f"{k} ({n} rows)" for k, n in missing.most_common(10)))
+    if not cfg.get('dictionary', True):
+        out = pc.cast(out, pa.string())
+    return {cols['out']: out}
@@ -1,2 +1,36 @@
-def alpha_input(ctx):
-    pass
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from lakehouse_fm_agent.core.columns import column_transform, replace_columns
+
+
+def alpha_input_array(values, length):
+    """
+    CONVERSION_EXIT_ALPHA_INPUT over a whole string column.
+
+    Purely numeric values (ignoring surrounding blanks) are left-padded with
+    zeros to `length`; alphanumeric, empty, over-long and null values pass
+    through unchanged.
+    """
+    if not isinstance(values, (pa.Array, pa.ChunkedArray)):
+        values = pa.array(values, pa.string())
+    # ASCII kernels are safe here: only all-digit values are ever padded,
+    # and for those byte length == character length.
+    trimmed = pc.ascii_trim(values, characters=' ')
+    numeric = pc.and_(pc.ascii_is_decimal(trimmed),
+                      pc.less_equal(pc.binary_length(trimmed), length))
+    return pc.if_else(numeric, pc.ascii_lpad(trimmed, width=length, padding='0'), values)
+
+
+def alpha_input_table(data, lengths):
+    """Apply alpha_input_array to each configured column present in a Table/RecordBatch."""
+    arrays = {name: alpha_input_array(data.column(name), length)
+              for name, length in lengths.items() if name in data.schema.names}
+    return replace_columns(data, arrays) if arrays else data
+
+
+@column_transform
+def alpha_input(ctx, df):
+    lengths = (ctx.rules.get('alpha') or {}).get('columns') or {}
+    return {name: alpha_input_array(df[name], length)
+            for name, length in lengths.items() if name in df}
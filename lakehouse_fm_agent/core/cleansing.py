@@ -1,2 +1,194 @@
-def numeric_check(ctx):
-    pass
+from collections import Counter
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from lakehouse_fm_agent.core.columns import column_transform
+from lakehouse_fm_agent.runtime.preload import requires
+
+# BW's standard permitted characters for characteristic values (before RSKC additions)
+BW_PERMITTED = " !\"%&'()*+,-./:;<=>?_0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+DEFAULT_REPLACEMENT = ' '
+DEFAULT_REJECT_COLUMN = 'REJECTED'
+REJECTS_KEY = 'cleansing_rejects'
+
+_NONPRINTABLE = bytes(range(0x20)) + b'\x7f'
+_NONPRINTABLE_RE = r'[\x{0}-\x{1f}\x{7f}-\x{9f}]'
+
+
+def _class(chars):
+    # RE2 character class members, each as an escaped code point
+    return ''.join(f'\\x{{{ord(c):x}}}' for c in chars)
+
+
+class CharRules:
+    """
+    Compiled character cleansing: uppercase, replace non-printable
+    characters, trim blanks, then the RSKC permitted-character check (plus
+    BW's rules that a value may not be '#' alone or start with '!').
+
+    When every permitted character is ASCII the rules compile to two
+    256-entry byte tables (translation and permitted) applied with numpy
+    over the whole value buffer of a column; offsets are untouched, so no
+    string is rebuilt row by row (non-ASCII bytes are never permitted there,
+    so they stay as they are in rejected rows). Other sets (non-ASCII RSKC additions,
+    ALL_CAPITAL) compile to Arrow's vectorized UTF-8 and RE2 kernels.
+    """
+
+    def __init__(self, permitted=BW_PERMITTED, extra='', all_capital=False, uppercase=True,
+                 trim=True, replacement=DEFAULT_REPLACEMENT):
+        self.permitted = ''.join(dict.fromkeys(permitted + extra))
+        self.all_capital = all_capital
+        self.uppercase = uppercase
+        self.trim = trim
+        self.replacement = replacement
+        self.ascii = not all_capital and self.permitted.isascii() and (
+            replacement is None or (len(replacement) == 1 and replacement.isascii()))
+        if self.ascii:
+            table = np.arange(256, dtype=np.uint8)
+            if uppercase:
+                table[ord('a'):ord('z') + 1] -= 32
+            if replacement is not None:
+                table[list(_NONPRINTABLE)] = ord(replacement)
+            self.translate_table = table
+            ok = np.zeros(256, bool)
+            ok[[ord(c) for c in self.permitted]] = True
+            self.permitted_table = ok
+        else:
+            self.invalid_re = None if all_capital else f'[^{_class(self.permitted)}]'
+
+    @classmethod
+    def from_config(cls, cfg):
+        return cls(permitted=cfg.get('permitted') or BW_PERMITTED,
+                   extra=cfg.get('extra_permitted') or '',
+                   all_capital=bool(cfg.get('all_capital')),
+                   uppercase=cfg.get('uppercase', True),
+                   trim=cfg.get('trim', True),
+                   replacement=cfg.get('replace_nonprintable', DEFAULT_REPLACEMENT))
+
+    @staticmethod
+    def _buffers(arr):
+        """(offsets rebased to 0, value bytes) of a String/LargeStringArray."""
+        n = len(arr)
+        offsets = np.frombuffer(arr.buffers()[1], np.int32 if pa.types.is_string(arr.type) else np.int64)
+        offsets = offsets[arr.offset:arr.offset + n + 1]
+        start, end = int(offsets[0]), int(offsets[-1])
+        data = np.frombuffer(arr.buffers()[2], np.uint8)[start:end] if end > start else np.zeros(0, np.uint8)
+        return (offsets - offsets[0]).astype(offsets.dtype), data
+
+    def _translate(self, arr):
+        """Byte-table translation of a whole StringArray; lengths never change."""
+        if arr.offset:
+            arr = pa.concat_arrays([arr])
+        offsets, data = self._buffers(arr)
+        if not len(data):
+            return arr
+        return pa.Array.from_buffers(arr.type, len(arr), [arr.buffers()[0], pa.py_buffer(offsets),
+                                                          pa.py_buffer(self.translate_table[data])],
+                                     arr.null_count)
+
+    def _invalid(self, arr):
+        """Per row: does any byte fall outside the permitted table."""
+        offsets, data = self._buffers(arr)
+        invalid = np.zeros(len(arr), bool)
+        # Offending bytes are rare: locate them and map each to its row
+        bad = np.flatnonzero(~self.permitted_table[data])
+        if len(bad):
+            invalid[np.searchsorted(offsets, bad, side='right') - 1] = True
+        return invalid
+
+    def clean(self, arr):
+        """Cleaned string array and a bool numpy mask of the rows that fail the check."""
+        if isinstance(arr, pa.ChunkedArray):
+            parts = [self.clean(c) for c in arr.chunks]
+            return (pa.chunked_array([p[0] for p in parts], arr.type),
+                    np.concatenate([p[1] for p in parts]) if parts else np.zeros(0, bool))
+        if not (pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type)):
+            arr = pc.cast(arr, pa.string())
+        if self.ascii:
+            arr = self._translate(arr)
+            if self.trim:
+                arr = pc.utf8_trim(arr, characters=' ')
+            invalid = self._invalid(arr)
+        else:
+            if self.uppercase:
+                arr = pc.utf8_upper(arr)
+            if self.replacement is not None:
+                arr = pc.replace_substring_regex(arr, _NONPRINTABLE_RE, self.replacement)
+            if self.trim:
+                arr = pc.utf8_trim(arr, characters=' ')
+            invalid = (np.zeros(len(arr), bool) if self.invalid_re is None else
+                       pc.fill_null(pc.match_substring_regex(arr, self.invalid_re), False)
+                       .to_numpy(zero_copy_only=False))
+        rule = pc.or_(pc.equal(arr, '#'), pc.starts_with(arr, '!'))
+        invalid |= pc.fill_null(rule, False).to_numpy(zero_copy_only=False)
+        return arr, invalid
+
+
+def _has(data, name):
+    if isinstance(data, (pa.Table, pa.RecordBatch)):
+        return data.schema.get_field_index(name) >= 0
+    return name in data
+
+
+def cleanse(data, columns, rules):
+    """
+    Cleanse the named columns of a Table/RecordBatch/BatchColumns in one
+    pass each. Returns ({name: cleaned array}, rejected BooleanArray, per
+    column reject counts); a row is rejected if any of its columns fails.
+    """
+    cleaned, counts = {}, Counter()
+    rejected = None
+    for name in columns:
+        if not _has(data, name):
+            continue
+        cleaned[name], invalid = rules.clean(data[name])
+        counts[name] = int(invalid.sum())
+        rejected = invalid if rejected is None else rejected | invalid
+    if rejected is None:
+        rejected = np.zeros(data.num_rows, bool)
+    return cleaned, pa.array(rejected, pa.bool_()), counts
+
+
+def _cfg(ctx):
+    return ctx.rules.get('cleansing') or {}
+
+
+def _rules(ctx):
+    return ctx.lookup('cleansing_rules', lambda c: CharRules.from_config(_cfg(c)))
+
+
+def reject_report(ctx):
+    """Rejected rows per column in this context's runs."""
+    return ctx.lookup(REJECTS_KEY, lambda c: Counter())
+
+
+@requires(build=_rules)
+@column_transform
+def check_characters(ctx, df):
+    cfg = _cfg(ctx)
+    cleaned, rejected, counts = cleanse(df, cfg.get('columns') or [], _rules(ctx))
+    reject_report(ctx).update({k: v for k, v in counts.items() if v})
+    out_col = cfg.get('reject_column', DEFAULT_REJECT_COLUMN)
+    if out_col in df:
+        # Keep rows an earlier step already rejected
+        rejected = pc.or_(rejected, pc.fill_null(df[out_col], False))
+    cleaned[out_col] = rejected
+    return cleaned
+
+
+@column_transform
+def numeric_check(ctx, df):
+    """NUMERIC_CHECK: blanks trimmed; HTYPE 'NUMC' for all-digit values, else 'CHAR'."""
+    columns = (_cfg(ctx).get('numeric') or {}).get('columns') or {}
+    out = {}
+    for name, htype_col in columns.items():
+        if name not in df:
+            continue
+        values = pc.utf8_trim(pc.cast(df[name], pa.string()), characters=' ')
+        # As in SAP, blank values count as numeric
+        numc = pc.fill_null(pc.or_(pc.ascii_is_decimal(values), pc.equal(values, '')), False)
+        out[name] = values
+        out[htype_col] = pc.if_else(numc, 'NUMC', 'CHAR')
+    return out
@@ -0,0 +1,127 @@
+import functools
+
+import pyarrow as pa
+
+from lakehouse_fm_agent.runtime.stream import BatchStream
+
+DEFAULT_BATCH_SIZE = 1_000_000
+
+
+def replace_columns(data, arrays):
+    """
+    Return a copy of a Table/RecordBatch with the named columns swapped out;
+    names not present yet are appended.
+    """
+    cols = list(data.columns)
+    fields = list(data.schema)
+    for name, arr in arrays.items():
+        i = data.schema.get_field_index(name)
+        if i < 0:
+            cols.append(arr)
+            fields.append(pa.field(name, arr.type))
+        else:
+            cols[i] = arr
+            fields[i] = fields[i].with_type(arr.type)
+    return type(data).from_arrays(cols, schema=pa.schema(fields, metadata=data.schema.metadata))
+
+
+class BatchColumns:
+    """
+    Read view of one record batch plus the columns transforms produced so
+    far; later transforms see earlier outputs without a batch being rebuilt.
+    memo() shares derived per-batch data (e.g. a calendar lookup of one date
+    column) between the transforms of a fused pass; memo keys are tuples
+    naming the columns they derive from, and update() drops the entries of
+    columns a transform rewrites.
+    """
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.updates = {}
+        self._memo = {}
+
+    def __getitem__(self, name):
+        if name in self.updates:
+            return self.updates[name]
+        return self.batch.column(name)
+
+    def __contains__(self, name):
+        return name in self.updates or self.batch.schema.get_field_index(name) >= 0
+
+    @property
+    def num_rows(self):
+        return self.batch.num_rows
+
+    def memo(self, key, build):
+        if key not in self._memo:
+            self._memo[key] = build()
+        return self._memo[key]
+
+    def update(self, columns):
+        if not columns:
+            return
+        self.updates.update(columns)
+        if self._memo:
+            self._memo = {k: v for k, v in self._memo.items() if not any(c in k for c in columns)}
+
+
+def column_transform(fn=None, *, batch_size=None):
+    """
+    Declare fn(ctx, cols) -> {name: array} as a column-level handler: it reads
+    columns of one batch from cols (a BatchColumns) and returns the columns to
+    add or replace. The decorated function is still a plain handler(ctx);
+    the runner can also chain several with run_transforms in one pass.
+    batch_size(ctx) optionally caps the rows per batch.
+    """
+    if fn is None:
+        return functools.partial(column_transform, batch_size=batch_size)
+
+    @functools.wraps(fn)
+    def handler(ctx):
+        if ctx is None or ctx.current_df is None:
+            return
+        ctx.current_df = run_transforms(ctx, [handler], ctx.current_df)
+
+    handler.column_transform = fn
+    handler.batch_size = batch_size
+    return handler
+
+
+def _batch_size(ctx, handlers):
+    sizes = [h.batch_size(ctx) for h in handlers if h.batch_size]
+    return min(sizes) if sizes else DEFAULT_BATCH_SIZE
+
+
+def _apply(ctx, fns, batch):
+    cols = BatchColumns(batch)
+    for fn in fns:
+        cols.update(fn(ctx, cols))
+    return replace_columns(batch, cols.updates) if cols.updates else batch
+
+
+def run_transforms(ctx, handlers, data):
+    """
+    Apply column_transform handlers in order in a single pass: each batch is
+    threaded through every transform and assembled once, so no intermediate
+    Table exists between steps. A BatchStream is mapped lazily and keeps the
+    reader's batch size.
+    """
+    fns = [h.column_transform for h in handlers]
+    if isinstance(data, BatchStream):
+        schema = data.schema
+        data = data.map(lambda batch: _apply(ctx, fns, batch))
+        if schema is not None:
+            # Keeps the added columns on an empty stream's materialize()
+            data.schema = _apply(ctx, fns, pa.RecordBatch.from_pylist([], schema=schema)).schema
+        return data
+    if not isinstance(data, (pa.Table, pa.RecordBatch)):
+        raise TypeError(f"Column transforms need an Arrow Table/RecordBatch, got {type(data).__name__}")
+    is_table = isinstance(data, pa.Table)
+    batches = data.to_batches(max_chunksize=_batch_size(ctx, handlers)) if is_table else [data]
+    out = [_apply(ctx, fns, batch) for batch in batches]
+    if not is_table:
+        return out[0]
+    if not out:
+        # A 0-row Table has no batches; run the transforms on an empty one for the output schema
+        out = [_apply(ctx, fns, pa.RecordBatch.from_pylist([], schema=data.schema))]
+    return pa.Table.from_batches(out)
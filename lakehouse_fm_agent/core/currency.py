@@ -1,2 +1,243 @@
-def convert_fx(ctx):
-    pass
+from decimal import ROUND_HALF_EVEN, Decimal, localcontext
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from lakehouse_fm_agent.core.columns import column_transform, replace_columns
+from lakehouse_fm_agent.core.dates import to_days
+from lakehouse_fm_agent.runtime.preload import requires
+
+DEFAULT_DECIMALS = 2          # SAP default for currencies missing from TCURX
+DEFAULT_BATCH_SIZE = 1_000_000
+RATE_TYPE = pa.decimal128(19, 10)  # exact rates: up to 1e9 per unit, 10 decimals
+_DAY_BIAS = 1 << 31           # keeps day numbers non-negative inside the packed key
+
+# SAP HALF_UP rounds ties away from zero: Arrow's 'half_towards_infinity'
+# ('half_up' there rounds ties towards +inf)
+_ROUND_MODES = {'HALF_UP': 'half_towards_infinity', 'HALF_EVEN': 'half_to_even'}
+
+DEFAULT_COLUMNS = {
+    'amount': 'AMOUNT',
+    'from': 'DOC_CURRENCY',
+    'to': 'LOCAL_CURRENCY',
+    'date': 'TRANS_DATE',
+    'out': 'AMOUNT_LC',
+}
+
+
+def round_amounts(values, decimals, mode='HALF_UP'):
+    """
+    Round float64 amounts to per-row decimals; HALF_UP rounds .5 away from
+    zero. Only for float input: ties are judged after a 1e-6 re-round, so
+    this is not exact (decimal amounts go through FxRates.convert_exact).
+    """
+    scale = np.power(10.0, decimals)
+    # Re-round at 1e-6 first so 2.675 * 100 (== 267.49999...) rounds as 267.5
+    scaled = np.round(values * scale, 6)
+    if mode == 'HALF_UP':
+        rounded = np.copysign(np.floor(np.abs(scaled) + 0.5), scaled)
+    elif mode == 'HALF_EVEN':
+        rounded = np.round(scaled)
+    else:
+        raise ValueError(f"Unsupported rounding mode {mode!r}")
+    return rounded / scale
+
+
+def _exact_rates(values):
+    """Rates as RATE_TYPE decimals (float rates at the nearest 10-decimal value)."""
+    if pa.types.is_decimal(values.type) and values.type.scale > RATE_TYPE.scale:
+        values = pc.round(values, RATE_TYPE.scale, round_mode='half_to_even')
+    return pc.cast(values, RATE_TYPE)
+
+
+def _invert(rates):
+    """1 / rate for RATE_TYPE decimals, rounded half-even at RATE_TYPE's scale (null for 0)."""
+    quantum = Decimal(1).scaleb(-RATE_TYPE.scale)
+    with localcontext() as dc:
+        dc.prec = 40
+        values = [None if r is None or r == 0 else (1 / r).quantize(quantum, ROUND_HALF_EVEN)
+                  for r in rates.to_pylist()]
+    return pa.array(values, RATE_TYPE)
+
+
+def _exact_amounts(amounts):
+    if pa.types.is_decimal(amounts.type):
+        return amounts
+    if pa.types.is_integer(amounts.type):
+        return pc.cast(amounts, pa.decimal128(19, 0))
+    raise TypeError(f"Amounts must be decimal, integer or float, got {amounts.type}")
+
+
+class FxRates:
+    """
+    As-of FX index built from ref.fx_rates (rate_type, from_curr, to_curr,
+    valid_from, rate) and ref.currency_decimals (currency, decimals).
+
+    Rates are sorted by a packed int64 key (pair code << 32 | day), i.e. one
+    ascending date array per currency pair laid end to end, so a whole column
+    resolves with a single np.searchsorted instead of a join. Pairs quoted in
+    one direction only also get the reciprocal rate.
+
+    Rates are kept twice: float64 for float amounts and RATE_TYPE decimals
+    for decimal/integer amounts, which convert and round in exact decimal
+    arithmetic.
+    """
+
+    def __init__(self, pairs, keys, rates, currencies, decimals, exact_rates=None):
+        self.pairs = pairs            # pa.StringArray, 'FROM/TO' per pair code
+        self.keys = keys              # np.int64, sorted packed (pair, day)
+        self.rates = rates            # np.float64, aligned with keys
+        self.currencies = currencies  # pa.StringArray
+        self.decimals = decimals      # np.int64, aligned with currencies
+        if exact_rates is None:
+            exact_rates = _exact_rates(pa.array(rates, pa.float64()))
+        # RATE_TYPE, aligned with keys, plus a trailing 1 for same-currency rows
+        self.exact_rates = pa.concat_arrays([exact_rates, pa.array([Decimal(1)], RATE_TYPE)])
+
+    @classmethod
+    def from_tables(cls, rates, currency_decimals=None, rate_type=None):
+        if rate_type and 'rate_type' in rates.column_names:
+            rates = rates.filter(pc.equal(rates['rate_type'], rate_type))
+        frm, to = rates['from_curr'], rates['to_curr']
+        days = to_days(rates['valid_from'])
+        value = pc.cast(rates['rate'], pa.float64())
+        exact = _exact_rates(rates['rate']).combine_chunks()
+
+        direct = pc.unique(pc.binary_join_element_wise(frm, to, '/'))
+        inverse = pc.invert(pc.is_in(pc.binary_join_element_wise(to, frm, '/'), value_set=direct))
+        frm_all = pa.chunked_array(list(frm.chunks) + list(to.filter(inverse).chunks), frm.type)
+        to_all = pa.chunked_array(list(to.chunks) + list(frm.filter(inverse).chunks), to.type)
+        day_np = np.concatenate([days.to_numpy(), days.filter(inverse).to_numpy()]).astype(np.int64)
+        rate_np = np.concatenate([value.to_numpy(), 1.0 / value.filter(inverse).to_numpy()])
+        exact_all = pa.concat_arrays([exact, _invert(pc.filter(exact, inverse))])
+
+        encoded = pc.dictionary_encode(pc.binary_join_element_wise(frm_all, to_all, '/')).combine_chunks()
+        codes = encoded.indices.to_numpy().astype(np.int64)
+        keys = (codes << 32) | (day_np + _DAY_BIAS)
+        order = np.argsort(keys, kind='stable')
+
+        if currency_decimals is not None:
+            currencies = currency_decimals['currency'].combine_chunks()
+            decimals = currency_decimals['decimals'].to_numpy().astype(np.int64)
+        else:
+            currencies, decimals = pa.array([], pa.string()), np.zeros(0, np.int64)
+        return cls(encoded.dictionary, keys[order], rate_np[order], currencies, decimals,
+                   exact_all.take(pa.array(order)))
+
+    @classmethod
+    def from_context(cls, ctx, rate_type=None):
+        return cls.from_tables(ctx.read_uc('ref.fx_rates'), ctx.read_uc('ref.currency_decimals'),
+                               rate_type=rate_type)
+
+    def rate_index(self, frm, to, dates):
+        """Per-row position of the as-of rate in keys/rates (-1 where none is valid; len(keys) for FROM == TO)."""
+        codes = pc.index_in(pc.binary_join_element_wise(frm, to, '/'), value_set=self.pairs)
+        code_np = codes.to_numpy(zero_copy_only=False)
+        days = to_days(dates)
+        known = ~np.isnan(code_np) & days.is_valid().to_numpy(zero_copy_only=False)
+        code_np = np.nan_to_num(code_np, nan=0).astype(np.int64)
+        day_np = days.fill_null(0).to_numpy().astype(np.int64)
+
+        idx = np.full(len(code_np), -1, np.int64)
+        if len(self.keys):
+            pos = np.searchsorted(self.keys, (code_np << 32) | (day_np + _DAY_BIAS), side='right') - 1
+            hit = np.maximum(pos, 0)
+            ok = known & (pos >= 0) & ((self.keys[hit] >> 32) == code_np)
+            idx[ok] = hit[ok]
+        same = pc.fill_null(pc.equal(frm, to), False).to_numpy(zero_copy_only=False)
+        idx[same] = len(self.keys)
+        return idx
+
+    def lookup_rates(self, frm, to, dates):
+        """Per-row as-of rate (np.float64, NaN where no rate is valid)."""
+        idx = self.rate_index(frm, to, dates)
+        rate = np.append(self.rates, 1.0)[np.maximum(idx, 0)]
+        rate[idx < 0] = np.nan
+        return rate
+
+    def lookup_exact_rates(self, frm, to, dates):
+        """Per-row as-of rate as RATE_TYPE decimals (null where no rate is valid)."""
+        idx = self.rate_index(frm, to, dates)
+        return self.exact_rates.take(pa.array(np.maximum(idx, 0), mask=idx < 0))
+
+    def decimals_for(self, currencies):
+        idx = pc.index_in(currencies, value_set=self.currencies).to_numpy(zero_copy_only=False)
+        found = ~np.isnan(idx)
+        out = np.full(len(idx), DEFAULT_DECIMALS, np.int64)
+        out[found] = self.decimals[idx[found].astype(np.int64)]
+        return out
+
+    def output_type(self, amount_type):
+        """Result type for an amount type: float64 stays float, else decimal128(38, s) wide enough for every currency."""
+        if pa.types.is_floating(amount_type):
+            return pa.float64()
+        scale = amount_type.scale if pa.types.is_decimal(amount_type) else 0
+        return pa.decimal128(38, max(scale, DEFAULT_DECIMALS, int(self.decimals.max(initial=0))))
+
+    def convert(self, amounts, frm, to, dates, rounding='HALF_UP'):
+        """
+        Convert one batch of amounts; null where the amount or the rate is
+        missing. Float amounts are converted in float64; decimal and integer
+        amounts exactly, as decimals (see convert_exact).
+        """
+        if not pa.types.is_floating(amounts.type):
+            return self.convert_exact(amounts, frm, to, dates, rounding)
+        amount_np = pc.cast(amounts, pa.float64()).to_numpy(zero_copy_only=False)
+        result = round_amounts(amount_np * self.lookup_rates(frm, to, dates),
+                               self.decimals_for(to), rounding)
+        return pa.array(result, pa.float64(), mask=np.isnan(result))
+
+    def convert_exact(self, amounts, frm, to, dates, rounding='HALF_UP'):
+        """
+        Decimal conversion: amount * decimal rate (exact product), rounded to
+        the target currency's decimals with Arrow's decimal round, as
+        output_type(amounts.type).
+        """
+        if rounding not in _ROUND_MODES:
+            raise ValueError(f"Unsupported rounding mode {rounding!r}")
+        amounts = _exact_amounts(amounts)
+        rates = self.lookup_exact_rates(frm, to, dates)
+        if amounts.type.precision + rates.type.precision + 1 > 38:
+            # The exact product needs more than decimal128's 38 digits
+            amounts = pc.cast(amounts, pa.decimal256(amounts.type.precision, amounts.type.scale))
+            rates = pc.cast(rates, pa.decimal256(rates.type.precision, rates.type.scale))
+        product = pc.multiply(amounts, rates)
+        places = self.decimals_for(to)
+        result = product
+        for i, d in enumerate(np.unique(places)):
+            rounded = pc.round(product, int(d), round_mode=_ROUND_MODES[rounding])
+            result = rounded if i == 0 else pc.if_else(pa.array(places == d), rounded, result)
+        return pc.cast(result, self.output_type(amounts.type))
+
+    def convert_table(self, data, columns=None, rounding='HALF_UP', batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Add/replace columns['out'] on a Table/RecordBatch, converting in batches
+        of batch_size rows so temporaries stay bounded for very large inputs.
+        """
+        cols = dict(DEFAULT_COLUMNS, **(columns or {}))
+        batches = data.to_batches(max_chunksize=batch_size) if isinstance(data, pa.Table) else [data]
+        chunks = [self.convert(b[cols['amount']], b[cols['from']], b[cols['to']], b[cols['date']], rounding)
+                  for b in batches]
+        out_type = self.output_type(data.schema.field(cols['amount']).type)
+        out = pa.chunked_array(chunks, out_type) if isinstance(data, pa.Table) else chunks[0]
+        return replace_columns(data, {cols['out']: out})
+
+
+def _fx_batch_size(ctx):
+    return (ctx.rules.get('currency') or {}).get('batch_size', DEFAULT_BATCH_SIZE)
+
+
+def _fx(ctx):
+    rate_type = (ctx.rules.get('currency') or {}).get('rate_type')
+    return ctx.lookup('fx_rates', lambda c: FxRates.from_context(c, rate_type=rate_type))
+
+
+@requires('ref.fx_rates', 'ref.currency_decimals', build=_fx)
+@column_transform(batch_size=_fx_batch_size)
+def convert_fx(ctx, df):
+    cfg = ctx.rules.get('currency') or {}
+    cols = dict(DEFAULT_COLUMNS, **(cfg.get('columns') or {}))
+    out = _fx(ctx).convert(df[cols['amount']], df[cols['from']], df[cols['to']], df[cols['date']],
+                     cfg.get('default_rounding', 'HALF_UP'))
+    return {cols['out']: out}
@@ -1,2 +1,220 @@
-def last_day(ctx):
-    pass
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from lakehouse_fm_agent.core.columns import column_transform
+from lakehouse_fm_agent.runtime.preload import requires
+
+DEFAULT_COLUMNS = {
+    'date': 'TRANS_DATE',
+    'last_day': 'LAST_DAY',
+    'fiscal_year': 'FISCAL_YEAR',
+    'fiscal_period': 'FISCAL_PERIOD',
+    'next_working_day': 'NEXT_WORKING_DAY',
+}
+
+
+def to_days(values):
+    """
+    Date-like column -> int32 days since 1970-01-01 (Arrow, nulls kept).
+    Accepts date32/date64/timestamp and SAP DATS strings ('YYYYMMDD');
+    initial or malformed DATS values ('00000000') become null.
+    """
+    t = values.type
+    if pa.types.is_string(t) or pa.types.is_large_string(t):
+        values = pc.strptime(values, format='%Y%m%d', unit='s', error_is_null=True)
+        t = values.type
+    if pa.types.is_timestamp(t) or pa.types.is_date64(t):
+        values = pc.cast(values, pa.date32(), safe=False)
+    return pc.cast(values, pa.int32())
+
+
+def _day_array(values):
+    """Arrow date-like column -> (int64 day numbers, validity mask) as numpy."""
+    days = to_days(values)
+    if isinstance(days, pa.ChunkedArray):
+        days = days.combine_chunks()
+    return days.fill_null(0).to_numpy().astype(np.int64), days.is_valid().to_numpy(zero_copy_only=False)
+
+
+def _to_date32(day_np, valid):
+    return pa.array(day_np.astype(np.int32), pa.int32(), mask=~valid).cast(pa.date32())
+
+
+def month_end_days(day_np):
+    """Last calendar day of the month for int day numbers (LAST_DAY_OF_MONTHS)."""
+    months = day_np.astype('datetime64[D]').astype('datetime64[M]')
+    return ((months + 1).astype('datetime64[D]') - 1).astype(np.int64)
+
+
+class _VariantIndex:
+    """Dense day-number arrays for one fiscal year variant, offset by `base`."""
+
+    def __init__(self, base, period, period_end, next_working):
+        self.base = base
+        self.period = period              # int32 fiscal_year * 1000 + period, -1 = unknown day
+        self.period_end = period_end      # int32 day number of the period's last day
+        self.next_working = next_working  # int32 day number of next working day (on/after), -1 none
+        if not len(period):
+            # keep gathers valid for a variant without any calendar rows
+            self.period = np.full(1, -1, np.int32)
+            self.period_end = self.next_working = np.full(1, -1, np.int32)
+
+    def _slot(self, day_np, valid):
+        rel = day_np - self.base
+        ok = valid & (rel >= 0) & (rel < len(self.period))
+        rel = np.where(ok, rel, 0)
+        return rel, ok & (self.period[rel] >= 0)
+
+    def resolve(self, day_np, valid):
+        """-> dict of numpy arrays (period, fiscal_year, period_end, next_working) + mask."""
+        rel, ok = self._slot(day_np, valid)
+        period = self.period[rel]
+        nxt = self.next_working[rel]
+        return {
+            'fiscal_year': period // 1000,
+            'fiscal_period': period % 1000,
+            'period_end': self.period_end[rel].astype(np.int64),
+            'next_working': nxt.astype(np.int64),
+        }, ok, ok & (nxt >= 0)
+
+
+class CalendarIndex:
+    """
+    Fiscal calendar index over ref.calendar (fiscal_variant, date,
+    fiscal_year, fiscal_period, is_working_day).
+
+    Each variant is precomputed into dense arrays indexed by day number
+    (day -> fiscal period, day -> last day of period, day -> next working
+    day), so a date column resolves with one array gather instead of a join
+    or per-row date math. Days outside the calendar resolve to null.
+    """
+
+    def __init__(self, variants):
+        self.variants = variants
+
+    @classmethod
+    def from_table(cls, table):
+        variants = {}
+        if 'fiscal_variant' in table.column_names:
+            names = pc.unique(table['fiscal_variant']).to_pylist()
+        else:
+            names = [None]
+        for name in names:
+            rows = table if name is None else table.filter(pc.equal(table['fiscal_variant'], name))
+            variants[name] = cls._build(rows)
+        return cls(variants)
+
+    @classmethod
+    def from_context(cls, ctx):
+        return cls.from_table(ctx.read_uc('ref.calendar'))
+
+    @staticmethod
+    def _build(rows):
+        days, valid = _day_array(rows['date'])
+        days = days[valid]
+        code = (pc.cast(rows['fiscal_year'], pa.int64()).to_numpy(zero_copy_only=False)[valid] * 1000
+                + pc.cast(rows['fiscal_period'], pa.int64()).to_numpy(zero_copy_only=False)[valid])
+        working = pc.fill_null(rows['is_working_day'], False).to_numpy(zero_copy_only=False)[valid]
+        if not len(days):
+            empty = np.zeros(0, np.int32)
+            return _VariantIndex(0, empty, empty, empty)
+        base = int(days.min())
+        n = int(days.max()) - base + 1
+        rel = days - base
+
+        period = np.full(n, -1, np.int32)
+        period[rel] = code
+        codes, inverse = np.unique(code, return_inverse=True)
+        ends = np.full(len(codes), np.iinfo(np.int64).min)
+        np.maximum.at(ends, inverse, days)
+        period_end = np.zeros(n, np.int32)
+        period_end[rel] = ends[inverse]
+
+        is_working = np.zeros(n, bool)
+        is_working[rel] = working
+        # Suffix minimum of working-day positions -> next working day on/after
+        pos = np.where(is_working, np.arange(n), n)
+        nxt = np.minimum.accumulate(pos[::-1])[::-1]
+        next_working = np.where(nxt < n, nxt + base, -1).astype(np.int32)
+        return _VariantIndex(base, period, period_end, next_working)
+
+    def variant(self, name=None):
+        if name in self.variants:
+            return self.variants[name]
+        if name is None and len(self.variants) == 1:
+            return next(iter(self.variants.values()))
+        raise KeyError(f"Fiscal variant {name!r} not in calendar")
+
+    def resolve(self, dates, variant=None):
+        """
+        Resolve a date column -> dict of Arrow arrays: fiscal_year,
+        fiscal_period, period_end (date32), next_working_day (date32).
+        `variant` is a single variant name or a per-row variant column.
+        """
+        day_np, valid = _day_array(dates)
+        n = len(day_np)
+        out = {k: np.zeros(n, np.int64) for k in ('fiscal_year', 'fiscal_period', 'period_end', 'next_working')}
+        ok = np.zeros(n, bool)
+        ok_next = np.zeros(n, bool)
+        if variant is None or isinstance(variant, str):
+            groups = [(self.variant(variant), slice(None))]
+        else:
+            col = variant.combine_chunks() if isinstance(variant, pa.ChunkedArray) else variant
+            encoded = pc.dictionary_encode(col)
+            idx = encoded.indices.fill_null(-1).to_numpy()
+            groups = [(self.variant(name), idx == i)
+                      for i, name in enumerate(encoded.dictionary.to_pylist()) if name in self.variants]
+        for index, sel in groups:
+            res, hit, hit_next = index.resolve(day_np[sel], valid[sel])
+            for k, v in res.items():
+                out[k][sel] = v
+            ok[sel] = hit
+            ok_next[sel] = hit_next
+        return {
+            'fiscal_year': pa.array(out['fiscal_year'].astype(np.int32), mask=~ok),
+            'fiscal_period': pa.array(out['fiscal_period'].astype(np.int32), mask=~ok),
+            'period_end': _to_date32(out['period_end'], ok),
+            'next_working_day': _to_date32(out['next_working'], ok_next),
+        }
+
+
+def _cfg(ctx):
+    cfg = ctx.rules.get('dates') or {}
+    return cfg, dict(DEFAULT_COLUMNS, **(cfg.get('columns') or {}))
+
+
+def _calendar(ctx):
+    return ctx.lookup('calendar', CalendarIndex.from_context)
+
+
+def _resolved(ctx, df):
+    # Shared by the calendar handlers of one fused pass: one lookup per batch
+    cfg, cols = _cfg(ctx)
+    variant = cfg.get('fiscal_variant')
+    return cols, df.memo(('calendar', cols['date'], variant),
+                         lambda: _calendar(ctx).resolve(df[cols['date']], variant))
+
+
+@column_transform
+def last_day(ctx, df):
+    _, cols = _cfg(ctx)
+    day_np, valid = df.memo(('days', cols['date']), lambda: _day_array(df[cols['date']]))
+    return {cols['last_day']: _to_date32(month_end_days(day_np), valid)}
+
+
+@requires('ref.calendar', build=_calendar)
+@column_transform
+def date_to_period(ctx, df):
+    cols, res = _resolved(ctx, df)
+    return {
+        cols['fiscal_year']: res['fiscal_year'],
+        cols['fiscal_period']: res['fiscal_period'],
+    }
+
+
+@requires('ref.calendar', build=_calendar)
+@column_transform
+def next_working_day(ctx, df):
+    cols, res = _resolved(ctx, df)
+    return {cols['next_working_day']: res['next_working_day']}
@@ -1,10 +1,195 @@
-def convert_simple(ctx):
-    pass
+from collections import OrderedDict, defaultdict
+from fractions import Fraction
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 
-def conv_buom_su_ssu(ctx):
-    pass
+from lakehouse_fm_agent.core.columns import column_transform
+from lakehouse_fm_agent.runtime.preload import requires
 
+DEFAULT_LRU_SIZE = 4096
+_SEP = '\x1f'
 
-def check_uom(ctx):
-    pass
+DEFAULT_COLUMNS = {
+    'material': 'MATNR',
+    'qty': 'QUANTITY',
+    'from': 'UNIT',
+    'to': 'BASE_UOM',
+    'out': 'QUANTITY_BUOM',
+    'valid': 'UOM_VALID',
+}
+DEFAULT_SU_SSU_COLUMNS = {
+    'material': 'MATNR',
+    'qty': 'QUANTITY_BUOM',
+    'buom': 'BASE_UOM',
+    'su': 'SALES_UNIT',
+    'ssu': 'SALES_SUB_UNIT',
+    'out_su': 'QUANTITY_SU',
+    'out_ssu': 'QUANTITY_SSU',
+}
+
+
+def _fraction(value):
+    # str() keeps decimal literals exact (0.001 -> 1/1000, not the binary float)
+    return Fraction(value) if isinstance(value, int) else Fraction(str(value))
+
+
+def _closure(edges):
+    """
+    Transitive closure of unit factors as unit -> (component root, ratio),
+    where qty_in_root = qty_in_unit * ratio. Any factor between two units of
+    one component is then ratio[from] / ratio[to] -- exact, O(units) storage.
+    """
+    adj = defaultdict(list)
+    for frm, to, factor in edges:
+        adj[frm].append((to, factor))
+        adj[to].append((frm, 1 / factor))
+    out = {}
+    for unit in adj:
+        if unit in out:
+            continue
+        out[unit] = (unit, Fraction(1))
+        stack = [unit]
+        while stack:
+            a = stack.pop()
+            root, ra = out[a]
+            for b, factor in adj[a]:
+                if b not in out:
+                    out[b] = (root, ra / factor)
+                    stack.append(b)
+    return out
+
+
+class UomFactors:
+    """
+    Factor engine over ref.uom_factors (material, from_uom, to_uom, numerator,
+    denominator; material null = global), with qty_to = qty_from * num / den.
+
+    The global closure is built once; material-specific closures (global
+    factors overlaid with the material's own, which win on the same unit
+    pair) are built on demand and kept in an LRU. Columns are converted by
+    resolving each distinct (material, from, to) combination once and
+    broadcasting the factors with numpy.
+    """
+
+    def __init__(self, global_edges, material_edges=None, lru_size=DEFAULT_LRU_SIZE):
+        self.global_edges = list(global_edges)
+        self.material_edges = dict(material_edges or {})
+        self.lru_size = lru_size
+        self._global = _closure(self.global_edges)
+        self._lru = OrderedDict()
+        self._materials = pa.array(sorted(self.material_edges), pa.string())
+
+    @classmethod
+    def from_table(cls, table, lru_size=DEFAULT_LRU_SIZE):
+        rows = table.select(['material', 'from_uom', 'to_uom', 'numerator', 'denominator']).to_pylist()
+        global_edges, material_edges = [], defaultdict(list)
+        for r in rows:
+            edge = (r['from_uom'], r['to_uom'], _fraction(r['numerator']) / _fraction(r['denominator']))
+            if r['material']:
+                material_edges[r['material']].append(edge)
+            else:
+                global_edges.append(edge)
+        return cls(global_edges, material_edges, lru_size)
+
+    @classmethod
+    def from_context(cls, ctx, lru_size=DEFAULT_LRU_SIZE):
+        return cls.from_table(ctx.read_uc('ref.uom_factors'), lru_size)
+
+    def closure(self, material=None):
+        if not material or material not in self.material_edges:
+            return self._global
+        hit = self._lru.get(material)
+        if hit is not None:
+            self._lru.move_to_end(material)
+            return hit
+        own = self.material_edges[material]
+        pairs = {frozenset((f, t)) for f, t, _ in own}
+        edges = own + [e for e in self.global_edges if frozenset(e[:2]) not in pairs]
+        hit = self._lru[material] = _closure(edges)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+        return hit
+
+    def factor(self, material, from_uom, to_uom):
+        """Exact factor qty_to / qty_from, or None when the units are not convertible."""
+        if from_uom == to_uom and from_uom is not None:
+            return Fraction(1)
+        closure = self.closure(material)
+        a, b = closure.get(from_uom), closure.get(to_uom)
+        if a is None or b is None or a[0] != b[0]:
+            return None
+        return a[1] / b[1]
+
+    def factors(self, from_uom, to_uom, materials=None):
+        """Per-row (numerator, denominator) float64 arrays; 0/0 marks invalid rows."""
+        parts = [from_uom, to_uom]
+        if materials is not None and len(self._materials):
+            # Materials without own factors collapse onto the global closure
+            specific = pc.is_in(materials, value_set=self._materials)
+            parts.insert(0, pc.if_else(specific, materials, ''))
+        encoded = pc.dictionary_encode(pc.binary_join_element_wise(*parts, _SEP))
+        if isinstance(encoded, pa.ChunkedArray):
+            encoded = encoded.combine_chunks()
+        combos = encoded.dictionary.to_pylist()
+        num = np.zeros(len(combos) + 1)
+        den = np.zeros(len(combos) + 1)
+        for i, key in enumerate(combos):
+            keys = key.split(_SEP)
+            material = keys[0] if len(keys) == 3 else None
+            f = self.factor(material, keys[-2], keys[-1])
+            if f is not None:
+                num[i], den[i] = f.numerator, f.denominator
+        # null keys (null unit) map to the trailing invalid slot
+        idx = encoded.indices.fill_null(len(combos)).to_numpy()
+        return num[idx], den[idx]
+
+    def convert(self, qty, from_uom, to_uom, materials=None):
+        num, den = self.factors(from_uom, to_uom, materials)
+        valid = den != 0
+        q = pc.cast(qty, pa.float64()).to_numpy(zero_copy_only=False)
+        out = np.divide(q * num, den, out=np.full(len(q), np.nan), where=valid)
+        return pa.array(out, pa.float64(), mask=np.isnan(out))
+
+    def check(self, from_uom, to_uom, materials=None):
+        """Bulk validity: True where a factor exists for the row's units."""
+        _, den = self.factors(from_uom, to_uom, materials)
+        return pa.array(den != 0)
+
+
+def _columns(ctx, key, defaults):
+    return dict(defaults, **((ctx.rules.get('uom') or {}).get(key) or {}))
+
+
+def _factors(ctx):
+    lru = (ctx.rules.get('uom') or {}).get('lru_size', DEFAULT_LRU_SIZE)
+    return ctx.lookup('uom_factors', lambda c: UomFactors.from_context(c, lru))
+
+
+@requires('ref.uom_factors', build=_factors)
+@column_transform
+def convert_simple(ctx, df):
+    cols = _columns(ctx, 'columns', DEFAULT_COLUMNS)
+    mat = df[cols['material']] if cols['material'] in df else None
+    return {cols['out']: _factors(ctx).convert(df[cols['qty']], df[cols['from']], df[cols['to']], mat)}
+
+
+@requires('ref.uom_factors', build=_factors)
+@column_transform
+def conv_buom_su_ssu(ctx, df):
+    cols = _columns(ctx, 'su_ssu_columns', DEFAULT_SU_SSU_COLUMNS)
+    engine = _factors(ctx)
+    mat = df[cols['material']] if cols['material'] in df else None
+    # Both legs come straight from the closure, so BUoM -> SSU needs no SU hop
+    qty_su = engine.convert(df[cols['qty']], df[cols['buom']], df[cols['su']], mat)
+    qty_ssu = engine.convert(df[cols['qty']], df[cols['buom']], df[cols['ssu']], mat)
+    return {cols['out_su']: qty_su, cols['out_ssu']: qty_ssu}
+
+
+@requires('ref.uom_factors', build=_factors)
+@column_transform
+def check_uom(ctx, df):
+    cols = _columns(ctx, 'columns', DEFAULT_COLUMNS)
+    mat = df[cols['material']] if cols['material'] in df else None
+    return {cols['valid']: _factors(ctx).check(df[cols['from']], df[cols['to']], mat)}
@@ -1,2 +1,315 @@
-def read_masterdata(ctx):
-    pass
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from lakehouse_fm_agent.core.alpha import alpha_input_array
+from lakehouse_fm_agent.core.columns import column_transform
+from lakehouse_fm_agent.core.hashing import hash_strings, key_strings
+from lakehouse_fm_agent.runtime.preload import requires
+
+HASH_COL = '_KEY_HASH'
+KEY_COL = '_KEY'
+DELETED_COL = '_DELETED'
+RECORDMODE = 'RECORDMODE'
+DELETE_MODES = ('D', 'R')
+
+DEFAULT_KEYS = ('MATNR',)
+DEFAULT_MAX_DELTAS = 8
+DEFAULT_ATTRIBUTES = {
+    'MEINS': 'BASE_UOM',
+    'MATKL': 'MATL_GROUP',
+}
+
+_opened = {}                  # (path, mtime_ns) -> MaterialIndex, shared by the threads of a process
+_opened_lock = threading.Lock()
+
+
+def _map_file(path):
+    """Zero-copy Table over an Arrow IPC file, backed by the OS page cache."""
+    with pa.memory_map(str(path), 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+class _Layer:
+    def __init__(self, table):
+        self.table = table
+        # One batch per file, so these are views of the mapping, not copies
+        self.hashes = table[HASH_COL].chunk(0).to_numpy() if len(table) else np.zeros(0, np.uint64)
+        self.keys = table[KEY_COL].chunk(0) if len(table) else pa.array([], pa.string())
+        self.deleted = (table[DELETED_COL].chunk(0).to_numpy(zero_copy_only=False)
+                        if DELETED_COL in table.column_names and len(table) else None)
+
+    def find(self, hashes, keys):
+        """Row per probe key (-1 where absent), comparing keys on hash hits."""
+        # Probing in hash order keeps the binary searches cache-friendly
+        order = np.argsort(hashes)
+        pos = np.empty(len(hashes), np.int64)
+        pos[order] = np.searchsorted(self.hashes, hashes[order])
+        hit = pos < len(self.hashes)
+        hit[hit] = self.hashes[pos[hit]] == hashes[hit]
+        rows = np.where(hit, pos, -1)
+        cand = np.flatnonzero(hit)
+        if len(cand):
+            same = pc.equal(self.keys.take(pa.array(pos[cand])), keys.take(pa.array(cand)))
+            clash = cand[~same.to_numpy(zero_copy_only=False)]
+            for i in clash.tolist():
+                # 64-bit collision: scan the run of equal hashes
+                rows[i] = -1
+                j = pos[i]
+                while j < len(self.hashes) and self.hashes[j] == hashes[i]:
+                    if self.keys[j].as_py() == keys[i].as_py():
+                        rows[i] = j
+                        break
+                    j += 1
+        return rows
+
+
+class MaterialIndex:
+    """
+    Material master as a columnar snapshot with a hash index on the business
+    key, replacing per-record master-data reads (RSAU_READ_MASTER_DATA) and
+    per-handler joins.
+
+    Layout::
+
+        <root>/_material.json           keys, ALPHA lengths, version, base and delta files
+        <root>/base-NNNNNN.arrow        snapshot, sorted by key hash
+        <root>/delta-NNNNNN.arrow       upserts/deletes since the base, sorted by key hash
+
+    Files are uncompressed Arrow IPC with one record batch, opened with
+    memory maps: every process reading the index shares the page cache
+    instead of holding its own copy, and the sorted _KEY_HASH column is the
+    index (a whole key column resolves with one np.searchsorted per file).
+    refresh() writes a delta extract as a new delta file; after max_deltas
+    files the deltas are folded into a new base. Keys are ALPHA-normalized
+    (zero padded) before hashing, so '123' and '000000000000000123' match.
+    """
+
+    def __init__(self, root, keys=None, alpha=None, max_deltas=DEFAULT_MAX_DELTAS):
+        self.root = Path(root)
+        meta_path = self.root / '_material.json'
+        if meta_path.exists():
+            self.meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        else:
+            self.meta = {'keys': list(keys or DEFAULT_KEYS), 'alpha': dict(alpha or {}),
+                         'version': 0, 'base': None, 'deltas': []}
+        self.keys = self.meta['keys']
+        self.alpha = self.meta['alpha']
+        self.max_deltas = max_deltas
+        self._layers = None
+
+    @classmethod
+    def open(cls, root, **kwargs):
+        """Shared read-only handle for the current snapshot of root."""
+        meta_path = Path(root) / '_material.json'
+        if not meta_path.exists():
+            raise LookupError(f"No material index at {root}")
+        key = (str(meta_path.resolve()), meta_path.stat().st_mtime_ns)
+        with _opened_lock:
+            if key not in _opened:
+                _opened[key] = cls(root, **kwargs)
+            return _opened[key]
+
+    # -- metadata ---------------------------------------------------------------
+    def _commit(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f'_material.json.tmp{os.getpid()}'
+        tmp.write_text(json.dumps(self.meta), encoding='utf-8')
+        os.replace(tmp, self.root / '_material.json')
+
+    @property
+    def num_rows(self):
+        return self.meta.get('rows', 0)
+
+    @property
+    def schema(self):
+        layers = self._open_layers()
+        return layers[-1].table.schema if layers else None
+
+    def _open_layers(self):
+        """Mapped files, base first then deltas oldest to newest."""
+        if self._layers is None:
+            names = ([self.meta['base']] if self.meta['base'] else []) + self.meta['deltas']
+            self._layers = [_Layer(_map_file(self.root / n)) for n in names]
+        return self._layers
+
+    # -- keys -------------------------------------------------------------------
+    def key_strings(self, data):
+        """Normalized business key per row (ALPHA on the configured key columns)."""
+        cols = {}
+        for c in self.keys:
+            col = data[c]
+            cols[c] = alpha_input_array(col, self.alpha[c]) if c in self.alpha else col
+        return key_strings(cols, self.keys)
+
+    def _prepare(self, data):
+        keys = self.key_strings(data)
+        hashes = hash_strings(keys)
+        # Last occurrence per key wins (extract order)
+        codes = pc.dictionary_encode(keys).indices.to_numpy()
+        _, first_rev = np.unique(codes[::-1], return_index=True)
+        last = np.sort(len(codes) - 1 - first_rev)
+        data, keys, hashes = data.take(pa.array(last)), keys.take(pa.array(last)), hashes[last]
+        deleted = np.zeros(len(data), bool)
+        if RECORDMODE in data.column_names:
+            deleted = pc.fill_null(pc.is_in(data[RECORDMODE], value_set=pa.array(DELETE_MODES)),
+                                   False).to_numpy(zero_copy_only=False)
+            data = data.drop_columns([RECORDMODE])
+        data = data.append_column(KEY_COL, keys).append_column(HASH_COL, pa.array(hashes, pa.uint64()))
+        return data, deleted
+
+    def _write(self, kind, table):
+        self.meta['version'] += 1
+        name = f"{kind}-{self.meta['version']:06d}.arrow"
+        table = table.take(pc.sort_indices(table[HASH_COL])).combine_chunks()
+        self.root.mkdir(parents=True, exist_ok=True)
+        with pa.OSFile(str(self.root / name), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_batch(table.to_batches()[0] if len(table) else
+                               pa.RecordBatch.from_pylist([], schema=table.schema))
+        return name
+
+    # -- refresh ----------------------------------------------------------------
+    def refresh(self, data):
+        """
+        Apply a full or delta extract (Table/RecordBatch of material rows; a
+        RECORDMODE of 'D'/'R' deletes the key). The first refresh writes the
+        base snapshot. Returns the new version.
+        """
+        if isinstance(data, pa.RecordBatch):
+            data = pa.Table.from_batches([data])
+        data, deleted = self._prepare(data)
+        schema = self.schema
+        if schema is not None:
+            names = [n for n in schema.names if n != DELETED_COL]
+            data = data.select(names).cast(pa.schema([schema.field(n) for n in names]))
+        obsolete = []
+        if self.meta['base'] is None:
+            self.meta['base'] = self._write('base', data.filter(pa.array(~deleted)))
+        else:
+            self.meta['deltas'].append(self._write('delta', data.append_column(DELETED_COL, pa.array(deleted))))
+            self._layers = None
+            if len(self.meta['deltas']) > self.max_deltas:
+                obsolete = self._fold()
+        self._layers = None
+        self.meta['rows'] = self._count()
+        self._commit()
+        # Readers that still map the old files keep their pages until they close them
+        for name in obsolete:
+            (self.root / name).unlink(missing_ok=True)
+        return self.meta['version']
+
+    def _fold(self):
+        """New base from the base plus all deltas; returns the replaced file names."""
+        layers = self._open_layers()
+        live = []
+        # Newest wins: a key seen in a later file hides it in every earlier one
+        seen = np.zeros(0, np.uint64)
+        for layer in reversed(layers):
+            keep = ~np.isin(layer.hashes, seen)
+            if layer.deleted is not None:
+                alive = keep & ~layer.deleted
+            else:
+                alive = keep
+            table = layer.table.filter(pa.array(alive))
+            if DELETED_COL in table.column_names:
+                table = table.drop_columns([DELETED_COL])
+            live.append(table)
+            seen = np.union1d(seen, layer.hashes)
+        obsolete = [self.meta['base']] + self.meta['deltas']
+        self.meta['base'] = self._write('base', pa.concat_tables(live[::-1]))
+        self.meta['deltas'] = []
+        self._layers = None
+        return obsolete
+
+    def _count(self):
+        layers = self._open_layers()
+        seen = np.zeros(0, np.uint64)
+        rows = 0
+        for layer in reversed(layers):
+            fresh = ~np.isin(layer.hashes, seen)
+            if layer.deleted is not None:
+                fresh &= ~layer.deleted
+            rows += int(fresh.sum())
+            seen = np.union1d(seen, layer.hashes)
+        return rows
+
+    # -- probes -----------------------------------------------------------------
+    def locate(self, data):
+        """(layer, row) per row of data's key columns; layer -1 where the key is unknown."""
+        # Resolve each distinct key once (normalized once), then broadcast to the rows
+        if len(self.keys) == 1:
+            col = data[self.keys[0]]
+            if isinstance(col, pa.ChunkedArray):
+                col = col.combine_chunks()
+            encoded = col if pa.types.is_dictionary(col.type) else pc.dictionary_encode(col)
+            keys = self.key_strings({self.keys[0]: encoded.dictionary})
+        else:
+            encoded = pc.dictionary_encode(self.key_strings(data))
+            keys = encoded.dictionary
+        # null keys point one past the distinct keys, which never resolves
+        rows_of = encoded.indices.fill_null(len(keys)).to_numpy()
+        hashes = hash_strings(keys)
+        n = len(keys)
+        owner = np.full(n, -1, np.int64)
+        rows = np.full(n, -1, np.int64)
+        open_ = np.arange(n)
+        layers = self._open_layers()
+        for li in range(len(layers) - 1, -1, -1):
+            if not len(open_):
+                break
+            layer = layers[li]
+            found = layer.find(hashes[open_], keys.take(pa.array(open_)))
+            hit = found >= 0
+            sel = open_[hit]
+            if layer.deleted is not None:
+                live = ~layer.deleted[found[hit]]
+                owner[sel[live]] = li
+                rows[sel[live]] = found[hit][live]
+            else:
+                owner[sel] = li
+                rows[sel] = found[hit]
+            open_ = open_[~hit]
+        owner, rows = np.append(owner, -1), np.append(rows, -1)
+        return owner[rows_of], rows[rows_of]
+
+    def lookup(self, data, columns):
+        """Attribute columns for the keys in data (Table/RecordBatch/BatchColumns), null where unknown."""
+        owner, rows = self.locate(data)
+        schema = self.schema
+        if schema is None:
+            return {c: pa.nulls(len(owner)) for c in columns}
+        pieces, order, offset = [], np.empty(len(owner), np.int64), 0
+        for li, layer in enumerate(self._open_layers()):
+            sel = np.flatnonzero(owner == li)
+            if len(sel):
+                pieces.append(layer.table.select(columns).take(pa.array(rows[sel])))
+                order[sel] = offset + np.arange(len(sel))
+                offset += len(sel)
+        missing = owner < 0
+        if missing.any():
+            fields = [schema.field(c) for c in columns]
+            pieces.append(pa.table([pa.nulls(1, f.type) for f in fields], schema=pa.schema(fields)))
+            order[missing] = offset
+        out = pa.concat_tables(pieces).take(pa.array(order))
+        return {c: out[c].combine_chunks() for c in columns}
+
+
+def material_index(ctx):
+    cfg = ctx.rules.get('material') or {}
+    if not cfg.get('index'):
+        raise ValueError("material.index is not configured in rules.yml")
+    return ctx.lookup(('material', cfg['index']), lambda c: MaterialIndex.open(cfg['index']))
+
+
+@requires(build=material_index)
+@column_transform
+def read_masterdata(ctx, df):
+    cfg = ctx.rules.get('material') or {}
+    attributes = cfg.get('attributes') or DEFAULT_ATTRIBUTES
+    found = material_index(ctx).lookup(df, list(attributes))
+    return {out: found[src] for src, out in attributes.items()}
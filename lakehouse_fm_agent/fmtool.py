@@ -5,12 +5,14 @@
 fmtool.py — Lakehouse FM Agent CLI
 
 Commands:
-  graph     -> Read LINEAGE.txt and emit a Mermaid graph file
+  graph     -> Read LINEAGE.txt and emit a Mermaid/DOT graph file
   plan      -> Produce a PLANNED object manifest (JSON) for review/approval
   scaffold  -> Generate doc stubs + handler skeleton for a given FM
   validate  -> (stub) Validate config and lineage inputs
   test      -> (stub) Run unit/integration tests for a given FM
   run       -> Execute handlers in topological order derived from LINEAGE.txt
+  material  -> Build/refresh the memory-mapped material master index from an extract
+  bench     -> Benchmark parsing/layering/graph/run on synthetic lineages
 
 Run either as a module (recommended):
   python -m lakehouse_fm_agent.fmtool --help
@@ -25,6 +27,8 @@ import argparse
 import json
 import os
 import sys
+import time
+from functools import partial
 from pathlib import Path
 
 # --------------------------------------------------------------------------------------
@@ -36,9 +40,22 @@ from pathlib import Path
 # --------------------------------------------------------------------------------------
 try:
     # When running "python lakehouse_fm_agent/fmtool.py ..."
-    from runtime.lineage import load_edges, topo_layers
-    from runtime.registry import resolve_handler, POINTERS
-    from runtime.manifest import Manifest
+    from runtime.lineage import LineageGraph
+    from runtime.cache import load_graph
+    from runtime.ingest import ingest_lineage, interface_files, lineage_files, load_interfaces
+    from runtime.registry import has_handler, resolve_handler, POINTERS
+    from runtime.manifest import Manifest, diff as diff_manifests, write_items
+    from runtime.context import Context
+    from runtime.config import load_rules
+    from runtime.executor import EXECUTORS, HandlerError, invoke_handler, run_dag, serial_units, uses_data
+    from runtime.profiler import Profiler
+    from runtime.fusion import fuse, fused_groups
+    from runtime.preload import SharedTables
+    from runtime.reach import load_index, select
+    from runtime.render import FORMATS, write_graph
+    from runtime.checkpoint import CheckpointRun, CheckpointStore, checkpoint_dir, source_fingerprint
+    from runtime.schedule import (DurationHistory, bottom_levels, critical_chain,
+                                  node_costs, simulate_makespan)
 except ModuleNotFoundError:
     here = os.path.abspath(os.path.dirname(__file__))
     parent = os.path.abspath(os.path.join(here, ".."))
@@ -48,9 +65,25 @@ except ModuleNotFoundError:
         sys.path.insert(0, parent)
     try:
         # When running "python -m lakehouse_fm_agent.fmtool ..."
-        from lakehouse_fm_agent.runtime.lineage import load_edges, topo_layers  # type: ignore
-        from lakehouse_fm_agent.runtime.registry import resolve_handler, POINTERS  # type: ignore
-        from lakehouse_fm_agent.runtime.manifest import Manifest  # type: ignore
+        from lakehouse_fm_agent.runtime.lineage import LineageGraph  # type: ignore
+        from lakehouse_fm_agent.runtime.cache import load_graph  # type: ignore
+        from lakehouse_fm_agent.runtime.ingest import (ingest_lineage, interface_files,  # type: ignore
+                                                       lineage_files, load_interfaces)
+        from lakehouse_fm_agent.runtime.registry import has_handler, resolve_handler, POINTERS  # type: ignore
+        from lakehouse_fm_agent.runtime.manifest import Manifest, diff as diff_manifests, write_items  # type: ignore
+        from lakehouse_fm_agent.runtime.context import Context  # type: ignore
+        from lakehouse_fm_agent.runtime.config import load_rules  # type: ignore
+        from lakehouse_fm_agent.runtime.executor import (EXECUTORS, HandlerError, invoke_handler,  # type: ignore
+                                                         run_dag, serial_units, uses_data)
+        from lakehouse_fm_agent.runtime.profiler import Profiler  # type: ignore
+        from lakehouse_fm_agent.runtime.fusion import fuse, fused_groups  # type: ignore
+        from lakehouse_fm_agent.runtime.preload import SharedTables  # type: ignore
+        from lakehouse_fm_agent.runtime.reach import load_index, select  # type: ignore
+        from lakehouse_fm_agent.runtime.render import FORMATS, write_graph  # type: ignore
+        from lakehouse_fm_agent.runtime.checkpoint import (CheckpointRun, CheckpointStore,  # type: ignore
+                                                           checkpoint_dir, source_fingerprint)
+        from lakehouse_fm_agent.runtime.schedule import (DurationHistory, bottom_levels, critical_chain,  # type: ignore
+                                                         node_costs, simulate_makespan)
     except ModuleNotFoundError as e:
         raise ModuleNotFoundError(
             "Cannot import runtime modules.\n"
@@ -76,37 +109,97 @@ def _fail(msg: str, exit_code: int = 2) -> None:
     sys.exit(exit_code)
 
 
+def _load_graph(lineage: str, use_cache: bool = True, jobs: int | None = None) -> LineageGraph:
+    """
+    Parse LINEAGE.txt once (or load it from the cache) for graph/plan/run.
+    A directory is ingested as a whole: every *LINEAGE* file below it is
+    parsed in a process pool and the edges are merged into one graph.
+    """
+    lineage_path = Path(lineage)
+    if not lineage_path.exists():
+        _fail(f"Lineage file not found: {lineage_path}")
+    if lineage_path.is_dir():
+        files = lineage_files(lineage_path)
+        if not files:
+            _fail(f"No LINEAGE files under: {lineage_path}")
+        t0 = time.perf_counter()
+        graph = ingest_lineage(files, workers=jobs)
+        _echo(f"[INGEST] {len(files)} LINEAGE files -> {len(graph)} FMs, {graph.n_edges} edges "
+              f"in {time.perf_counter() - t0:.2f}s")
+        return graph
+    return load_graph(str(lineage_path), use_cache=use_cache)
+
+
+def _slice(graph: LineageGraph, args: argparse.Namespace) -> LineageGraph:
+    """Restrict the graph to --from/--to/--changed, or return it unchanged."""
+    def ids(values: list[str] | None) -> list[int]:
+        out = []
+        for fm in (x.strip() for v in values or () for x in v.split(",") if x.strip()):
+            i = graph.find(fm)
+            if i is None:
+                _fail(f"FM not in lineage: {fm}")
+            out.append(i)
+        return out
+
+    sources, targets, changed = ids(args.from_fms), ids(args.to_fms), ids(args.changed)
+    if not (sources or targets or changed):
+        return graph
+    # A directory's mtime misses edits to its files, so only single files get a cached index
+    use_cache = not (args.no_cache or Path(args.lineage).is_dir())
+    index = load_index(args.lineage, graph, use_cache=use_cache)
+    t0 = time.perf_counter()
+    nodes = select(graph, index, sources, targets, changed)
+    us = (time.perf_counter() - t0) * 1e6
+    how = "reachability index" if index is not None else "graph walk"
+    _echo(f"[SLICE] {len(nodes)} of {len(graph)} FMs selected in {us:.0f} us ({how})")
+    return graph.subgraph(nodes)
+
+
+def _add_slice_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--from", dest="from_fms", action="append", metavar="FM",
+                   help="Only FM and everything downstream of it (repeatable, comma-separated)")
+    p.add_argument("--to", dest="to_fms", action="append", metavar="FM",
+                   help="Only FM and everything upstream of it; with --from: the paths between")
+    p.add_argument("--changed", action="append", metavar="FM1,FM2",
+                   help="Add the changed FMs and their full downstream impact")
+
+
+def _add_ingest_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--jobs", type=int, default=None,
+                   help="Processes for parsing a directory of LINEAGE/INTERFACE files (default: CPU count)")
+
+
 # --------------------------------------------------------------------------------------
 # Commands
 # --------------------------------------------------------------------------------------
 def cmd_graph(args: argparse.Namespace) -> None:
     """
-    Build a Mermaid graph from LINEAGE.txt
+    Render LINEAGE.txt as Mermaid or DOT, streamed to disk. Cycles are drawn
+    as clusters, or collapsed to one node each with --condense.
     """
-    lineage_path = Path(args.lineage)
     out_path = Path(args.out)
+    graph = _slice(_load_graph(args.lineage, use_cache=not args.no_cache, jobs=args.jobs), args)
 
-    if not lineage_path.exists():
-        _fail(f"Lineage file not found: {lineage_path}")
-
-    edges = load_edges(str(lineage_path))
-    lines = ["graph TD"]
-    for parent, child, kind, _skipped in edges:
-        # We ignore `kind` in the visual link label for simplicity;
-        # you can add it like: f'  "{parent}" -- {kind} --> "{child}"'
-        lines.append(f'  "{parent}" --> "{child}"')
-
-    out_path.write_text("\n".join(lines), encoding="utf-8")
-    _echo(f"Mermaid saved: {out_path}")
+    with open(out_path, "w", encoding="utf-8") as fh:
+        n_nodes, n_edges = write_graph(graph, fh, fmt=args.format, condense=args.condense)
+    label = "Mermaid" if args.format == "mermaid" else "DOT"
+    _echo(f"{label} saved: {out_path} ({n_nodes} nodes, {n_edges} edges)")
 
 
 def cmd_plan(args: argparse.Namespace) -> None:
     """
-    Produce a PLANNED object manifest (JSON) for review/approval.
-    (Creation/apply happens elsewhere to avoid accidental changes.)
+    Produce a PLANNED object manifest (JSON, or JSON lines for *.jsonl) for
+    review/approval; with --diff only the CREATE/ALTER/DROP deltas against a
+    previous manifest. (Creation/apply happens elsewhere to avoid accidental changes.)
     """
-    # Optional: also load edges if you want to plan contextually
-    # edges = load_edges(args.lineage)
+    # Optional: load the lineage graph to plan contextually
+    if args.lineage:
+        graph = _load_graph(args.lineage, use_cache=not args.no_cache, jobs=args.jobs)
+        _echo(f"Lineage: {len(graph)} FMs, {graph.n_edges} edges")
+        _report_schedule(graph, DurationHistory(args.history), args.workers, load_rules(args.rules))
+    interface = args.interface or (args.lineage if args.lineage and Path(args.lineage).is_dir() else None)
+    if interface:
+        _report_interfaces(interface, graph if args.lineage else None, args.jobs)
 
     m = Manifest(plan_id=args.plan_id)
     # Minimal reference objects; adjust to your Unity Catalog layout
@@ -117,8 +210,72 @@ def cmd_plan(args: argparse.Namespace) -> None:
     m.ensure_table("uc_catalog", "ref", "logsys_map", "Logical system map", [])
 
     out_path = Path(args.out)
-    out_path.write_text(m.to_json(), encoding="utf-8")
-    _echo(f"Manifest saved: {out_path}")
+    if not args.diff:
+        m.write(out_path)
+        _echo(f"Manifest saved: {out_path} ({len(m)} objects)")
+        return
+    if not Path(args.diff).is_file():
+        _fail(f"Previous manifest not found: {args.diff}")
+    deltas = diff_manifests(Manifest.load(args.diff), m)
+    with out_path.open("w", encoding="utf-8") as fh:
+        write_items(fh, deltas, jsonl=out_path.suffix == ".jsonl")
+    counts = {a: 0 for a in ("CREATE", "ALTER", "DROP")}
+    for item in deltas:
+        counts[item["planned_action"]] += 1
+    summary = ", ".join(f"{a} {n}" for a, n in counts.items())
+    _echo(f"[DIFF] {summary}; {len(m) - counts['CREATE'] - counts['ALTER']} unchanged")
+    _echo(f"Manifest deltas saved: {out_path}")
+
+
+def _side_effect_fms(rules: dict) -> frozenset:
+    """FMs declared side-effect-only in rules.yml (parallel.side_effect_only)."""
+    return frozenset(fm.upper() for fm in (rules.get("parallel") or {}).get("side_effect_only") or ())
+
+
+def _uses_data(fm: str, side_effects: frozenset = frozenset()) -> bool:
+    """Does fm's handler work on ctx.current_df (parallel runs keep those in serial order)?"""
+    return has_handler(fm) and fm.upper() not in side_effects and uses_data(resolve_handler(fm))
+
+
+def _report_schedule(graph: LineageGraph, history: DurationHistory, workers: int | None,
+                     rules: dict) -> None:
+    """Estimated makespan per worker count and the critical chain, from past run durations."""
+    cost = node_costs(graph, history, has_handler)
+    level = bottom_levels(graph, cost)
+    chain = critical_chain(graph, level, cost)
+    serial = serial_units(graph, partial(_uses_data, side_effects=_side_effect_fms(rules)))
+    total = sum(cost)
+    span = max(level) if len(level) else 0.0
+    _echo(f"Estimated work: {total:.1f}s total, critical path {span:.1f}s "
+          f"({len(history.stats)} FMs with history; {len(serial)} data handler units run in serial order)")
+    counts = sorted({1, 2, 4, 8, 16, 32} | ({workers} if workers else set()))
+    for w in counts:
+        m = simulate_makespan(graph, cost, w, priority=level, serial=serial if w > 1 else None)
+        _echo(f"  workers={w:<3} makespan ~{m:.1f}s speedup x{total / m if m else 1:.2f}")
+        if m <= span * 1.01 and (not workers or w >= workers):
+            break  # more workers cannot beat the critical path
+    if chain:
+        _echo("Critical chain: " + " -> ".join(f"{graph.names[i]} ({cost[i]:.1f}s)" for i in chain))
+        top = sorted((i for i in chain if cost[i] > 0), key=cost.__getitem__, reverse=True)[:5]
+        if top:
+            _echo("Optimize first: " + ", ".join(graph.names[i] for i in top))
+
+
+def _report_interfaces(path: str, graph: LineageGraph | None, jobs: int | None) -> None:
+    """Parameter/table signatures from INTERFACE files, and lineage FMs without one."""
+    if not Path(path).exists():
+        _fail(f"Interface path not found: {path}")
+    files = interface_files(path)
+    sigs = load_interfaces(files, workers=jobs)
+    n_params = sum(len(s.params()) for s in sigs.values())
+    n_tables = sum(len(s.tables) for s in sigs.values())
+    _echo(f"[INTERFACE] {len(files)} files -> {len(sigs)} FM signatures, "
+          f"{n_params} parameters ({n_tables} tables)")
+    if graph is not None:
+        missing = [fm for fm in graph.names if fm not in sigs and has_handler(fm)]
+        if missing:
+            _echo(f"  handled FMs without an interface: {', '.join(missing[:10])}"
+                  + (f" (+{len(missing) - 10} more)" if len(missing) > 10 else ""))
 
 
 def cmd_scaffold(args: argparse.Namespace) -> None:
@@ -185,42 +342,300 @@ def cmd_run(args: argparse.Namespace) -> None:
     Execute handlers in topological layers derived from LINEAGE.txt.
     For standard BW FMs without handlers, log a pointer instead of failing.
     """
-    lineage_path = Path(args.lineage)
-    if not lineage_path.exists():
-        _fail(f"Lineage file not found: {lineage_path}")
+    graph = _slice(_load_graph(args.lineage, use_cache=not args.no_cache, jobs=args.jobs), args)
 
-    edges = load_edges(str(lineage_path))
-    layers = topo_layers(edges)
-
-    # Flatten layers into an ordered list (preserving topo order)
-    ordered = [fm for layer in layers for fm in layer]
-
-    # De-duplicate while preserving order (some nodes can appear multiple times in layers)
-    seen = set()
-    ordered_unique = []
-    for fm in ordered:
-        if fm not in seen:
-            seen.add(fm)
-            ordered_unique.append(fm)
+    # Flatten layers into an ordered list (preserving topo order); every
+    # interned node appears in exactly one layer, so no de-dup is needed.
+    ordered_unique = [fm for layer in graph.layer_names() for fm in layer]
 
     _echo(f"Execution order (topological): {', '.join(ordered_unique)}")
 
-    # In real Databricks runs, you'd initialize a Context carrying Spark session/config.
-    # Here we just pass None; handlers should accept Context in your actual implementation.
-    for fm in ordered_unique:
-        fn = resolve_handler(fm)
-        if fn:
-            _echo(f"[RUN] {fm} -> handler")
-            try:
-                fn(None)  # replace with: fn(Context(spark)) in Databricks
-            except Exception as ex:
-                _fail(f"Handler for {fm} raised an exception: {ex}")
+    # In real Databricks runs, build the Context with the Spark session/config.
+    ctx = Context(rules=load_rules(args.rules))
+    if args.input:
+        if not Path(args.input).exists():
+            _fail(f"Input not found: {args.input}")
+        if args.memory_limit:
+            ctx.rules.setdefault("stream", {})["memory_limit_mb"] = args.memory_limit
+        ctx.stream(args.input)
+    if not args.no_preload:
+        _report_preload(ctx.preload([resolve_handler(fm) for fm in graph.names if has_handler(fm)]))
+
+    profiler = None
+    if args.trace or args.profile:
+        jsonl = args.profile or str(Path(args.trace).with_suffix(".jsonl"))
+        profiler = Profiler(trace_path=args.trace, jsonl_path=jsonl)
+
+    checkpoints = None
+    if args.checkpoint or args.checkpoint_dir or args.force:
+        # Outputs are threaded through ctx.current_df in topological order,
+        # which only the serial path has.
+        if args.workers > 1:
+            _fail("--checkpoint/--force need the serial runner (--workers 1)")
+        store = CheckpointStore(args.checkpoint_dir or checkpoint_dir(args.lineage))
+        try:
+            checkpoints = CheckpointRun(store, graph, ctx.rules, force=args.force or (),
+                                        input_digest=source_fingerprint(args.input) if args.input else None)
+        except KeyError as ex:
+            _fail(ex.args[0])
+
+    history = DurationHistory(args.history)
+    try:
+        _run_handlers(args, graph, ctx, profiler, checkpoints, history)
+        _finish_output(args, ctx)
+        _report_unmapped(ctx)
+        _report_rejects(ctx)
+    finally:
+        history.save()
+        if checkpoints:
+            checkpoints.store.close()
+        if profiler:
+            profiler.close()
+            _report_profile(args, profiler)
+
+
+def _run_handlers(args: argparse.Namespace, graph: LineageGraph, ctx: Context,
+                  profiler: Profiler | None, checkpoints: CheckpointRun | None,
+                  history: DurationHistory) -> None:
+    if args.workers > 1:
+        # Dependency-driven: each handler starts as soon as its parents finish,
+        # longest remaining path (from past durations) first.
+        # Handlers that work on ctx.current_df run one at a time in this
+        # process, in serial order; only side-effect-only handlers go to the
+        # pool. Thread workers share ctx; process workers each build their
+        # own and map the preloaded reference tables from shared memory.
+        is_serial = partial(_uses_data, side_effects=_side_effect_fms(ctx.rules))
+        if not any(has_handler(fm) and not is_serial(fm) for fm in graph.names):
+            _echo(f"[WARN] --workers {args.workers}: every handler works on ctx.current_df and runs "
+                  f"in serial order, so the pool stays idle; list side-effect-only FMs under "
+                  f"parallel.side_effect_only in rules.yml")
+        shared = None
+        serial_task = partial(invoke_handler, ctx=ctx, profile=True, profiler=profiler)
+        if args.executor == "thread":
+            task = serial_task
         else:
-            ptr = POINTERS.get(fm.upper())
-            if ptr:
-                _echo(f"[POINTER] {fm}: {ptr}")
+            shared = SharedTables.publish(ctx.tables, ctx.versions) if ctx.tables else None
+            task = partial(invoke_handler, rules_path=args.rules, profile=True, shared=shared)
+
+        def done(fm, rec):
+            history.add(fm, rec["wall_ms"] / 1e3)
+            if profiler:
+                profiler.add(rec)
+
+        try:
+            run_dag(
+                graph, task, workers=args.workers, executor=args.executor,
+                max_inflight=args.max_inflight,
+                is_noop=lambda fm: not has_handler(fm),
+                on_start=lambda fm: _echo(f"[RUN] {fm} -> handler"),
+                on_skip=_report_unhandled,
+                on_done=done,
+                priority=bottom_levels(graph, node_costs(graph, history, has_handler)),
+                serial=is_serial, serial_task=serial_task,
+            )
+        except HandlerError as ex:
+            _fail(str(ex))
+        finally:
+            if shared:
+                shared.close()
+        return
+
+    def call(fm, fn, ctx, fms=None):
+        _echo(f"[RUN] {fm} -> handler")
+        try:
+            if profiler:
+                seconds = profiler.call(fm, fn, ctx)["wall_ms"] / 1e3
             else:
-                _echo(f"[SKIP] {fm}: no handler (likely BW pattern handled elsewhere)")
+                t0 = time.perf_counter()
+                fn(ctx)
+                seconds = time.perf_counter() - t0
+        except Exception as ex:
+            _fail(f"Handler for {fm} raised an exception: {ex}")
+        # A fused chain is timed as a whole; its FMs share the time evenly
+        for name in fms or (fm,):
+            history.add(name, seconds / len(fms or (fm,)))
+
+    order = [i for layer in graph.layers() for i in layer]
+    if checkpoints or args.no_fuse:
+        groups = [[i] for i in order]
+    else:
+        # Linear chains of column transforms run as one pass per batch;
+        # checkpoints need each FM's own output, so they keep the plain order.
+        groups = fused_groups(graph, order, resolve_handler)
+    for group in groups:
+        if len(group) > 1:
+            fms = [graph.names[i] for i in group]
+            _echo(f"[FUSED] {' -> '.join(fms)}: {len(fms)} column transforms in one pass")
+            call("+".join(fms), fuse([resolve_handler(fm) for fm in fms]), ctx, fms)
+            continue
+        i = group[0]
+        fm = graph.names[i]
+        fn = resolve_handler(fm)
+        if checkpoints:
+            if checkpoints.step(i, fn, ctx, lambda fn, ctx: call(fm, fn, ctx)) == "reused":
+                _echo(f"[CACHED] {fm}: inputs and code unchanged, reusing checkpoint")
+        elif fn:
+            call(fm, fn, ctx)
+        if not fn:
+            _report_unhandled(fm)
+
+
+def _finish_output(args: argparse.Namespace, ctx: Context) -> None:
+    """Drain a streamed current_df (running any lazy transforms) and optionally write it."""
+    data = ctx.current_df
+    output = args.output
+    if data is None or not (ctx.streaming or output):
+        return
+    if ctx.streaming and data.consumed:
+        # A terminal handler (e.g. DSO activation) already drained the stream
+        stats, batches = data.stats, iter(())
+        if output:
+            _echo(f"[STREAM] the last handler consumed the stream; nothing left to write to {output}")
+            output = None
+    elif ctx.streaming:
+        stats = data.stats
+        batches = iter(data)
+    elif hasattr(data, "to_batches"):
+        stats, batches = None, iter(data.to_batches())
+    else:
+        _fail(f"--output needs Arrow data, got {type(data).__name__}")
+    writer = None
+    try:
+        for batch in batches:
+            if output:
+                if writer is None:
+                    import pyarrow.parquet as pq
+                    writer = pq.ParquetWriter(output, batch.schema)
+                writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    if stats:
+        _echo(f"[STREAM] {stats['rows']} rows in {stats['batches']} batches, "
+              f"read-ahead peak {stats['peak_buffered'] / 2**20:.1f} MiB")
+    if output:
+        _echo(f"Output saved: {output}")
+
+
+def _report_preload(stats: dict) -> None:
+    """One line for the reference-data preload: tables, slowest fetch vs the sum, lookups."""
+    if not (stats["tables"] or stats["missing"] or stats["lookups"] or stats["failed"]):
+        return
+    fetched = stats["tables"]
+    line = f"[PRELOAD] {len(fetched)} reference tables, {len(stats['lookups'])} lookups in {stats['seconds']:.2f}s"
+    if fetched:
+        slowest = max(fetched, key=fetched.get)
+        line += f" (slowest {slowest} {fetched[slowest]:.2f}s, sum {sum(fetched.values()):.2f}s)"
+    if stats["missing"]:
+        line += f"; not available: {', '.join(stats['missing'])}"
+    _echo(line)
+    for name, err in stats["failed"].items():
+        _echo(f"[PRELOAD] {name} not prebuilt: {err}")
+
+
+def _report_unmapped(ctx: Context) -> None:
+    """Bulk report of source system IDs RSDG_LOGSYS_GET_FROM_ID could not map."""
+    unmapped = ctx.lookup("logsys_unmapped", lambda c: {})
+    if unmapped:
+        top = ", ".join(f"{k} ({n} rows)" for k, n in sorted(unmapped.items(), key=lambda kv: -kv[1])[:20])
+        _echo(f"[LOGSYS] {len(unmapped)} unmapped source system IDs, {sum(unmapped.values())} rows: {top}")
+
+
+def _report_rejects(ctx: Context) -> None:
+    """Rows flagged by the character cleansing check, per column."""
+    rejects = ctx.lookup("cleansing_rejects", lambda c: {})
+    if rejects:
+        per_column = ", ".join(f"{k}: {n}" for k, n in rejects.items())
+        _echo(f"[CLEANSING] rejected rows per column: {per_column}")
+
+
+def _report_profile(args: argparse.Namespace, profiler: Profiler) -> None:
+    for rec in profiler.top(5):
+        if rec["phase"] == "stream":
+            _echo(f"[PROFILE] {rec['fm']} (stream): wall={rec['wall_ms']:.1f}ms cpu={rec['cpu_ms']:.1f}ms "
+                  f"rows={rec['rows_out']} in {rec['batches']} batches")
+            continue
+        phase = " (setup)" if rec["phase"] == "setup" else ""
+        _echo(f"[PROFILE] {rec['fm']}{phase}: wall={rec['wall_ms']:.1f}ms cpu={rec['cpu_ms']:.1f}ms "
+              f"peak_rss+={rec['peak_rss_delta_kb']}KiB rows={rec['rows_in']}->{rec['rows_out']}")
+    if args.trace:
+        _echo(f"Trace saved: {args.trace}")
+
+
+def cmd_material(args: argparse.Namespace) -> None:
+    """
+    Build or refresh the memory-mapped material index (dims/material.py)
+    from a full or delta extract; RECORDMODE 'D'/'R' rows delete keys.
+    """
+    from lakehouse_fm_agent.dims.material import DEFAULT_KEYS, DEFAULT_MAX_DELTAS, MaterialIndex
+
+    rules = load_rules(args.rules)
+    cfg = rules.get("material") or {}
+    root = args.index or cfg.get("index")
+    if not root:
+        _fail("No index directory: pass --index or set material.index in rules.yml")
+    if not Path(args.extract).exists():
+        _fail(f"Extract not found: {args.extract}")
+    keys = cfg.get("keys") or list(DEFAULT_KEYS)
+    lengths = (rules.get("alpha") or {}).get("columns") or {}
+    index = MaterialIndex(root, keys=keys, alpha={k: lengths[k] for k in keys if k in lengths},
+                          max_deltas=cfg.get("max_deltas", DEFAULT_MAX_DELTAS))
+
+    import pyarrow.dataset as ds
+    fmt = "ipc" if Path(args.extract).suffix.lower() in (".arrow", ".ipc", ".feather") else "parquet"
+    data = ds.dataset(args.extract, format=fmt).to_table()
+    t0 = time.perf_counter()
+    version = index.refresh(data)
+    _echo(f"[MATERIAL] {len(data)} extract rows -> version {version}, {index.num_rows} materials, "
+          f"{len(index.meta['deltas'])} delta files ({time.perf_counter() - t0:.2f}s)")
+
+
+def cmd_bench(args: argparse.Namespace) -> None:
+    """
+    Time parsing, layering, graph output and handler scheduling on synthetic
+    lineages; optionally compare against a previous results file.
+    """
+    # Imported lazily: the suite pulls in NumPy for the generator.
+    from lakehouse_fm_agent.bench import suite
+
+    if args.generate:
+        from lakehouse_fm_agent.bench.synth import nodes_for, write_lineage
+        edges = int(float(args.scales.split(",")[0]))
+        n = write_lineage(args.generate, nodes_for(edges, args.fanout, args.depth), args.fanout,
+                          args.depth, args.skipped, args.cycles)
+        _echo(f"Synthetic lineage saved: {args.generate} ({n} edges)")
+        return
+
+    steps = tuple(args.steps.split(",")) if args.steps else suite.STEPS
+    unknown = set(steps) - set(suite.STEPS)
+    if unknown:
+        _fail(f"Unknown bench steps: {', '.join(sorted(unknown))} (choose from {', '.join(suite.STEPS)})")
+    scales = [int(float(s)) for s in args.scales.split(",")]
+    results = suite.run_suite(
+        scales, steps=steps, repeat=args.repeat, on_result=lambda r: _echo(suite.format_result(r)),
+        fanout=args.fanout, depth=args.depth, skipped=args.skipped, cycles=args.cycles,
+        workers=args.workers, run_limit=args.run_limit,
+    )
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        _echo(f"Bench results saved: {args.out}")
+    if args.compare:
+        rows = suite.compare(suite.load_results(args.compare), results, args.threshold)
+        for r in rows:
+            flag = "  REGRESSION" if r["regressed"] else ""
+            _echo(f"{r['step']:<13} edges={r['edges']:>10,} {r['baseline']:.4f}s -> "
+                  f"{r['seconds']:.4f}s x{r['ratio']:.2f}{flag}")
+        regressed = [r for r in rows if r["regressed"]]
+        if regressed:
+            _fail(f"{len(regressed)} step(s) slower than baseline by more than {args.threshold:.0%}", 1)
+
+
+def _report_unhandled(fm: str) -> None:
+    ptr = POINTERS.get(fm.upper())
+    if ptr:
+        _echo(f"[POINTER] {fm}: {ptr}")
+    else:
+        _echo(f"[SKIP] {fm}: no handler (likely BW pattern handled elsewhere)")
 
 
 # --------------------------------------------------------------------------------------
@@ -231,16 +646,33 @@ def build_parser() -> argparse.ArgumentParser:
     sp = ap.add_subparsers(dest="command")
 
     # graph
-    p = sp.add_parser("graph", help="Render Mermaid from LINEAGE.txt")
-    p.add_argument("--lineage", required=True, help="Path to LINEAGE.txt")
-    p.add_argument("--out", required=True, help="Path to output .mmd file")
+    p = sp.add_parser("graph", help="Render Mermaid/DOT from LINEAGE.txt")
+    p.add_argument("--lineage", required=True, help="Path to LINEAGE.txt or a directory of LINEAGE files")
+    p.add_argument("--out", required=True, help="Path to output .mmd/.dot file")
+    p.add_argument("--format", choices=FORMATS, default="mermaid", help="Output format")
+    p.add_argument("--condense", action="store_true",
+                   help="Collapse each cycle (strongly connected component) into one node")
+    _add_slice_args(p)
+    _add_ingest_args(p)
+    p.add_argument("--no-cache", action="store_true", help="Bypass the parsed-lineage cache")
     p.set_defaults(fn=cmd_graph)
 
     # plan
     p = sp.add_parser("plan", help="Produce a PLANNED object manifest (JSON)")
-    p.add_argument("--lineage", required=False, help="Path to LINEAGE.txt (optional)")
+    p.add_argument("--lineage", required=False, help="Path to LINEAGE.txt or a directory of LINEAGE files (optional)")
     p.add_argument("--plan-id", required=True, help="Plan id / batch reference")
-    p.add_argument("--out", required=True, help="Path to output manifest.json")
+    p.add_argument("--out", required=True, help="Path to output manifest.json (JSON lines if *.jsonl)")
+    p.add_argument("--diff", required=False, metavar="PREVIOUS",
+                   help="Previous manifest (.json/.jsonl); write only CREATE/ALTER/DROP deltas against it")
+    p.add_argument("--history", required=False,
+                   help="Per-FM duration history (default: <cache dir>/durations.json)")
+    p.add_argument("--workers", type=int, default=None, help="Also estimate the makespan for N workers")
+    p.add_argument("--rules", required=False,
+                   help="Path to rules.yml for parallel.side_effect_only (default: conf/rules.yml)")
+    p.add_argument("--interface", required=False,
+                   help="INTERFACE.txt or a directory of them (default: the --lineage directory)")
+    _add_ingest_args(p)
+    p.add_argument("--no-cache", action="store_true", help="Bypass the parsed-lineage cache")
     p.set_defaults(fn=cmd_plan)
 
     # scaffold
@@ -262,9 +694,69 @@ def build_parser() -> argparse.ArgumentParser:
 
     # run
     p = sp.add_parser("run", help="Execute handlers in topological order")
-    p.add_argument("--lineage", required=True, help="Path to LINEAGE.txt")
+    p.add_argument("--lineage", required=True, help="Path to LINEAGE.txt or a directory of LINEAGE files")
+    p.add_argument("--rules", required=False, help="Path to rules.yml (default: conf/rules.yml)")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Parallel handler workers (1 = serial topological order)")
+    p.add_argument("--executor", choices=EXECUTORS, default="thread",
+                   help="Worker pool type used when --workers > 1")
+    p.add_argument("--max-inflight", type=int, default=None,
+                   help="Max handlers submitted at once (default: 2 x workers)")
+    p.add_argument("--trace", required=False,
+                   help="Write a Chrome/Perfetto trace of handler runs (also writes <trace>.jsonl)")
+    p.add_argument("--profile", required=False,
+                   help="Write per-handler metrics as JSON lines (default with --trace: <trace>.jsonl)")
+    _add_slice_args(p)
+    p.add_argument("--history", required=False,
+                   help="Per-FM duration history to update and schedule by (default: <cache dir>/durations.json)")
+    p.add_argument("--checkpoint", action="store_true",
+                   help="Skip FMs whose code, config and inputs are unchanged since the last run")
+    p.add_argument("--checkpoint-dir", required=False,
+                   help="Checkpoint store (default: <cache dir>/checkpoints/<lineage>); implies --checkpoint")
+    p.add_argument("--force", action="append", metavar="FM",
+                   help="Re-run FM and everything downstream of it (repeatable); implies --checkpoint")
+    p.add_argument("--input", required=False,
+                   help="Parquet/Arrow file or directory streamed to the handlers in record batches")
+    p.add_argument("--output", required=False, help="Write the final data to this Parquet file")
+    p.add_argument("--memory-limit", type=int, default=None, metavar="MB",
+                   help="Read-ahead / materialization ceiling for --input (default: stream.memory_limit_mb)")
+    p.add_argument("--no-preload", action="store_true",
+                   help="Let each handler read its reference tables on first use instead of up front")
+    p.add_argument("--no-fuse", action="store_true",
+                   help="Run chained column transforms one by one instead of in one pass")
+    _add_ingest_args(p)
+    p.add_argument("--no-cache", action="store_true", help="Bypass the parsed-lineage cache")
     p.set_defaults(fn=cmd_run)
 
+    # material
+    p = sp.add_parser("material", help="Build/refresh the memory-mapped material index from an extract")
+    p.add_argument("--extract", required=True, help="Full or delta material extract (Parquet/Arrow file or directory)")
+    p.add_argument("--index", required=False, help="Index directory (default: material.index in rules.yml)")
+    p.add_argument("--rules", required=False, help="Path to rules.yml (default: conf/rules.yml)")
+    p.set_defaults(fn=cmd_material)
+
+    # bench
+    p = sp.add_parser("bench", help="Benchmark on synthetic lineages (JSON results, regression compare)")
+    p.add_argument("--scales", default="1000,10000,100000,1000000",
+                   help="Comma-separated edge counts (e.g. 1e3,1e4,1e7)")
+    p.add_argument("--steps", required=False,
+                   help="Comma-separated subset of load_edges,topo_layers,graph,graph_cached,run,run_dag")
+    p.add_argument("--fanout", type=int, default=4, help="Children per node")
+    p.add_argument("--depth", type=int, default=10, help="Number of levels")
+    p.add_argument("--skipped", type=float, default=0.05, help="Fraction of SKIPPED edges")
+    p.add_argument("--cycles", type=int, default=0, help="Back edges closing cycles")
+    p.add_argument("--repeat", type=int, default=3, help="Best-of-N timing")
+    p.add_argument("--workers", type=int, default=4, help="Workers for the run_dag step")
+    p.add_argument("--run-limit", type=int, default=1_000_000,
+                   help="Skip handler execution steps above this many edges")
+    p.add_argument("--out", required=False, help="Write results JSON here")
+    p.add_argument("--compare", required=False, help="Baseline results JSON to compare against")
+    p.add_argument("--threshold", type=float, default=0.2,
+                   help="Allowed slowdown before a step counts as a regression (0.2 = 20%%)")
+    p.add_argument("--generate", required=False,
+                   help="Only write a synthetic LINEAGE file (first --scales value) to this path")
+    p.set_defaults(fn=cmd_bench)
+
     return ap
 
 
@@ -0,0 +1,123 @@
+
+import hashlib
+import os
+import struct
+from array import array
+from pathlib import Path
+
+from lakehouse_fm_agent.runtime.lineage import LineageGraph
+
+# Header: magic, format version, source size, source mtime_ns, sha256(source)
+_MAGIC = b'FMLG'
+_VERSION = 2
+_HEADER = struct.Struct('<4sHQq32s')
+_LEN = struct.Struct('<Q')
+
+
+def cache_dir():
+    return Path(os.environ.get('FMTOOL_CACHE_DIR') or Path.home() / '.cache' / 'lakehouse_fm_agent')
+
+
+def cache_path(lineage_path, root=None):
+    key = hashlib.sha1(str(Path(lineage_path).resolve()).encode('utf-8')).hexdigest()[:20]
+    return Path(root or cache_dir()) / f"{key}.lgc"
+
+
+def content_hash(lineage_path):
+    h = hashlib.sha256()
+    with open(lineage_path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            h.update(block)
+    return h.digest()
+
+
+def _pack(graph):
+    layers = graph.layers()
+    layer_offsets = array('q', [0])
+    layer_nodes = array('i')
+    for layer in layers:
+        layer_nodes.extend(layer)
+        layer_offsets.append(len(layer_nodes))
+    sections = [
+        ''.join(n + '\n' for n in graph.names).encode('utf-8'),
+        ''.join(k + '\n' for k in graph.kinds).encode('utf-8'),
+        graph.src, graph.dst, graph.kind, graph.skipped,
+        graph.offsets, graph.targets, layer_offsets, layer_nodes,
+        *graph.condensation(),
+    ]
+    out = []
+    for sec in sections:
+        data = sec if isinstance(sec, bytes) else sec.tobytes()
+        out.append(_LEN.pack(len(data)))
+        out.append(data)
+    return b''.join(out)
+
+
+def _unpack(buf, pos):
+    def take(typecode=None):
+        nonlocal pos
+        (n,) = _LEN.unpack_from(buf, pos); pos += _LEN.size
+        data = buf[pos:pos + n]; pos += n
+        if len(data) != n:
+            raise ValueError('truncated cache file')
+        if typecode is None:
+            return data
+        arr = array(typecode)
+        arr.frombytes(data)
+        return arr
+
+    names_blob, kinds_blob = take(), take()
+    names = names_blob.decode('utf-8').split('\n')[:-1]
+    kinds = kinds_blob.decode('utf-8').split('\n')[:-1]
+    src, dst, kind, skipped = take('i'), take('i'), take('B'), take('B')
+    offsets, targets = take('q'), take('i')
+    layer_offsets, layer_nodes = take('q'), take('i')
+    layers = [layer_nodes[layer_offsets[i]:layer_offsets[i + 1]].tolist()
+              for i in range(len(layer_offsets) - 1)]
+    cond = (take('i'), take('q'), take('i'), take('q'), take('i'))
+    return LineageGraph(names, src, dst, kind, skipped, kinds,
+                        csr=(offsets, targets), layers=layers, cond=cond)
+
+
+def _write(path, st, digest, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.tmp{os.getpid()}')
+    with open(tmp, 'wb') as fh:
+        fh.write(_HEADER.pack(_MAGIC, _VERSION, st.st_size, st.st_mtime_ns, digest))
+        fh.write(payload)
+    os.replace(tmp, path)
+
+
+def load_graph(lineage_path, use_cache=True, root=None):
+    """
+    Return the LineageGraph for lineage_path, served from the on-disk cache
+    when the source is unchanged.
+
+    A cache entry is valid when size and mtime match; if only the mtime moved
+    (touch, re-copy) the content hash decides and the header is refreshed.
+    Unreadable or stale entries are silently rebuilt.
+    """
+    if not use_cache:
+        return LineageGraph.from_file(lineage_path)
+    st = os.stat(lineage_path)
+    path = cache_path(lineage_path, root)
+    try:
+        buf = path.read_bytes()
+        magic, version, size, mtime_ns, digest = _HEADER.unpack_from(buf, 0)
+        if magic == _MAGIC and version == _VERSION and size == st.st_size:
+            if mtime_ns == st.st_mtime_ns:
+                return _unpack(buf, _HEADER.size)
+            if digest == content_hash(lineage_path):
+                graph = _unpack(buf, _HEADER.size)
+                _write(path, st, digest, buf[_HEADER.size:])
+                return graph
+    except (OSError, ValueError, UnicodeDecodeError, struct.error):
+        pass
+
+    digest = content_hash(lineage_path)
+    graph = LineageGraph.from_file(lineage_path)
+    try:
+        _write(path, st, digest, _pack(graph))
+    except OSError:
+        pass  # read-only cache location: still return the parsed graph
+    return graph
@@ -0,0 +1,242 @@
+
+import hashlib
+import inspect
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+from lakehouse_fm_agent.runtime.cache import cache_dir
+
+NO_OUTPUT = 'none'
+
+_module_digests = {}
+
+
+def _digest(*parts):
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(str(p).encode('utf-8'))
+        h.update(b'\x1f')
+    return h.hexdigest()
+
+
+def code_fingerprint(fn):
+    """Digest of the handler's whole source module (helpers included) plus its name."""
+    fn = inspect.unwrap(fn)  # decorated handlers (column_transform) hash their own module
+    try:
+        path = inspect.getsourcefile(fn)
+    except TypeError:
+        path = None
+    if path is None:
+        code = getattr(fn, '__code__', None)
+        return _digest(getattr(fn, '__qualname__', repr(fn)),
+                       code.co_code.hex() if code else '', code.co_consts if code else '')
+    if path not in _module_digests:
+        _module_digests[path] = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    return _digest(fn.__module__, fn.__qualname__, _module_digests[path])
+
+
+def config_fingerprint(rules):
+    return _digest(json.dumps(rules or {}, sort_keys=True, default=str))
+
+
+def source_fingerprint(path):
+    """Digest of an input file or directory by path, size and mtime of each file."""
+    path = Path(path).resolve()
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+    return _digest(*(f"{p}:{p.stat().st_size}:{p.stat().st_mtime_ns}" for p in files))
+
+
+def checkpoint_dir(lineage_path):
+    key = hashlib.sha1(str(Path(lineage_path).resolve()).encode('utf-8')).hexdigest()[:20]
+    return cache_dir() / 'checkpoints' / key
+
+
+class CheckpointStore:
+    """
+    Content-addressed handler outputs plus a journal of FM fingerprints.
+
+    Layout::
+
+        <root>/objects/<sha256>.arrow     Arrow IPC file of ctx.current_df (streams spilled)
+        <root>/journal.jsonl              {"fm", "fingerprint", "output", "at"}, last wins
+
+    The journal is appended after every handler, so an aborted run keeps
+    the checkpoints of everything that finished before the failure.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.journal = self.root / 'journal.jsonl'
+        self.entries = {}
+        lines = 0
+        if self.journal.exists():
+            with open(self.journal, encoding='utf-8') as fh:
+                for line in fh:
+                    lines += 1
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a killed run
+                    self.entries[rec['fm']] = rec
+        self._fh = None
+        if lines > 2 * len(self.entries) + 1000:
+            self._compact()
+
+    def _compact(self):
+        tmp = self.journal.with_suffix(f'.tmp{os.getpid()}')
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            for rec in self.entries.values():
+                fh.write(json.dumps(rec) + '\n')
+        os.replace(tmp, self.journal)
+
+    def get(self, fm):
+        return self.entries.get(fm)
+
+    def output_path(self, digest):
+        return self.objects / f'{digest}.arrow'
+
+    def has_output(self, digest):
+        return digest == NO_OUTPUT or self.output_path(digest).exists()
+
+    def load_output(self, digest):
+        if digest == NO_OUTPUT:
+            return None
+        import pyarrow as pa
+        with pa.memory_map(str(self.output_path(digest))) as src:
+            return pa.ipc.open_file(src).read_all()
+
+    def save_output(self, data):
+        """Materialize an Arrow table/batch; returns its digest (None if not Arrow)."""
+        if data is None:
+            return NO_OUTPUT
+        import pyarrow as pa
+        if isinstance(data, pa.RecordBatch):
+            data = pa.Table.from_batches([data])
+        if not isinstance(data, pa.Table):
+            return None  # e.g. a Spark DataFrame: lives in Delta, nothing to reuse here
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, data.schema) as writer:
+            writer.write_table(data)
+        buf = sink.getvalue()
+        digest = hashlib.sha256(memoryview(buf)).hexdigest()
+        path = self.output_path(digest)
+        if not path.exists():
+            tmp = path.with_suffix(f'.tmp{os.getpid()}')
+            with open(tmp, 'wb') as fh:
+                fh.write(memoryview(buf))
+            os.replace(tmp, path)
+        return digest
+
+    def save_batches(self, batches, schema=None):
+        """
+        Spill record batches (e.g. a streamed ctx.current_df) to the store as
+        they arrive, one batch in memory at a time; returns the digest of the
+        written file, so identical streamed data yields the same digest.
+        """
+        import pyarrow as pa
+        tmp = self.objects / f'spill.tmp{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        writer = None
+        try:
+            with pa.OSFile(str(tmp), 'wb') as sink:
+                for batch in batches:
+                    if writer is None:
+                        writer = pa.ipc.new_file(sink, batch.schema)
+                    writer.write_batch(batch)
+                if writer is None:
+                    writer = pa.ipc.new_file(sink, schema if schema is not None else pa.schema([]))
+                writer.close()
+            h = hashlib.sha256()
+            with open(tmp, 'rb') as fh:
+                for block in iter(lambda: fh.read(1 << 20), b''):
+                    h.update(block)
+            digest = h.hexdigest()
+            path = self.output_path(digest)
+            if path.exists():
+                tmp.unlink()
+            else:
+                os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return digest
+
+    def record(self, fm, fingerprint, output):
+        rec = {'fm': fm, 'fingerprint': fingerprint, 'output': output,
+               'at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}
+        self.entries[fm] = rec
+        if self._fh is None:
+            self._fh = open(self.journal, 'a', encoding='utf-8')
+        self._fh.write(json.dumps(rec) + '\n')
+        self._fh.flush()
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+
+class CheckpointRun:
+    """
+    Per-run driver over a LineageGraph: decides for each FM whether its
+    checkpoint can be reused and threads output digests down the graph.
+
+    An FM's fingerprint covers its handler code, the rules, the digest of
+    ctx.current_df it receives and the output digests of its parents. Since
+    parents contribute outputs rather than fingerprints, an upstream FM that
+    re-runs and yields identical data does not invalidate its descendants.
+    FMs in `force` and everything downstream of them always run.
+    """
+
+    def __init__(self, store, graph, rules, force=(), input_digest=None):
+        self.store = store
+        self.graph = graph
+        self.config = config_fingerprint(rules)
+        seeds = []
+        for fm in force:
+            i = graph.find(fm)
+            if i is None:
+                raise KeyError(f"--force FM not in lineage: {fm}")
+            seeds.append(i)
+        self.forced = graph.reachable(seeds) if seeds else bytearray(len(graph))
+        self.outs = {}
+        self.input = input_digest or NO_OUTPUT
+
+    def step(self, i, fn, ctx, call):
+        """Run (or reuse) node i; returns 'ran', 'reused' or None (no handler)."""
+        fm = self.graph.names[i]
+        parent_outs = [self.outs.get(p, '') for p in self.graph.parents(i)]
+        if fn is None:
+            # Handler-less nodes pass data through; their output stands for their parents'
+            self.outs[i] = _digest(fm, *parent_outs)
+            return None
+        fp = _digest(code_fingerprint(fn), self.config, self.input, *parent_outs)
+        entry = self.store.get(fm)
+        if (not self.forced[i] and entry and entry['fingerprint'] == fp
+                and entry['output'] and self.store.has_output(entry['output'])):
+            if ctx.streaming and entry['output'] != NO_OUTPUT:
+                # Keep streaming: downstream reads the stored output batch by batch
+                ctx.stream(self.store.output_path(entry['output']))
+            else:
+                ctx.current_df = self.store.load_output(entry['output'])
+            self.input = self.outs[i] = entry['output']
+            return 'reused'
+        before = ctx.current_df
+        call(fn, ctx)
+        if ctx.current_df is before:
+            out = self.input
+        elif ctx.streaming:
+            # Spill the stream as it drains (running its lazy transforms) and
+            # hand downstream a new stream over the spilled file
+            out = self.store.save_batches(ctx.current_df, ctx.current_df.schema)
+            ctx.stream(self.store.output_path(out))
+        else:
+            out = self.store.save_output(ctx.current_df)
+        self.store.record(fm, fp, out)
+        # Unmaterializable output: give downstream a one-off digest so it never reuses
+        self.input = self.outs[i] = out or uuid.uuid4().hex
+        return 'ran'
@@ -0,0 +1,12 @@
+
+from pathlib import Path
+
+CONF_DIR = Path(__file__).resolve().parent.parent / 'conf'
+
+
+def load_rules(path=None):
+    """Load conf/rules.yml (or an override path) into a plain dict."""
+    import yaml
+    path = Path(path) if path else CONF_DIR / 'rules.yml'
+    with open(path, encoding='utf-8') as fh:
+        return yaml.safe_load(fh) or {}
@@ -1,4 +1,83 @@
+from lakehouse_fm_agent.runtime.stream import (DEFAULT_BATCH_ROWS, DEFAULT_MEMORY_LIMIT, DEFAULT_PREFETCH,
+                                               BatchStream, open_batches, prefetch)
+
+
 class Context:
-    def __init__(self, spark=None):
+    def __init__(self, spark=None, rules=None, tables=None, catalog='uc_catalog', versions=None):
         self.spark = spark
         self.current_df = None
+        self.rules = rules if rules is not None else {}
+        self.tables = dict(tables or {})   # name -> Arrow table (local runs / overrides)
+        self.versions = dict(versions or {})  # name -> Delta version of a table fetched into tables
+        self.catalog = catalog
+        self._lookups = {}
+
+    def read_uc(self, name, version=None):
+        """Read a Unity Catalog table (e.g. 'ref.fx_rates') as an Arrow table, optionally as of a Delta version."""
+        if name in self.tables:
+            return self.tables[name]
+        if self.spark is None:
+            raise LookupError(f"Table {name} not registered and no Spark session available")
+        if version is None:
+            df = self.spark.table(f"{self.catalog}.{name}")
+        else:
+            df = self.spark.sql(f"SELECT * FROM {self.catalog}.{name} VERSION AS OF {int(version)}")
+        if hasattr(df, 'toArrow'):
+            return df.toArrow()
+        import pyarrow as pa
+        return pa.Table.from_pandas(df.toPandas(), preserve_index=False)
+
+    def table_version(self, name):
+        """
+        Delta version of a table: the one it was fetched at (preload), else
+        the latest in its history. None for registered local tables, which
+        have no version, and without Spark.
+        """
+        if name in self.versions:
+            return self.versions[name]
+        if name in self.tables or self.spark is None:
+            return None
+        row = self.spark.sql(f"DESCRIBE HISTORY {self.catalog}.{name} LIMIT 1").first()
+        return row['version'] if row is not None else None
+
+    def lookup(self, key, build):
+        """Build a lookup structure (rate index, factor closure, ...) once per context."""
+        if key not in self._lookups:
+            self._lookups[key] = build(self)
+        return self._lookups[key]
+
+    def preload(self, handlers, workers=None):
+        """
+        Load the reference tables (and build the lookups) the given handlers
+        declare with runtime.preload.requires, concurrently; returns stats.
+        """
+        from lakehouse_fm_agent.runtime.preload import preload
+        return preload(self, handlers, workers)
+
+    def stream(self, source, columns=None):
+        """
+        Make current_df a BatchStream over source (Table, Parquet/Arrow path,
+        RecordBatchReader or iterable of batches), read ahead on a thread
+        within rules['stream'] limits: batch_rows, prefetch, memory_limit_mb.
+        """
+        cfg = self.rules.get('stream') or {}
+        limit = int(cfg.get('memory_limit_mb', DEFAULT_MEMORY_LIMIT >> 20)) << 20
+        depth = cfg.get('prefetch', DEFAULT_PREFETCH)
+        schema, batches = open_batches(source, cfg.get('batch_rows', DEFAULT_BATCH_ROWS), columns, depth)
+        stats = {'rows': 0, 'batches': 0, 'peak_buffered': 0}
+        self.current_df = BatchStream(prefetch(batches, limit, depth, stats),
+                                      schema=schema, memory_limit=limit, stats=stats)
+        return self.current_df
+
+    @property
+    def streaming(self):
+        return isinstance(self.current_df, BatchStream)
+
+    def materialize(self):
+        """
+        Whole-dataset access for handlers that need it: turns a streamed
+        current_df into one Table (MemoryLimitExceeded past the ceiling).
+        """
+        if isinstance(self.current_df, BatchStream):
+            self.current_df = self.current_df.materialize()
+        return self.current_df
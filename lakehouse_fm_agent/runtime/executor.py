@@ -0,0 +1,209 @@
+
+import heapq
+from collections import deque
+
+from lakehouse_fm_agent.runtime.config import load_rules
+from lakehouse_fm_agent.runtime.context import Context
+from lakehouse_fm_agent.runtime.profiler import profile_call
+from lakehouse_fm_agent.runtime.registry import resolve_handler
+
+EXECUTORS = ('thread', 'process')
+
+_worker_ctx = None
+
+
+class HandlerError(RuntimeError):
+    def __init__(self, fm, cause):
+        super().__init__(f"Handler for {fm} raised an exception: {cause}")
+        self.fm = fm
+        self.cause = cause
+
+    def __reduce__(self):
+        # Picklable with both fields, so it survives a process pool boundary
+        return (HandlerError, (self.fm, self.cause))
+
+
+def side_effect_only(handler):
+    """
+    Mark a handler that neither reads nor replaces ctx.current_df (it only
+    writes tables, files, ...): parallel runs may start it alongside others.
+    """
+    handler.side_effect_only = True
+    return handler
+
+
+def uses_data(handler):
+    """True for handlers that work on ctx.current_df (the default)."""
+    return handler is not None and not getattr(handler, 'side_effect_only', False)
+
+
+def serial_units(graph, is_serial):
+    """
+    Condensed-DAG units holding an FM for which is_serial(fm) is true, in the
+    serial runner's order (graph.layers()); a topological order, so running
+    them one at a time in it hands the data along exactly as a serial run.
+    """
+    comp = graph.condensation()[0]
+    names = graph.names
+    out, seen = [], set()
+    for layer in graph.layers():
+        for i in layer:
+            c = comp[i]
+            if c not in seen and is_serial(names[i]):
+                seen.add(c)
+                out.append(c)
+    return out
+
+
+def invoke_handler(fm, ctx=None, rules_path=None, profile=False, shared=None, profiler=None):
+    """
+    Run the registered handler for fm. Process workers get one Context each,
+    reading the reference tables in shared (a preload.SharedTables) zero-copy.
+    With profile=True the profile_call record is returned to the caller;
+    profiler (in-process only) also gets the lazy stream work of the handler.
+    """
+    global _worker_ctx
+    if ctx is None:
+        if _worker_ctx is None:
+            _worker_ctx = Context(rules=load_rules(rules_path), tables=shared.attach() if shared else None,
+                                  versions=shared.versions if shared else None)
+        ctx = _worker_ctx
+    if profile:
+        return profile_call(fm, resolve_handler(fm), ctx, profiler=profiler)
+    resolve_handler(fm)(ctx)
+
+
+def run_unit(task, fms):
+    """Run the FMs of one cycle in order on a single worker; returns their results."""
+    results = []
+    for fm in fms:
+        try:
+            results.append(task(fm))
+        except Exception as ex:
+            raise HandlerError(fm, ex) from ex
+    return results
+
+
+def run_dag(graph, task, workers=1, executor='thread', max_inflight=None,
+            is_noop=None, on_start=None, on_skip=None, on_done=None, priority=None,
+            serial=None, serial_task=None):
+    """
+    Run task(fm) for every node of a LineageGraph as soon as all of its
+    parents have finished -- no per-layer barrier.
+
+    Scheduling is over the condensed DAG: each cycle (strongly connected
+    component) is one unit whose FMs run in order on a single worker, so
+    acyclic work keeps flowing around it. Nodes for which is_noop(fm) is true
+    (no handler) complete inline without taking a worker slot. At most
+    max_inflight units (default 2 * workers) are submitted at a time. The
+    first failure cancels everything not yet started and is re-raised as
+    HandlerError. on_done(fm, result) is called in the submitting thread for
+    each task. With priority (a per-node sequence, e.g.
+    schedule.bottom_levels) ready units are submitted highest first instead
+    of in FIFO order.
+
+    Handlers share one ctx.current_df, so FMs for which serial(fm) is true
+    (see uses_data) do not go to the pool: their units run one at a time on
+    a single thread in this process, via serial_task (default task), in the
+    serial runner's order. Each sees its predecessor's data as in a serial
+    run, while side-effect-only handlers run on the pool alongside them.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor {executor!r}; expected one of {EXECUTORS}")
+    # Imported here: concurrent.futures.process alone adds ~20 ms to CLI startup
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+    names = graph.names
+    _, member_offsets, members, offsets, targets = graph.condensation()
+    ncomp = len(member_offsets) - 1
+    max_inflight = max(1, max_inflight or 2 * workers)
+    indeg = [0] * ncomp
+    for d in targets:
+        indeg[d] += 1
+    roots = [c for c in range(ncomp) if indeg[c] == 0]
+    if priority is None:
+        ready = deque(roots)
+        push, pop = ready.append, ready.popleft
+    else:
+        rank = lambda c: -max(priority[i] for i in members[member_offsets[c]:member_offsets[c + 1]])
+        ready = [(rank(c), c) for c in roots]
+        heapq.heapify(ready)
+        push = lambda c: heapq.heappush(ready, (rank(c), c))
+        pop = lambda: heapq.heappop(ready)[1]
+
+    def complete(c):
+        for j in range(offsets[c], offsets[c + 1]):
+            d = targets[j]
+            indeg[d] -= 1
+            if indeg[d] == 0:
+                push(d)
+
+    chain = serial_units(graph, lambda fm: not (is_noop and is_noop(fm)) and serial(fm)) if serial else []
+    chain_pos = {c: k for k, c in enumerate(chain)}
+    held = {}       # ready serial units waiting for their turn in the chain
+    next_serial = 0
+
+    pool_cls = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+    pool = pool_cls(max_workers=workers)
+    lane = ThreadPoolExecutor(max_workers=1) if chain else None
+    inflight = {}
+
+    def submit(c, fms, executor, fn):
+        for fm in fms:
+            if on_start:
+                on_start(fm)
+        if len(fms) == 1 and member_offsets[c + 1] - member_offsets[c] == 1:
+            inflight[executor.submit(fn, fms[0])] = (c, None)
+        else:
+            inflight[executor.submit(run_unit, fn, fms)] = (c, fms)
+
+    try:
+        while ready or inflight:
+            while ready and len(inflight) < max_inflight:
+                c = pop()
+                fms = []
+                for i in members[member_offsets[c]:member_offsets[c + 1]]:
+                    fm = names[i]
+                    if is_noop and is_noop(fm):
+                        if on_skip:
+                            on_skip(fm)
+                    else:
+                        fms.append(fm)
+                if not fms:
+                    complete(c)
+                    continue
+                if c not in chain_pos:
+                    submit(c, fms, pool, task)
+                    continue
+                held[c] = fms
+                # The single-thread lane runs submissions in order
+                while next_serial < len(chain) and chain[next_serial] in held:
+                    s = chain[next_serial]
+                    next_serial += 1
+                    submit(s, held.pop(s), lane, serial_task or task)
+            if not inflight:
+                continue
+            finished, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                c, fms = inflight.pop(fut)
+                exc = fut.exception()
+                if exc is not None:
+                    if isinstance(exc, HandlerError):
+                        raise exc
+                    raise HandlerError(names[members[member_offsets[c]]], exc) from exc
+                if on_done:
+                    if fms is None:
+                        on_done(names[members[member_offsets[c]]], fut.result())
+                    else:
+                        for fm, result in zip(fms, fut.result()):
+                            on_done(fm, result)
+                complete(c)
+    except BaseException:
+        for fut in inflight:
+            fut.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+        if lane:
+            lane.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown(wait=True)
+    if lane:
+        lane.shutdown(wait=True)
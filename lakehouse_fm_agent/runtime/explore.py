@@ -0,0 +1,153 @@
+
+import copy
+from array import array
+from bisect import bisect_left
+
+from lakehouse_fm_agent.runtime.render import dot_label
+
+DEFAULT_HOPS = 2
+DEFAULT_LIMIT = 300       # nodes per view; keeps browser-side rendering interactive
+DEFAULT_PAGE_SIZE = 200
+
+# Runtime overlay: light to dark as the share of the slowest FM in view grows
+_HEAT = ('#fff5eb', '#fdd0a2', '#fdae6b', '#f16913', '#a63603')
+_NO_RUNTIME = '#f0f0f0'
+
+
+class Explorer:
+    """
+    Server-side view model of a LineageGraph for the lineage explorer:
+    everything proportional to the graph (name index, layout) is built once
+    and every interaction touches only the nodes it shows.
+
+    - search: prefix index over upper-cased FM names (bisect, no scan)
+    - page: fixed-size pages of the topological order
+    - neighborhood: FMs within N hops of a center, capped at `limit`
+    - layout: Kahn layer and position inside the layer per FM, so a view's
+      ranks come precomputed instead of being laid out from scratch
+    - to_dot: Graphviz for a view with per-FM runtimes (DurationHistory
+      stats) as labels and fill colors
+    """
+
+    def __init__(self, graph, durations=None):
+        self.graph = graph
+        names = graph.names
+        self._order = sorted(range(len(names)), key=lambda i: names[i].upper())
+        self._keys = [names[i].upper() for i in self._order]
+        self.layer = array('i', bytes(4 * len(names)))
+        self.position = array('i', bytes(4 * len(names)))
+        self._topo = array('i')
+        for li, nodes in enumerate(graph.layers()):
+            for pos, i in enumerate(nodes):
+                self.layer[i] = li
+                self.position[i] = pos
+            self._topo.extend(nodes)
+        if len(names):
+            graph.parents(0)  # builds the reverse CSR now rather than on the first view
+        self.durations = durations or {}
+
+    def with_durations(self, durations):
+        """Same indexes, another runtime overlay (cheap; for per-session history)."""
+        view = copy.copy(self)
+        view.durations = durations or {}
+        return view
+
+    def __len__(self):
+        return len(self.graph)
+
+    def runtime(self, i):
+        s = self.durations.get(self.graph.names[i])
+        return s['seconds'] if s else None
+
+    def search(self, prefix, limit=50):
+        """Node ids whose name starts with prefix (case-insensitive), in name order."""
+        prefix = prefix.strip().upper()
+        keys = self._keys
+        out = []
+        k = bisect_left(keys, prefix)
+        while k < len(keys) and len(out) < limit and keys[k].startswith(prefix):
+            out.append(self._order[k])
+            k += 1
+        return out
+
+    def pages(self, size=DEFAULT_PAGE_SIZE):
+        return max(1, -(-len(self._topo) // size))
+
+    def page(self, number, size=DEFAULT_PAGE_SIZE):
+        """Node ids of one page (0-based) of the topological order."""
+        return list(self._topo[number * size:(number + 1) * size])
+
+    def neighborhood(self, center, hops=DEFAULT_HOPS, limit=DEFAULT_LIMIT, direction='both'):
+        """
+        (node ids, truncated) within `hops` edges of center, breadth first:
+        'down' follows children, 'up' parents, 'both' either. Stops adding
+        nodes at `limit`.
+        """
+        graph = self.graph
+        seen = {center}
+        frontier = [center]
+        truncated = False
+        for _ in range(hops):
+            nxt = []
+            for i in frontier:
+                near = []
+                if direction in ('down', 'both'):
+                    near.extend(graph.children(i))
+                if direction in ('up', 'both'):
+                    near.extend(graph.parents(i))
+                for j in near:
+                    if j in seen:
+                        continue
+                    if len(seen) >= limit:
+                        truncated = True
+                        break
+                    seen.add(j)
+                    nxt.append(j)
+                if truncated:
+                    break
+            if truncated or not nxt:
+                break
+            frontier = nxt
+        return sorted(seen, key=lambda i: (self.layer[i], self.position[i])), truncated
+
+    def edges(self, nodes):
+        """Distinct (parent, child) pairs among nodes."""
+        inside = set(nodes)
+        return [(i, j) for i in nodes for j in self.graph.children(i) if j in inside]
+
+    def rows(self, nodes):
+        """Table rows for a view: name, layer, degrees and runtime."""
+        graph = self.graph
+        out = []
+        for i in nodes:
+            s = self.durations.get(graph.names[i]) or {}
+            out.append({'fm': graph.names[i], 'layer': self.layer[i],
+                        'parents': len(graph.parents(i)), 'children': len(graph.children(i)),
+                        'seconds': s.get('seconds'), 'last_seconds': s.get('last'), 'runs': s.get('runs', 0)})
+        return out
+
+    def to_dot(self, nodes, center=None):
+        """Graphviz source for a view; nodes of one precomputed layer share a rank."""
+        names = self.graph.names
+        times = [t for t in (self.runtime(i) for i in nodes) if t is not None]
+        slowest = max(times) if times else 0
+        lines = ['digraph lineage {', '  rankdir=TB;',
+                 '  node [shape=box, style="filled,rounded", fontname="Helvetica", fontsize=10];']
+        by_layer = {}
+        for i in nodes:
+            t = self.runtime(i)
+            label = dot_label(names[i])
+            if t is None:
+                fill = _NO_RUNTIME
+            else:
+                fill = _HEAT[min(len(_HEAT) - 1, int(len(_HEAT) * t / slowest)) if slowest else 0]
+                label += f"\\n{t:.2f}s"
+            extra = ', penwidth=3' if i == center else ''
+            lines.append(f'  n{i} [label="{label}", fillcolor="{fill}"{extra}];')
+            by_layer.setdefault(self.layer[i], []).append(i)
+        for members in by_layer.values():
+            if len(members) > 1:
+                lines.append('  { rank=same; ' + ' '.join(f'n{i};' for i in members) + ' }')
+        lines.extend(f'  n{i} -> n{j};' for i, j in self.edges(nodes))
+        lines.append('}')
+        return '\n'.join(lines)
@@ -0,0 +1,72 @@
+
+
+def is_transform(fn):
+    """True for handlers declared with core.columns.column_transform."""
+    return getattr(fn, 'column_transform', None) is not None
+
+
+def fused_groups(graph, order, resolve):
+    """
+    Split a topological order of node ids into groups that run as one step.
+
+    A column-transform FM absorbs its only child while that child is also a
+    transform, has no other parent and is the next FM with a handler in
+    `order`, i.e. a linear chain of transforms that the serial run would
+    execute back to back anyway. Handlers share ctx.current_df, so a child
+    is never moved ahead of another handler: each FM sees the same data as
+    unfused. Cycle members are never fused. Returns a list of node-id lists.
+    """
+    names = graph.names
+    comp, mo, _, _, _ = graph.condensation()
+    transform, handled = {}, {}
+
+    def fusable(i):
+        if i not in transform:
+            c = comp[i]
+            transform[i] = mo[c + 1] - mo[c] == 1 and is_transform(resolve(names[i]))
+        return transform[i]
+
+    def has_handler(i):
+        if i not in handled:
+            handled[i] = resolve(names[i]) is not None
+        return handled[i]
+
+    pos = {i: k for k, i in enumerate(order)}
+
+    def next_handler(i):
+        # First FM with a handler after i in order that has not run yet
+        k = pos[i] + 1
+        while k < len(order) and (placed[order[k]] or not has_handler(order[k])):
+            k += 1
+        return order[k] if k < len(order) else None
+
+    placed = bytearray(len(names))
+    groups = []
+    for i in order:
+        if placed[i]:
+            continue
+        placed[i] = 1
+        group = [i]
+        if fusable(i):
+            while True:
+                kids = graph.children(group[-1])
+                if len(kids) != 1:
+                    break
+                j = kids[0]
+                if (placed[j] or len(graph.parents(j)) != 1 or not fusable(j)
+                        or next_handler(group[-1]) != j):
+                    break
+                placed[j] = 1
+                group.append(j)
+        groups.append(group)
+    return groups
+
+
+def fuse(handlers):
+    """One handler(ctx) running a chain of column transforms in a single pass per batch."""
+    def fused(ctx):
+        if ctx is None or ctx.current_df is None:
+            return
+        from lakehouse_fm_agent.core.columns import run_transforms
+        ctx.current_df = run_transforms(ctx, handlers, ctx.current_df)
+    return fused
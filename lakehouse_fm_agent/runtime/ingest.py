@@ -0,0 +1,238 @@
+
+import os
+import re
+from array import array
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+from lakehouse_fm_agent.runtime.lineage import LineageGraph, iter_edges
+
+LINEAGE_GLOB = '*LINEAGE*'
+INTERFACE_GLOB = '*INTERFACE*'
+
+SECTIONS = ('IMPORTING', 'EXPORTING', 'CHANGING', 'TABLES', 'EXCEPTIONS')
+
+
+def _files(path, pattern):
+    path = Path(path)
+    if path.is_dir():
+        return sorted(str(p) for p in path.rglob(pattern) if p.is_file())
+    return [str(path)]
+
+
+def lineage_files(path):
+    """LINEAGE files under a directory (recursive, sorted), or [path] for a file."""
+    return _files(path, LINEAGE_GLOB)
+
+
+def interface_files(path):
+    """INTERFACE files under a directory (recursive, sorted), or [path] for a file."""
+    return _files(path, INTERFACE_GLOB)
+
+
+def _pool_map(fn, items, workers):
+    """map() over a process pool; serial for one worker or one item."""
+    workers = min(workers or os.cpu_count() or 1, len(items))
+    if workers <= 1:
+        return map(fn, items)
+    from concurrent.futures import ProcessPoolExecutor
+    pool = ProcessPoolExecutor(max_workers=workers)
+    # Several files per task amortise pickling; a few tasks per worker keep them balanced
+    chunk = max(1, len(items) // (workers * 4))
+
+    def results():
+        with pool:
+            yield from pool.map(fn, items, chunksize=chunk)
+    return results()
+
+
+# --------------------------------------------------------------------------------------
+# LINEAGE
+# --------------------------------------------------------------------------------------
+def _parse_lineage(path):
+    """
+    Worker: one LINEAGE file as (names, kinds, src, dst, kind, skipped) with
+    ids local to the file and repeated edges dropped. Arrays travel as bytes.
+    """
+    index, names = {}, []
+    kind_index, kinds = {}, []
+    seen = set()
+    src, dst = array('i'), array('i')
+    kind, skipped = array('B'), array('B')
+    for p, c, k, skip in iter_edges(path):
+        if (p, c, k, skip) in seen:
+            continue
+        seen.add((p, c, k, skip))
+        i = index.get(p)
+        if i is None:
+            i = index[p] = len(names); names.append(p)
+        j = index.get(c)
+        if j is None:
+            j = index[c] = len(names); names.append(c)
+        kc = kind_index.get(k)
+        if kc is None:
+            kc = kind_index[k] = len(kinds); kinds.append(k)
+        src.append(i); dst.append(j)
+        kind.append(kc); skipped.append(1 if skip else 0)
+    return names, kinds, src.tobytes(), dst.tobytes(), kind.tobytes(), skipped.tobytes()
+
+
+def ingest_lineage(paths, workers=None):
+    """
+    Parse LINEAGE files in a process pool and merge them into one LineageGraph.
+
+    Files are merged in the given order, so node ids and edge order are the
+    same for any worker count. An edge (parent, child, kind, skipped) found in
+    several files is kept once, at its first occurrence.
+    """
+    index, names = {}, []
+    kind_index, kinds = {}, []
+    # Edges packed into one int (src | dst | kind | skipped); dict keys keep first-seen order
+    edges = {}
+    for f_names, f_kinds, f_src, f_dst, f_kind, f_skipped in _pool_map(_parse_lineage, list(paths), workers):
+        ids = []
+        for name in f_names:
+            i = index.get(name)
+            if i is None:
+                i = index[name] = len(names); names.append(name)
+            ids.append(i << 40)
+        kids = []
+        for k in f_kinds:
+            kc = kind_index.get(k)
+            if kc is None:
+                kc = kind_index[k] = len(kinds); kinds.append(k)
+            kids.append(kc << 1)
+        dids = [i >> 31 for i in ids]
+        a_src, a_dst, a_kind = array('i'), array('i'), array('B')
+        a_src.frombytes(f_src); a_dst.frombytes(f_dst); a_kind.frombytes(f_kind)
+        edges.update(dict.fromkeys(
+            ids[s] | dids[d] | kids[k] | f for s, d, k, f in zip(a_src, a_dst, a_kind, f_skipped)))
+    src = array('i', (e >> 40 for e in edges))
+    dst = array('i', ((e >> 9) & 0x7FFFFFFF for e in edges))
+    kind = array('B', ((e >> 1) & 0xFF for e in edges))
+    skipped = array('B', (e & 1 for e in edges))
+    return LineageGraph(names, src, dst, kind, skipped, kinds, index)
+
+
+# --------------------------------------------------------------------------------------
+# INTERFACE
+# --------------------------------------------------------------------------------------
+class Param(NamedTuple):
+    name: str
+    typing: str            # TYPE, LIKE, STRUCTURE or TYPE REF TO ('' if untyped)
+    type: str
+    by_value: bool = False
+    optional: bool = False
+    default: Optional[str] = None
+
+
+class Signature(NamedTuple):
+    fm: str
+    importing: Tuple[Param, ...] = ()
+    exporting: Tuple[Param, ...] = ()
+    changing: Tuple[Param, ...] = ()
+    tables: Tuple[Param, ...] = ()
+    exceptions: Tuple[str, ...] = ()
+
+    def params(self):
+        return self.importing + self.exporting + self.changing + self.tables
+
+
+_FM_RE = re.compile(r"^(?:FUNCTION\s+|FM\s*:\s*)(?P<fm>[\w/]+)\.?\s*$", re.IGNORECASE)
+_PARAM_RE = re.compile(
+    r"^(?:(?P<pass>VALUE|REFERENCE)\((?P<pname>[\w/]+)\)|(?P<name>[\w/]+))"
+    r"(?:\s+(?P<typing>TYPE\s+REF\s+TO|TYPE|LIKE|STRUCTURE)\s+(?P<type>\S+))?"
+    r"(?P<rest>.*)$",
+    re.IGNORECASE,
+)
+_DEFAULT_RE = re.compile(r"\bDEFAULT\s+(?P<value>'[^']*'|\S+)", re.IGNORECASE)
+
+
+def parse_param(text):
+    """One parameter declaration, e.g. "VALUE(I_QTY) TYPE MENGE_D OPTIONAL", or None."""
+    m = _PARAM_RE.match(text.strip())
+    if not m:
+        return None
+    rest = m.group('rest')
+    default = _DEFAULT_RE.search(rest)
+    return Param(
+        name=(m.group('pname') or m.group('name')).upper(),
+        typing=' '.join((m.group('typing') or '').upper().split()),
+        type=(m.group('type') or '').upper(),
+        by_value=(m.group('pass') or '').upper() == 'VALUE',
+        optional=bool(re.search(r"\bOPTIONAL\b", rest, re.IGNORECASE)) or default is not None,
+        default=default.group('value') if default else None,
+    )
+
+
+def parse_interface(path):
+    """
+    Parse an INTERFACE file into {fm: Signature}.
+
+    Each FM starts with "FUNCTION <name>" (or "FM: <name>") followed by the
+    SE37 local-interface block; the "*\"" comment prefix is optional::
+
+        FUNCTION Y_DNP_CONV_BUOM_SU_SSU.
+        *"  IMPORTING
+        *"     VALUE(I_MATNR) TYPE  MATNR
+        *"     REFERENCE(I_QTY) TYPE  MENGE_D OPTIONAL
+        *"  TABLES
+        *"      T_DATA STRUCTURE  ZSTR
+        *"  EXCEPTIONS
+        *"      NOT_FOUND
+
+    A section keyword may also share its line with the first parameter.
+    Unrecognised lines are ignored.
+    """
+    out = {}
+    fm, sections, section = None, None, None
+
+    def close():
+        if fm is not None:
+            out[fm] = Signature(fm, **{k: tuple(v) for k, v in sections.items()})
+
+    with open(path, encoding='utf-8', errors='ignore') as fh:
+        for raw in fh:
+            line = raw.strip()
+            if line.startswith('*"'):
+                line = line[2:].strip()
+            if not line or line.startswith(('*', '"', '-')):
+                continue
+            m = _FM_RE.match(line)
+            if m:
+                close()
+                fm = m.group('fm').upper()
+                sections = {s.lower(): [] for s in SECTIONS}
+                section = None
+                continue
+            if fm is None:
+                continue
+            head, _, tail = line.partition(' ')
+            if head.upper() in SECTIONS:
+                section = head.lower()
+                line = tail.strip()
+                if not line:
+                    continue
+            elif head.upper() in ('ENDFUNCTION', 'ENDFUNCTION.'):
+                close()
+                fm = None
+                continue
+            if section is None:
+                continue
+            if section == 'exceptions':
+                sections[section].extend(w.upper() for w in line.split())
+            else:
+                p = parse_param(line)
+                if p:
+                    sections[section].append(p)
+    close()
+    return out
+
+
+def load_interfaces(paths, workers=None):
+    """Parse INTERFACE files in a process pool; {fm: Signature}, first file wins."""
+    out = {}
+    for sigs in _pool_map(parse_interface, list(paths), workers):
+        for fm, sig in sigs.items():
+            out.setdefault(fm, sig)
+    return out
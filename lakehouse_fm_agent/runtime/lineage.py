@@ -1,48 +1,393 @@
 
+import mmap
 import re
-from pathlib import Path
+from array import array
 
 EDGE_RE   = re.compile(r"^(?P<p>[^-]+)->\s*(?P<c>[^\[]+)\[(?P<k>[^\]]+)\]", re.IGNORECASE)
 SKIP_RE   = re.compile(r"^SKIPPED:\s*(?P<p>[^-]+)->\s*(?P<c>[^\[]+)\[", re.IGNORECASE)
 
-def load_edges(lineage_path):
-    rows = []
-    for raw in Path(lineage_path).read_text(encoding='utf-8', errors='ignore').splitlines():
-        line = raw.strip()
-        if not line: continue
-        m_skip = SKIP_RE.search(line)
-        if m_skip:
-            p = m_skip.group('p').strip(); c = m_skip.group('c').strip()
-            rows.append((p,c,'FM',True)); continue
-        m = EDGE_RE.search(line.replace('  ',' ').replace(' -','-'))
-        if m:
-            p = m.group('p').strip(); c = m.group('c').strip(); k = m.group('k').strip().upper()
-            rows.append((p,c,k,False))
+_SKIP_PREFIX = 'SKIPPED:'
+
+
+def _norm(s):
+    # Same whitespace folding EDGE_RE matching used to apply to the whole line
+    if '  ' in s or ' -' in s:
+        s = s.replace('  ', ' ').replace(' -', '-')
+    return s.strip()
+
+
+def parse_line(line):
+    """
+    Parse one LINEAGE line into (parent, child, kind, skipped) or None.
+
+    str.partition equivalent of SKIP_RE / EDGE_RE: the parent runs up to the
+    first '-' (which must open the '->' arrow), the child up to '[' and the
+    kind up to ']'. SKIPPED lines need no ']' and get no whitespace folding.
+    """
+    line = line.strip()
+    # Prefix dispatch: every edge form needs an arrow, so noise lines
+    # (headers, separators, blanks) are rejected by one substring test.
+    if '->' not in line:
+        return None
+    if line[:8].upper() == _SKIP_PREFIX:
+        p, _, rest = line[8:].partition('->')
+        if p and '-' not in p:
+            c, br, _ = rest.partition('[')
+            if br and c:
+                return (p.strip(), c.strip(), 'FM', True)
+    p, _, rest = line.partition('->')
+    if not p or '-' in p:
+        return None
+    c, br, rest = rest.partition('[')
+    if not (br and c):
+        return None
+    k, br, _ = rest.partition(']')
+    if not (br and k):
+        return None
+    return (_norm(p), _norm(c), _norm(k).upper(), False)
+
+
+_CHUNK = 1 << 20
+
+
+def _iter_lines(lineage_path, use_mmap):
+    # Chunked reads + str.split keep memory bounded by _CHUNK while avoiding
+    # per-line readline overhead; the trailing partial line carries over.
+    tail = ''
+    if use_mmap:
+        with open(lineage_path, 'rb') as fh:
+            try:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file cannot be mapped
+                return
+            with mm:
+                pos, size = 0, len(mm)
+                while pos < size:
+                    end = mm.rfind(b'\n', pos, min(pos + _CHUNK, size)) + 1
+                    if end <= pos:
+                        end = min(pos + _CHUNK, size)
+                    lines = (tail + mm[pos:end].decode('utf-8', errors='ignore')).split('\n')
+                    tail = lines.pop()
+                    yield from lines
+                    pos = end
+    else:
+        with open(lineage_path, encoding='utf-8', errors='ignore') as fh:
+            while True:
+                buf = fh.read(_CHUNK)
+                if not buf:
+                    break
+                lines = (tail + buf).split('\n')
+                tail = lines.pop()
+                yield from lines
+    if tail:
+        yield tail
+
+
+def iter_edges(lineage_path, use_mmap=False):
+    """
+    Stream (parent, child, kind, skipped) edges from a LINEAGE file.
+
+    Reads in bounded chunks (optionally through mmap) so memory stays constant
+    regardless of file size. Matching is equivalent to EDGE_RE / SKIP_RE.
+    """
+    for raw in _iter_lines(lineage_path, use_mmap):
+        if '->' not in raw:
+            continue
+        edge = parse_line(raw)
+        if edge:
+            yield edge
+
+
+def load_edges(lineage_path, use_mmap=False):
+    return list(iter_edges(lineage_path, use_mmap=use_mmap))
+
+
+def _csr(n, src, dst):
+    """Bucket (src, dst) pairs by src and drop repeated pairs -> (offsets, targets)."""
+    offsets = array('q', bytes(8 * (n + 1)))
+    for s in src:
+        offsets[s + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    pos = array('q', offsets)
+    bucketed = array('i', bytes(4 * len(dst)))
+    for s, d in zip(src, dst):
+        bucketed[pos[s]] = d
+        pos[s] += 1
+    # Stable de-dup per bucket: mark[d] remembers the last src that linked d
+    mark = array('i', [-1]) * n
+    dedup = array('q', [0])
+    targets = array('i')
+    for s in range(n):
+        for j in range(offsets[s], offsets[s + 1]):
+            d = bucketed[j]
+            if mark[d] != s:
+                mark[d] = s
+                targets.append(d)
+        dedup.append(len(targets))
+    return dedup, targets
+
+
+class LineageGraph:
+    """
+    Compact lineage graph: FM names are interned to ints (first-seen order),
+    edges are kept in file order as parallel arrays (src, dst, kind code,
+    skipped flag), and adjacency is CSR over the distinct (parent, child) pairs.
+    """
+
+    def __init__(self, names, src, dst, kind, skipped, kinds, index=None, csr=None, layers=None,
+                 cond=None):
+        self.names = names
+        self._index = index
+        self.src, self.dst = src, dst
+        self.kind, self.skipped = kind, skipped
+        self.kinds = kinds
+        self.offsets, self.targets = csr if csr is not None else _csr(len(names), src, dst)
+        self._rev = None
+        self._layers = layers
+        self._cond = cond
+
+    @classmethod
+    def from_edges(cls, edges):
+        index, names = {}, []
+        kind_index, kinds = {}, []
+        src, dst = array('i'), array('i')
+        kind, skipped = array('B'), array('B')
+        get = index.get
+        for p, c, k, skip in edges:
+            i = get(p)
+            if i is None:
+                i = index[p] = len(names); names.append(p)
+            j = get(c)
+            if j is None:
+                j = index[c] = len(names); names.append(c)
+            kc = kind_index.get(k)
+            if kc is None:
+                kc = kind_index[k] = len(kinds); kinds.append(k)
+            src.append(i); dst.append(j)
+            kind.append(kc); skipped.append(1 if skip else 0)
+        return cls(names, src, dst, kind, skipped, kinds, index)
+
+    @classmethod
+    def from_file(cls, lineage_path, use_mmap=False):
+        return cls.from_edges(iter_edges(lineage_path, use_mmap=use_mmap))
+
+    @property
+    def index(self):
+        """name -> node id (built on first use; cache loads skip it)."""
+        if self._index is None:
+            self._index = {n: i for i, n in enumerate(self.names)}
+        return self._index
+
+    def __len__(self):
+        return len(self.names)
+
+    def find(self, name):
+        """Node id for an FM name (exact, else case-insensitive), or None."""
+        i = self.index.get(name)
+        if i is None:
+            upper = name.upper()
+            i = next((j for j, n in enumerate(self.names) if n.upper() == upper), None)
+        return i
+
+    @property
+    def n_edges(self):
+        return len(self.src)
+
+    def edges(self):
+        """Yield (parent, child, kind, skipped) tuples in file order."""
+        names, kinds = self.names, self.kinds
+        for s, d, k, f in zip(self.src, self.dst, self.kind, self.skipped):
+            yield (names[s], names[d], kinds[k], bool(f))
+
+    def children(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def _reverse(self):
+        if self._rev is None:
+            self._rev = _csr(len(self.names), self.targets, _expand(self.offsets))
+        return self._rev
+
+    def parents(self, i):
+        offsets, targets = self._reverse()
+        return targets[offsets[i]:offsets[i + 1]]
+
+    def indegree(self):
+        indeg = array('i', bytes(4 * len(self.names)))
+        for d in self.targets:
+            indeg[d] += 1
+        return indeg
+
+    def sccs(self):
+        """
+        Strongly connected components (iterative Tarjan): (comp id per node,
+        number of components), numbered in topological order of the
+        condensed DAG.
+        """
+        n = len(self.names)
+        offsets, targets = self.offsets, self.targets
+        order = array('i', [-1]) * n
+        low = array('i', bytes(4 * n))
+        comp = array('i', [-1]) * n
+        on_stack = bytearray(n)
+        stack, counter, ncomp = [], 0, 0
+        for root in range(n):
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = counter; counter += 1
+            stack.append(root); on_stack[root] = 1
+            work = [[root, offsets[root]]]
+            while work:
+                frame = work[-1]
+                v, j = frame
+                if j < offsets[v + 1]:
+                    frame[1] = j + 1
+                    w = targets[j]
+                    if order[w] == -1:
+                        order[w] = low[w] = counter; counter += 1
+                        stack.append(w); on_stack[w] = 1
+                        work.append([w, offsets[w]])
+                    elif on_stack[w] and order[w] < low[v]:
+                        low[v] = order[w]
+                    continue
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    if low[v] < low[u]:
+                        low[u] = low[v]
+                if low[v] == order[v]:
+                    while True:
+                        w = stack.pop(); on_stack[w] = 0
+                        comp[w] = ncomp
+                        if w == v:
+                            break
+                    ncomp += 1
+        # Tarjan completes components in reverse topological order
+        for i in range(n):
+            comp[i] = ncomp - 1 - comp[i]
+        return comp, ncomp
+
+    def condensation(self):
+        """
+        Memoised (comp, member_offsets, members, offsets, targets): comp id per
+        node, node ids of each component (ascending) and the CSR of the
+        condensed DAG.
+        """
+        if self._cond is None:
+            comp, ncomp = self.sccs()
+            member_offsets = array('q', bytes(8 * (ncomp + 1)))
+            for c in comp:
+                member_offsets[c + 1] += 1
+            for c in range(ncomp):
+                member_offsets[c + 1] += member_offsets[c]
+            pos = array('q', member_offsets)
+            members = array('i', bytes(4 * len(comp)))
+            for i, c in enumerate(comp):
+                members[pos[c]] = i
+                pos[c] += 1
+            offsets, targets = self.offsets, self.targets
+            if ncomp == len(comp):
+                # No cycles: comp is a permutation, so the CSR only needs relabelling
+                c_offsets, c_targets = array('q', [0]), array('i')
+                for i in members:
+                    ci = comp[i]
+                    c_targets.extend(cj for cj in (comp[t] for t in targets[offsets[i]:offsets[i + 1]])
+                                     if cj != ci)
+                    c_offsets.append(len(c_targets))
+                self._cond = (comp, member_offsets, members, c_offsets, c_targets)
+                return self._cond
+            csrc, cdst = array('i'), array('i')
+            for i in range(len(comp)):
+                ci = comp[i]
+                for j in range(offsets[i], offsets[i + 1]):
+                    cj = comp[targets[j]]
+                    if cj != ci:
+                        csrc.append(ci); cdst.append(cj)
+            self._cond = (comp, member_offsets, members) + _csr(ncomp, csrc, cdst)
+        return self._cond
+
+    def cycles(self):
+        """Node id lists of the components that form cycles (size > 1 or a self-loop)."""
+        comp, mo, members, _, _ = self.condensation()
+        out = []
+        for c in range(len(mo) - 1):
+            group = members[mo[c]:mo[c + 1]]
+            if len(group) > 1 or group[0] in self.children(group[0]):
+                out.append(list(group))
+        return out
+
+    def layers(self):
+        """
+        Kahn layering of the condensed DAG. Each cycle's members stay together
+        in one layer, adjacent and in id order, so the cycle runs as one unit.
+        """
+        if self._layers is None:
+            self._layers = self._kahn_layers()
+        return self._layers
+
+    def _kahn_layers(self):
+        _, mo, members, offsets, targets = self.condensation()
+        ncomp = len(mo) - 1
+        indeg = array('i', bytes(4 * ncomp))
+        for d in targets:
+            indeg[d] += 1
+        layer = [c for c in range(ncomp) if indeg[c] == 0]
+        layers = []
+        while layer:
+            nodes, nxt = [], []
+            for c in layer:
+                nodes.extend(members[mo[c]:mo[c + 1]])
+                for j in range(offsets[c], offsets[c + 1]):
+                    d = targets[j]
+                    indeg[d] -= 1
+                    if indeg[d] == 0:
+                        nxt.append(d)
+            layers.append(nodes)
+            layer = nxt
+        return layers
+
+    def layer_names(self):
+        names = self.names
+        return [[names[i] for i in layer] for layer in self.layers()]
+
+    def subgraph(self, nodes):
+        """Graph induced by node ids: their edges in file order, ids renumbered in node order."""
+        nodes = sorted(nodes)
+        remap = array('i', [-1]) * len(self.names)
+        for new, old in enumerate(nodes):
+            remap[old] = new
+        src, dst = array('i'), array('i')
+        kind, skipped = array('B'), array('B')
+        for s, d, k, f in zip(self.src, self.dst, self.kind, self.skipped):
+            if remap[s] >= 0 and remap[d] >= 0:
+                src.append(remap[s]); dst.append(remap[d])
+                kind.append(k); skipped.append(f)
+        return LineageGraph([self.names[i] for i in nodes], src, dst, kind, skipped, self.kinds)
+
+    def reachable(self, seeds, reverse=False):
+        """bytearray mask of nodes reachable from seeds (ancestors if reverse)."""
+        offsets, targets = self._reverse() if reverse else (self.offsets, self.targets)
+        mask = bytearray(len(self.names))
+        stack = list(seeds)
+        for i in stack:
+            mask[i] = 1
+        while stack:
+            n = stack.pop()
+            for j in range(offsets[n], offsets[n + 1]):
+                m = targets[j]
+                if not mask[m]:
+                    mask[m] = 1
+                    stack.append(m)
+        return mask
+
+
+def _expand(offsets):
+    """CSR offsets -> per-entry row ids (the src column of each target)."""
+    rows = array('i')
+    for i in range(len(offsets) - 1):
+        rows.extend(array('i', [i]) * (offsets[i + 1] - offsets[i]))
     return rows
 
 
 def topo_layers(edges):
-    from collections import defaultdict, deque
-    out = defaultdict(set); indeg = defaultdict(int); nodes = set()
-    for p,c,_,_ in edges:
-        nodes.add(p); nodes.add(c)
-        if c not in out[p]:
-            out[p].add(c)
-            indeg[c]+=1
-            indeg.setdefault(p, indeg.get(p,0))
-    q = deque([n for n in nodes if indeg.get(n,0)==0])
-    layers = []
-    seen = set()
-    while q:
-        layer = []
-        for _ in range(len(q)):
-            n = q.popleft(); layer.append(n); seen.add(n)
-            for m in list(out.get(n, [])):
-                indeg[m]-=1
-                if indeg[m]==0:
-                    q.append(m)
-        layers.append(layer)
-    remaining = [n for n in nodes if n not in seen]
-    if remaining:
-        layers.append(remaining)
-    return layers
+    return LineageGraph.from_edges(edges).layer_names()
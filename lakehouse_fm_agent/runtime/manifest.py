@@ -1,24 +1,161 @@
 
 import json, time
 
+# Item fields that describe the plan rather than the object; a change in them is not an ALTER
+_PLAN_FIELDS = ('plan_id', 'fm_source', 'planned_action', 'reason', 'status', 'created_at', 'created_by')
+
+
+def _key(catalog, schema, name):
+    # Unity Catalog identifiers are case-insensitive
+    return (str(catalog).lower(), str(schema).lower(), str(name).lower())
+
+
+def item_key(item):
+    return _key(item['catalog_name'], item['schema_name'], item['object_name'])
+
+
 class Manifest:
-    def __init__(self, plan_id:str):
+    """
+    Planned objects keyed by (catalog, schema, object): ensure_* upserts in
+    O(1), so repeated requests for one object merge into a single item
+    (depends_on and grants are unioned, other fields take the latest value).
+    Items keep first-seen order.
+    """
+
+    def __init__(self, plan_id:str, created_by='fmtool'):
         self.plan_id = plan_id
-        self.items = []
-    def ensure_table(self, catalog, schema, name, reason, depends_on):
-        self.items.append({
-            'plan_id': self.plan_id,
-            'object_type': 'TABLE',
-            'catalog_name': catalog,
-            'schema_name': schema,
-            'object_name': name,
-            'fm_source': 'plan',
-            'planned_action': 'CREATE',
-            'reason': reason,
-            'depends_on': depends_on,
-            'status': 'PLANNED',
-            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-            'created_by': 'fmtool'
-        })
+        self.created_by = created_by
+        self.created_at = time.strftime('%Y-%m-%dT%H:%M:%SZ')
+        self._items = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def __contains__(self, key):
+        return _key(*key) in self._items
+
+    @property
+    def items(self):
+        return list(self._items.values())
+
+    def get(self, catalog, schema, name):
+        return self._items.get(_key(catalog, schema, name))
+
+    def ensure(self, object_type, catalog, schema, name, reason='', depends_on=(), **fields):
+        key = _key(catalog, schema, name)
+        item = self._items.get(key)
+        if item is None:
+            item = self._items[key] = {
+                'plan_id': self.plan_id,
+                'object_type': object_type,
+                'catalog_name': catalog,
+                'schema_name': schema,
+                'object_name': name,
+                'fm_source': 'plan',
+                'planned_action': 'CREATE',
+                'reason': reason,
+                'depends_on': list(dict.fromkeys(depends_on or ())),
+                'status': 'PLANNED',
+                'created_at': self.created_at,
+                'created_by': self.created_by,
+            }
+        else:
+            if object_type != 'GRANT':
+                item['object_type'] = object_type
+            if reason:
+                item['reason'] = reason
+            if depends_on:
+                item['depends_on'] = list(dict.fromkeys(item['depends_on'] + list(depends_on)))
+        item.update(fields)
+        return item
+
+    def ensure_table(self, catalog, schema, name, reason, depends_on, columns=None):
+        extra = {'columns': columns} if columns is not None else {}
+        return self.ensure('TABLE', catalog, schema, name, reason, depends_on, **extra)
+
+    def ensure_view(self, catalog, schema, name, reason, depends_on, definition=None):
+        extra = {'definition': definition} if definition is not None else {}
+        return self.ensure('VIEW', catalog, schema, name, reason, depends_on, **extra)
+
+    def ensure_grant(self, catalog, schema, name, principal, privileges, reason=''):
+        """Grant privileges on an object; a GRANT-only item if the object itself is not planned."""
+        item = self.get(catalog, schema, name) or self.ensure('GRANT', catalog, schema, name, reason)
+        grants = item.setdefault('grants', {})
+        grants[principal] = sorted(set(grants.get(principal, ())) | {p.upper() for p in privileges})
+        return item
+
     def to_json(self):
         return json.dumps(self.items, indent=2)
+
+    def write(self, path):
+        """Stream the items to path: JSON lines for *.jsonl, else a JSON array (one item per line)."""
+        with open(path, 'w', encoding='utf-8') as fh:
+            write_items(fh, self, jsonl=str(path).endswith('.jsonl'))
+
+    @classmethod
+    def load(cls, path):
+        """Read a manifest written as a JSON array (any layout) or as JSON lines."""
+        items = read_items(path)
+        m = cls(plan_id=items[0]['plan_id'] if items else None)
+        for item in items:
+            m._items[item_key(item)] = item
+        return m
+
+
+def write_items(fh, items, jsonl=False):
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    if jsonl:
+        for item in items:
+            fh.write(dumps(item))
+            fh.write('\n')
+        return
+    fh.write('[')
+    sep = '\n  '
+    for item in items:
+        fh.write(sep)
+        fh.write(dumps(item))
+        sep = ',\n  '
+    fh.write('\n]\n')
+
+
+def read_items(path):
+    with open(path, encoding='utf-8') as fh:
+        head = fh.read(1)
+        while head and head.isspace():
+            head = fh.read(1)
+        if head == '[':
+            fh.seek(0)
+            return json.load(fh)
+        fh.seek(0)
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def _spec(item):
+    return {k: v for k, v in item.items() if k not in _PLAN_FIELDS}
+
+
+def diff(previous, current):
+    """
+    Delta items turning `previous` into `current` (Manifests): CREATE for new
+    keys, ALTER where the object's spec changed (the changed fields are listed
+    under 'changes'), DROP for keys no longer planned. O(n) over both plans.
+    """
+    prev = previous._items
+    out = []
+    for key, item in current._items.items():
+        old = prev.get(key)
+        if old is None:
+            out.append(dict(item, planned_action='CREATE'))
+            continue
+        new_spec, old_spec = _spec(item), _spec(old)
+        if new_spec != old_spec:
+            changed = sorted(k for k in new_spec.keys() | old_spec.keys() if new_spec.get(k) != old_spec.get(k))
+            out.append(dict(item, planned_action='ALTER', changes=changed))
+    for key, old in prev.items():
+        if key not in current._items:
+            out.append(dict(old, plan_id=current.plan_id, planned_action='DROP', status='PLANNED',
+                            created_at=current.created_at, created_by=current.created_by))
+    return out
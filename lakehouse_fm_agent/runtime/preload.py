@@ -0,0 +1,139 @@
+
+import os
+import shutil
+import tempfile
+import time
+
+
+def requires(*tables, build=None):
+    """
+    Declare the reference tables a handler reads and the lookup it builds
+    from them (build(ctx), normally a ctx.lookup call), so a run can load
+    them all up front instead of handler by handler.
+    """
+    def mark(handler):
+        handler.ref_tables = tuple(tables)
+        handler.ref_lookup = build
+        return handler
+    return mark
+
+
+def required(handlers):
+    """(tables, {build: tables}) declared by handlers, without duplicates."""
+    tables, builders = {}, {}
+    for h in handlers:
+        names = getattr(h, 'ref_tables', ())
+        tables.update(dict.fromkeys(names))
+        build = getattr(h, 'ref_lookup', None)
+        if build is not None:
+            builders[build] = tuple(dict.fromkeys(builders.get(build, ()) + names))
+    return list(tables), builders
+
+
+def preload(ctx, handlers, workers=None):
+    """
+    Fetch every reference table the handlers declare concurrently, then
+    build each lookup as soon as its own tables have arrived, so the stage
+    takes about as long as the slowest table (plus its build) rather than
+    the sum. Tables already in ctx.tables are not fetched again.
+
+    Missing tables and failing builds are recorded, not raised: the handler
+    that needs them raises when (and if) it actually runs.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    tables, builders = required(handlers)
+    stats = {'tables': {}, 'missing': [], 'lookups': {}, 'failed': {}, 'seconds': 0.0}
+    t0 = time.perf_counter()
+
+    def fetch(name):
+        # Pin the version first and read exactly it, so lookups keyed on
+        # ctx.table_version describe the data they were built from
+        start = time.perf_counter()
+        version = ctx.table_version(name)
+        return ctx.read_uc(name, version), version, time.perf_counter() - start
+
+    def build(fn):
+        start = time.perf_counter()
+        fn(ctx)
+        return time.perf_counter() - start
+
+    pending = {b: set(names) for b, names in builders.items()}
+    todo = [t for t in tables if t not in ctx.tables]
+    with ThreadPoolExecutor(max_workers=workers or max(1, len(todo) + len(builders))) as pool:
+        running = {pool.submit(fetch, name): ('table', name) for name in todo}
+
+        def arrived(name):
+            for b, waiting in list(pending.items()):
+                waiting.discard(name)
+                if not waiting:
+                    del pending[b]
+                    running[pool.submit(build, b)] = ('lookup', b)
+
+        for name in tables:
+            if name in ctx.tables:
+                arrived(name)
+        for b in [b for b, waiting in pending.items() if not waiting]:
+            del pending[b]
+            running[pool.submit(build, b)] = ('lookup', b)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind, what = running.pop(fut)
+                label = what if kind == 'table' else getattr(what, '__name__', repr(what))
+                exc = fut.exception()
+                if kind == 'table':
+                    if exc is None:
+                        table, version, stats['tables'][what] = fut.result()
+                        if version is not None:
+                            ctx.versions[what] = version
+                        ctx.tables[what] = table
+                        arrived(what)
+                    else:
+                        stats['missing'].append(what)
+                elif exc is None:
+                    stats['lookups'][label] = fut.result()
+                else:
+                    stats['failed'][label] = f"{type(exc).__name__}: {exc}"
+    # Lookups whose tables never arrived are left to their handlers
+    stats['seconds'] = time.perf_counter() - t0
+    return stats
+
+
+def _map_file(path):
+    import pyarrow as pa
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+class SharedTables:
+    """
+    Reference tables published once as uncompressed Arrow IPC files in
+    shared memory (/dev/shm where available) for process workers: attach()
+    memory-maps them, so every worker reads the same pages zero-copy
+    instead of fetching and holding its own copy. Picklable (paths and
+    the Delta versions the tables were read at).
+    """
+
+    def __init__(self, root, files, versions=None):
+        self.root = root
+        self.files = files
+        self.versions = dict(versions or {})
+
+    @classmethod
+    def publish(cls, tables, versions=None):
+        import pyarrow as pa
+        root = tempfile.mkdtemp(prefix='fmtool-ref-', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+        files = {}
+        for i, (name, table) in enumerate(tables.items()):
+            path = os.path.join(root, f'{i:03d}.arrow')
+            with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            files[name] = path
+        return cls(root, files, {n: v for n, v in (versions or {}).items() if n in files})
+
+    def attach(self):
+        return {name: _map_file(path) for name, path in self.files.items()}
+
+    def close(self):
+        # Workers still mapping the files keep their pages until they exit
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,189 @@
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+# ru_maxrss is KiB on Linux, bytes on macOS
+_RSS_SCALE = 1024 if sys.platform == 'darwin' else 1
+
+
+def _peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // _RSS_SCALE
+
+
+_frames = threading.local()
+
+
+def _timed(run):
+    """
+    run() -> (result, wall_ns, cpu_ns), exclusive of timed calls nested in it:
+    a handler that pulls a lazy stream, or a stream stage pulling the one
+    before it, leaves that work to the stage that did it.
+    """
+    stack = getattr(_frames, 'stack', None)
+    if stack is None:
+        stack = _frames.stack = []
+    stack.append([0, 0])
+    wall0, cpu0 = time.perf_counter_ns(), time.thread_time_ns()
+    try:
+        result = run()
+    finally:
+        wall, cpu = time.perf_counter_ns() - wall0, time.thread_time_ns() - cpu0
+        inner = stack.pop()
+        if stack:
+            stack[-1][0] += wall
+            stack[-1][1] += cpu
+    return result, wall - inner[0], cpu - inner[1]
+
+
+def _stage(fm, profiler):
+    """Stream.pipe function crediting each batch pull of fm's lazy output to fm."""
+    def timed(batches):
+        try:
+            while True:
+                start_ns, wall0 = time.time_ns(), time.perf_counter_ns()
+                batch, wall_ns, cpu_ns = _timed(lambda: next(batches, None))
+                if batch is None:
+                    return
+                profiler.stage(fm, start_ns, time.perf_counter_ns() - wall0, wall_ns, cpu_ns, batch.num_rows)
+                yield batch
+        finally:
+            profiler.stage_done(fm)
+    return timed
+
+
+def _rows(df):
+    if df is None:
+        return None
+    rows = getattr(df, 'num_rows', None)
+    if rows is None and hasattr(df, '__len__'):
+        rows = len(df)
+    return rows  # None for streams (and Spark): rows are unknown until consumed
+
+
+def profile_call(fm, fn, ctx, profiler=None):
+    """
+    Run fn(ctx) and return one metrics record for it.
+
+    Only counters are read around the call (clock, thread CPU time, RSS
+    high-water mark), so this is cheap enough to leave on. The RSS delta is
+    the growth of the process peak while fn ran: exact for serial and process
+    runs, shared between handlers running concurrently in threads.
+
+    A handler that returns a lazy stream (BatchStream.map) does its per-batch
+    work later, when a downstream handler or the output drains the stream.
+    With a profiler that work is timed per batch and added to it as a
+    'stream' record for fm on completion; the call's own record is then
+    phase 'setup'. Time spent pulling upstream stages is never counted twice.
+    """
+    from lakehouse_fm_agent.runtime.stream import BatchStream
+
+    df = ctx.current_df
+    rows_in = _rows(df)
+    rss0 = _peak_rss_kb()
+    start_ns = time.time_ns()
+    _, wall_ns, cpu_ns = _timed(lambda: fn(ctx))
+    out = ctx.current_df
+    lazy = isinstance(out, BatchStream) and out is not df and not out.consumed
+    if lazy and profiler is not None:
+        ctx.current_df = out.pipe(_stage(fm, profiler), schema=out.schema)
+    return {
+        'fm': fm,
+        'phase': 'setup' if lazy else 'call',
+        'start_ns': start_ns,
+        'wall_ms': wall_ns / 1e6,
+        'cpu_ms': cpu_ns / 1e6,
+        'peak_rss_delta_kb': _peak_rss_kb() - rss0,
+        'rows_in': rows_in,
+        'rows_out': _rows(ctx.current_df),
+        'pid': os.getpid(),
+        'tid': threading.get_native_id(),
+    }
+
+
+class Profiler:
+    """
+    Collects profile_call records: appends each one to a JSON-lines file as it
+    arrives and writes a Chrome / Perfetto trace (one complete event per
+    handler) on close.
+    """
+
+    def __init__(self, trace_path=None, jsonl_path=None):
+        self.trace_path = trace_path
+        self.records = []
+        self._lock = threading.Lock()
+        self._fh = open(jsonl_path, 'w', encoding='utf-8') if jsonl_path else None
+        self._t0 = time.time_ns()
+        self._stages = {}
+        self._spans = []
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+            if self._fh:
+                self._fh.write(json.dumps(record) + '\n')
+                self._fh.flush()
+
+    def call(self, fm, fn, ctx):
+        rec = profile_call(fm, fn, ctx, profiler=self)
+        self.add(rec)
+        return rec
+
+    def stage(self, fm, start_ns, span_ns, wall_ns, cpu_ns, rows):
+        """One batch of fm's lazy stream work; span_ns includes the upstream stages it pulled."""
+        with self._lock:
+            rec = self._stages.get(fm)
+            if rec is None:
+                rec = self._stages[fm] = {
+                    'fm': fm, 'phase': 'stream', 'start_ns': start_ns, 'wall_ms': 0.0, 'cpu_ms': 0.0,
+                    'peak_rss_delta_kb': None, 'rows_in': None, 'rows_out': 0, 'batches': 0,
+                    'pid': os.getpid(), 'tid': threading.get_native_id(),
+                }
+            rec['wall_ms'] += wall_ns / 1e6
+            rec['cpu_ms'] += cpu_ns / 1e6
+            rec['rows_out'] += rows
+            rec['batches'] += 1
+            self._spans.append((fm, start_ns, span_ns, wall_ns, rec['tid']))
+
+    def stage_done(self, fm):
+        with self._lock:
+            rec = self._stages.pop(fm, None)
+        if rec is not None:
+            self.add(rec)
+
+    def trace_events(self):
+        events = []
+        for r in self.records:
+            if r['phase'] == 'stream':
+                continue  # drawn per batch below
+            args = {k: r[k] for k in ('cpu_ms', 'peak_rss_delta_kb', 'rows_in', 'rows_out')}
+            events.append({
+                'name': r['fm'], 'cat': 'handler', 'ph': 'X',
+                'ts': (r['start_ns'] - self._t0) / 1e3, 'dur': r['wall_ms'] * 1e3,
+                'pid': r['pid'], 'tid': r['tid'], 'args': args,
+            })
+        # Stream stages nest: each batch span contains the upstream pulls it made
+        pid = os.getpid()
+        for fm, start_ns, span_ns, wall_ns, tid in self._spans:
+            events.append({
+                'name': fm, 'cat': 'stream', 'ph': 'X',
+                'ts': (start_ns - self._t0) / 1e3, 'dur': span_ns / 1e3,
+                'pid': pid, 'tid': tid, 'args': {'self_ms': wall_ns / 1e6},
+            })
+        return events
+
+    def top(self, n=5):
+        return sorted(self.records, key=lambda r: r['wall_ms'], reverse=True)[:n]
+
+    def close(self):
+        for fm in list(self._stages):
+            self.stage_done(fm)
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+        if self.trace_path:
+            with open(self.trace_path, 'w', encoding='utf-8') as fh:
+                json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, fh)
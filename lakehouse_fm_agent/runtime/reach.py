@@ -0,0 +1,214 @@
+
+import mmap
+import os
+import struct
+from array import array
+
+from lakehouse_fm_agent.runtime.cache import cache_path
+
+# Header: magic, version, source size, source mtime_ns, nodes, edges
+_MAGIC = b'FMRI'
+_VERSION = 2
+_HEADER = struct.Struct('<4sHQqQQ')
+
+DEFAULT_MAX_BYTES = 256 << 20
+
+
+def _closure(order, offsets, targets, max_bytes):
+    """
+    Bitset (Python int) of every node reachable from each node, itself
+    included, via one pass in reverse `order`. Back edges (cycles) point at
+    sets that may still grow, so passes repeat until nothing changes.
+    None once the sets exceed max_bytes.
+    """
+    n = len(order)
+    pos = array('i', bytes(4 * n))
+    for k, i in enumerate(order):
+        pos[i] = k
+    bits = [0] * n
+    back = False
+    while True:
+        changed = False
+        total = 0
+        for i in reversed(order):
+            b = bits[i] | (1 << i)
+            for j in range(offsets[i], offsets[i + 1]):
+                c = targets[j]
+                b |= bits[c]
+                if pos[c] <= pos[i]:
+                    back = True
+            if b != bits[i]:
+                bits[i] = b
+                changed = True
+            total += ((b.bit_length() + 7) >> 3) - _shift(b)
+            if total > max_bytes:
+                return None
+        if not (back and changed):
+            return bits
+
+
+def _shift(b):
+    """Whole zero bytes below the lowest set bit (not stored on disk)."""
+    return ((b & -b).bit_length() - 1) >> 3 if b else 0
+
+
+class _Packed:
+    """Read-only view of bitset rows in a buffer; decodes one row per lookup."""
+
+    def __init__(self, buf, offsets, shifts):
+        self.buf = buf
+        self.offsets = offsets
+        self.shifts = shifts
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        row = int.from_bytes(self.buf[self.offsets[i]:self.offsets[i + 1]], 'little')
+        return row << (self.shifts[i] << 3)
+
+
+class ReachIndex:
+    """
+    Descendant / ancestor bitsets per node. A query ORs only the rows of
+    its seeds, so slices resolve without walking the graph.
+    """
+
+    def __init__(self, n, desc, anc):
+        self.n = n
+        self.desc = desc
+        self.anc = anc
+
+    @classmethod
+    def build(cls, graph, max_bytes=DEFAULT_MAX_BYTES):
+        order = [i for layer in graph.layers() for i in layer]
+        desc = _closure(order, graph.offsets, graph.targets, max_bytes // 2)
+        if desc is None:
+            return None
+        roffsets, rtargets = graph._reverse()
+        anc = _closure(order[::-1], roffsets, rtargets, max_bytes // 2)
+        if anc is None:
+            return None
+        return cls(len(graph), desc, anc)
+
+    def descendants(self, seeds):
+        out = 0
+        for i in seeds:
+            out |= self.desc[i]
+        return out
+
+    def ancestors(self, seeds):
+        out = 0
+        for i in seeds:
+            out |= self.anc[i]
+        return out
+
+    def _pack(self):
+        parts = []
+        for rows in (self.desc, self.anc):
+            offsets, shifts = array('q', [0]), array('q')
+            blobs = []
+            for b in rows:
+                shift = _shift(b)
+                blob = (b >> (shift << 3)).to_bytes(((b.bit_length() + 7) >> 3) - shift, 'little')
+                blobs.append(blob)
+                shifts.append(shift)
+                offsets.append(offsets[-1] + len(blob))
+            parts.append(offsets.tobytes())
+            parts.append(shifts.tobytes())
+            parts.extend(blobs)
+        return b''.join(parts)
+
+    def save(self, path, st, n_edges):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.tmp{os.getpid()}')
+        with open(tmp, 'wb') as fh:
+            fh.write(_HEADER.pack(_MAGIC, _VERSION, st.st_size, st.st_mtime_ns, self.n, n_edges))
+            fh.write(self._pack())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, st, graph):
+        """Memory-map a saved index if it matches the lineage file and graph, else None."""
+        with open(path, 'rb') as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, mtime_ns, n, n_edges = _HEADER.unpack_from(mm, 0)
+        if (magic, version, size, mtime_ns, n, n_edges) != (
+                _MAGIC, _VERSION, st.st_size, st.st_mtime_ns, len(graph), graph.n_edges):
+            mm.close()
+            return None
+        rows = []
+        pos = _HEADER.size
+        for _ in range(2):
+            offsets, shifts = array('q'), array('q')
+            offsets.frombytes(mm[pos:pos + 8 * (n + 1)])
+            pos += 8 * (n + 1)
+            shifts.frombytes(mm[pos:pos + 8 * n])
+            pos += 8 * n
+            rows.append(_Packed(memoryview(mm)[pos:pos + offsets[-1]], offsets, shifts))
+            pos += offsets[-1]
+        return cls(n, rows[0], rows[1])
+
+
+def load_index(lineage_path, graph, use_cache=True, max_bytes=DEFAULT_MAX_BYTES, root=None):
+    """
+    ReachIndex for the lineage, memory-mapped from the cache when the file is
+    unchanged and (re)built otherwise. None if the closure exceeds max_bytes.
+    """
+    st = os.stat(lineage_path)
+    path = cache_path(lineage_path, root).with_suffix('.rch')
+    if use_cache:
+        try:
+            index = ReachIndex.load(path, st, graph)
+            if index is not None:
+                return index
+        except (OSError, ValueError, struct.error):
+            pass
+    index = ReachIndex.build(graph, max_bytes)
+    if index is not None and use_cache:
+        try:
+            index.save(path, st, graph.n_edges)
+        except OSError:
+            pass
+    return index
+
+
+def bits_to_ids(bits):
+    """Set bit positions of a Python int, ascending."""
+    ids = []
+    shift = _shift(bits)
+    data = (bits >> (shift << 3)).to_bytes(((bits.bit_length() + 7) >> 3) - shift, 'little')
+    for k, byte in enumerate(data, shift):
+        while byte:
+            low = byte & -byte
+            ids.append(8 * k + low.bit_length() - 1)
+            byte ^= low
+    return ids
+
+
+def select(graph, index=None, sources=(), targets=(), changed=()):
+    """
+    Node ids of a slice: `sources` and their descendants, `targets` and their
+    ancestors (both given: the paths between them), `changed` and everything
+    downstream. Uses the ReachIndex when available, BFS masks otherwise.
+    """
+    if index is None:
+        def mask(seeds, reverse):
+            m = graph.reachable(seeds, reverse=reverse)
+            return {i for i in range(len(m)) if m[i]}
+    else:
+        def mask(seeds, reverse):
+            return index.ancestors(seeds) if reverse else index.descendants(seeds)
+
+    picked = None
+    if sources:
+        picked = mask(sources, False)
+    if targets:
+        up = mask(targets, True)
+        picked = up if picked is None else picked & up
+    if changed:
+        down = mask(changed, False)
+        picked = down if picked is None else picked | down
+    if index is None:
+        return sorted(picked or ())
+    return bits_to_ids(picked or 0)
@@ -1,15 +1,21 @@
+from importlib import import_module
 
-from lakehouse_fm_agent.core import alpha, uom, currency
-from lakehouse_fm_agent.bw_replace import dso, logsys
-
+# FM name -> "module:attribute". Handler modules pull in Arrow/NumPy (and Spark
+# on Databricks), so they are only imported when a handler is first resolved.
 REGISTRY = {
-    'CONVERSION_EXIT_ALPHA_INPUT': alpha.alpha_input,
-    'UNIT_CONVERSION_SIMPLE': uom.convert_simple,
-    'CONVERT_TO_LOCAL_CURRENCY': currency.convert_fx,
-    'RSDRI_ODSO_UPDATE': dso.merge_into_delta,
-    'RSDG_LOGSYS_GET_FROM_ID': logsys.map_logsys_from_id,
-    'Y_DNP_CONV_BUOM_SU_SSU': uom.conv_buom_su_ssu,
-    'YDNP_CHK_UOM_1': uom.check_uom,
+    'CONVERSION_EXIT_ALPHA_INPUT': 'lakehouse_fm_agent.core.alpha:alpha_input',
+    'UNIT_CONVERSION_SIMPLE': 'lakehouse_fm_agent.core.uom:convert_simple',
+    'CONVERT_TO_LOCAL_CURRENCY': 'lakehouse_fm_agent.core.currency:convert_fx',
+    'RSDRI_ODSO_UPDATE': 'lakehouse_fm_agent.bw_replace.dso:merge_into_delta',
+    'RSDG_LOGSYS_GET_FROM_ID': 'lakehouse_fm_agent.bw_replace.logsys:map_logsys_from_id',
+    'RSKC_CHAVL_OF_IOBJ_CHECK': 'lakehouse_fm_agent.core.cleansing:check_characters',
+    'NUMERIC_CHECK': 'lakehouse_fm_agent.core.cleansing:numeric_check',
+    'RSAU_READ_MASTER_DATA': 'lakehouse_fm_agent.dims.material:read_masterdata',
+    'Y_DNP_CONV_BUOM_SU_SSU': 'lakehouse_fm_agent.core.uom:conv_buom_su_ssu',
+    'YDNP_CHK_UOM_1': 'lakehouse_fm_agent.core.uom:check_uom',
+    'LAST_DAY_OF_MONTHS': 'lakehouse_fm_agent.core.dates:last_day',
+    'DATE_TO_PERIOD_CONVERT': 'lakehouse_fm_agent.core.dates:date_to_period',
+    'DATE_CONVERT_TO_FACTORYDATE': 'lakehouse_fm_agent.core.dates:next_working_day',
 }
 
 POINTERS = {
@@ -18,5 +24,59 @@ POINTERS = {
     'RSDMD_WRITE_ATTRIBUTES_TEXTS': 'Maintain attributes/texts in Delta; MERGE for upserts.'
 }
 
-def resolve_handler(fm:str):
-    return REGISTRY.get(fm.upper())
+# External handler packages register FMs under this entry-point group, e.g.
+#   [project.entry-points."lakehouse_fm_agent.handlers"]
+#   Z_MY_FM = "my_pkg.handlers:z_my_fm"
+ENTRY_POINT_GROUP = 'lakehouse_fm_agent.handlers'
+
+_resolved = {}
+_plugins = None
+
+
+def _load(target):
+    module, _, attr = target.partition(':')
+    obj = import_module(module)
+    for part in attr.split('.') if attr else ():
+        obj = getattr(obj, part)
+    return obj
+
+
+def plugin_handlers():
+    """FM name -> "module:attribute" for installed entry points (scanned once)."""
+    global _plugins
+    if _plugins is None:
+        from importlib.metadata import entry_points
+        _plugins = {ep.name.upper(): ep.value for ep in entry_points(group=ENTRY_POINT_GROUP)}
+    return _plugins
+
+
+def register(fm, target):
+    """Register a handler callable or "module:attribute" string for fm."""
+    fm = fm.upper()
+    _resolved.pop(fm, None)
+    if callable(target):
+        _resolved[fm] = target
+    REGISTRY[fm] = target
+
+
+def _target(fm):
+    target = REGISTRY.get(fm)
+    if target is None:
+        target = plugin_handlers().get(fm)
+    return target
+
+
+def has_handler(fm):
+    """True if fm has a handler, without importing it."""
+    return _target(fm.upper()) is not None
+
+
+def resolve_handler(fm: str):
+    fm = fm.upper()
+    fn = _resolved.get(fm)
+    if fn is None:
+        target = _target(fm)
+        if target is None:
+            return None
+        fn = _resolved[fm] = target if callable(target) else _load(target)
+    return fn
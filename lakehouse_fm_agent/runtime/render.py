@@ -0,0 +1,89 @@
+
+FORMATS = ('mermaid', 'dot')
+
+_MAX_LABEL_MEMBERS = 3
+
+
+def _mermaid_label(s):
+    return s.replace('"', '#quot;')
+
+
+def dot_label(s):
+    """Escape s for a double-quoted Graphviz DOT string."""
+    return s.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _unit_label(names, group):
+    shown = ', '.join(names[i] for i in group[:_MAX_LABEL_MEMBERS])
+    more = len(group) - _MAX_LABEL_MEMBERS
+    return f"cycle: {shown}" + (f" +{more} more" if more > 0 else "")
+
+
+def _units(graph):
+    """Condensation with each component's members as a list of node ids."""
+    comp, mo, members, offsets, targets = graph.condensation()
+    groups = [members[mo[c]:mo[c + 1]] for c in range(len(mo) - 1)]
+    return comp, groups, offsets, targets
+
+
+def write_graph(graph, fh, fmt='mermaid', condense=False):
+    """
+    Stream a LineageGraph as Mermaid or DOT to a text file handle.
+
+    Nodes are declared once under short ids and each distinct edge is written
+    once. Cycles (strongly connected components) are drawn as clusters; with
+    condense=True each cycle collapses to a single node and only edges of
+    the condensed DAG are written. Returns (nodes, edges) written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown graph format {fmt!r}; expected one of {FORMATS}")
+    names = graph.names
+    comp, groups, c_offsets, c_targets = _units(graph)
+    mermaid = fmt == 'mermaid'
+    label = _mermaid_label if mermaid else dot_label
+    fh.write("graph TD\n" if mermaid else "digraph lineage {\n  rankdir=TB;\n  node [shape=box];\n")
+
+    def node(ident, text, indent="  "):
+        if mermaid:
+            fh.write(f'{indent}{ident}["{label(text)}"]\n')
+        else:
+            fh.write(f'{indent}{ident} [label="{label(text)}"];\n')
+
+    arrow = " --> " if mermaid else " -> "
+    end = "\n" if mermaid else ";\n"
+    n_nodes = n_edges = 0
+
+    if condense:
+        for c, group in enumerate(groups):
+            if len(group) == 1:
+                node(f"n{group[0]}", names[group[0]])
+            elif mermaid:
+                node(f"c{c}", _unit_label(names, group))
+            else:
+                fh.write(f'  c{c} [label="{label(_unit_label(names, group))}", shape=box3d];\n')
+            n_nodes += 1
+        ident = [f"n{g[0]}" if len(g) == 1 else f"c{c}" for c, g in enumerate(groups)]
+        for c in range(len(groups)):
+            for j in range(c_offsets[c], c_offsets[c + 1]):
+                fh.write(f"  {ident[c]}{arrow}{ident[c_targets[j]]}{end}")
+                n_edges += 1
+    else:
+        for c, group in enumerate(groups):
+            if len(group) == 1:
+                node(f"n{group[0]}", names[group[0]])
+            else:
+                title = label(f"cycle ({len(group)} FMs)")
+                fh.write(f'  subgraph c{c}["{title}"]\n' if mermaid
+                         else f'  subgraph cluster_{c} {{\n    label="{title}";\n    style=dashed;\n')
+                for i in group:
+                    node(f"n{i}", names[i], indent="    ")
+                fh.write("  end\n" if mermaid else "  }\n")
+            n_nodes += len(group)
+        offsets, targets = graph.offsets, graph.targets
+        for i in range(len(names)):
+            for j in range(offsets[i], offsets[i + 1]):
+                fh.write(f"  n{i}{arrow}n{targets[j]}{end}")
+                n_edges += 1
+    if not mermaid:
+        fh.write("}\n")
+    return n_nodes, n_edges
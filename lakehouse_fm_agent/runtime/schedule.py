@@ -0,0 +1,169 @@
+
+import heapq
+import json
+import os
+from array import array
+from pathlib import Path
+
+from lakehouse_fm_agent.runtime.cache import cache_dir
+
+DEFAULT_SECONDS = 1.0   # estimate for a handler that has never run
+_ALPHA = 0.3            # EWMA weight of the newest run
+
+
+def history_path():
+    return cache_dir() / 'durations.json'
+
+
+class DurationHistory:
+    """Per-FM wall time history: an EWMA of seconds plus a run count, kept as JSON."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or history_path())
+        try:
+            self.stats = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self.stats = {}
+
+    def add(self, fm, seconds):
+        s = self.stats.get(fm)
+        if s is None:
+            self.stats[fm] = {'seconds': seconds, 'runs': 1, 'last': seconds}
+        else:
+            s['seconds'] = _ALPHA * seconds + (1 - _ALPHA) * s['seconds']
+            s['runs'] += 1
+            s['last'] = seconds
+
+    def estimate(self, fm, default=None):
+        s = self.stats.get(fm)
+        return s['seconds'] if s else default
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f'.tmp{os.getpid()}')
+        tmp.write_text(json.dumps(self.stats, sort_keys=True), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+
+def node_costs(graph, history, has_handler):
+    """Estimated seconds per node: history, else the median known handler time; 0 without a handler."""
+    known = sorted(s['seconds'] for s in history.stats.values())
+    fallback = known[len(known) // 2] if known else DEFAULT_SECONDS
+    cost = array('d', bytes(8 * len(graph)))
+    for i, fm in enumerate(graph.names):
+        est = history.estimate(fm)
+        if est is not None:
+            cost[i] = est
+        elif has_handler(fm):
+            cost[i] = fallback
+    return cost
+
+
+def _unit_costs(graph, cost):
+    """Condensation plus the summed cost of each component (a cycle runs as one unit)."""
+    comp, mo, members, offsets, targets = graph.condensation()
+    ucost = array('d', bytes(8 * (len(mo) - 1)))
+    for i, c in enumerate(comp):
+        ucost[c] += cost[i]
+    return comp, mo, members, offsets, targets, ucost
+
+
+def bottom_levels(graph, cost):
+    """
+    Longest remaining path per node, its own unit's cost included, over the
+    condensed DAG: every member of a cycle gets the level of the whole cycle.
+    """
+    comp, _, _, offsets, targets, ucost = _unit_costs(graph, cost)
+    ulevel = array('d', bytes(8 * len(ucost)))
+    # Components are numbered topologically, so walk them backwards
+    for c in range(len(ucost) - 1, -1, -1):
+        best = 0.0
+        for j in range(offsets[c], offsets[c + 1]):
+            if ulevel[targets[j]] > best:
+                best = ulevel[targets[j]]
+        ulevel[c] = ucost[c] + best
+    return array('d', (ulevel[c] for c in comp))
+
+
+def critical_chain(graph, level, cost):
+    """
+    Node ids of the longest path: start at the max bottom level and follow
+    the heaviest successor unit; a cycle on the path contributes all members.
+    """
+    if not len(level):
+        return []
+    comp, mo, members, offsets, targets, ucost = _unit_costs(graph, cost)
+    ulevel = array('d', bytes(8 * len(ucost)))
+    for i, c in enumerate(comp):
+        ulevel[c] = level[i]
+    c = max(range(len(ucost)), key=ulevel.__getitem__)
+    chain = []
+    while c is not None:
+        chain.extend(members[mo[c]:mo[c + 1]])
+        rest = ulevel[c] - ucost[c]
+        nxt = None
+        if rest > 0:
+            for j in range(offsets[c], offsets[c + 1]):
+                d = targets[j]
+                if abs(ulevel[d] - rest) <= 1e-9 * max(1.0, rest):
+                    nxt = d
+                    break
+        c = nxt
+    return chain
+
+
+def simulate_makespan(graph, cost, workers, priority=None, serial=None):
+    """
+    Makespan of list scheduling on `workers` slots over the condensed DAG,
+    ready units taken by highest priority (default: bottom level) -- the
+    policy run_dag uses. Units without a handler (cost 0) complete instantly.
+    serial (executor.serial_units) lists the units that run_dag runs one at a
+    time, in that order, on its own lane outside the worker slots.
+    """
+    if priority is None:
+        priority = bottom_levels(graph, cost)
+    comp, mo, members, offsets, targets, ucost = _unit_costs(graph, cost)
+    n = len(ucost)
+    uprio = array('d', bytes(8 * n))
+    for i, c in enumerate(comp):
+        if priority[i] > uprio[c]:
+            uprio[c] = priority[i]
+    indeg = array('i', bytes(4 * n))
+    for d in targets:
+        indeg[d] += 1
+    serial = list(serial or ())
+    chain_pos = {c: k for k, c in enumerate(serial)}
+    ready = []
+    running = []  # (finish time, unit)
+    held = set()
+    state = {'now': 0.0, 'lane': 0.0, 'next': 0, 'busy': 0}
+
+    def arrive(c):
+        if c not in chain_pos:
+            heapq.heappush(ready, (-uprio[c], c))
+            return
+        held.add(c)
+        while state['next'] < len(serial) and serial[state['next']] in held:
+            s = serial[state['next']]
+            held.discard(s)
+            state['next'] += 1
+            state['lane'] = max(state['now'], state['lane']) + ucost[s]
+            heapq.heappush(running, (state['lane'], s))
+
+    for c in range(n):
+        if indeg[c] == 0:
+            arrive(c)
+    while ready or running:
+        while ready and state['busy'] < workers:
+            _, c = heapq.heappop(ready)
+            heapq.heappush(running, (state['now'] + ucost[c], c))
+            state['busy'] += 1
+        state['now'], c = heapq.heappop(running)
+        if c not in chain_pos:
+            state['busy'] -= 1
+        for j in range(offsets[c], offsets[c + 1]):
+            d = targets[j]
+            indeg[d] -= 1
+            if indeg[d] == 0:
+                arrive(d)
+    return state['now']
@@ -0,0 +1,173 @@
+
+import threading
+from collections import deque
+from pathlib import Path
+
+DEFAULT_BATCH_ROWS = 65_536
+DEFAULT_PREFETCH = 4                 # batches read ahead of the consumer
+DEFAULT_MEMORY_LIMIT = 1 << 30       # bytes buffered / materialized
+
+_IPC_SUFFIXES = ('.arrow', '.ipc', '.feather')
+
+
+class MemoryLimitExceeded(MemoryError):
+    pass
+
+
+class BatchStream:
+    """
+    Single-pass stream of Arrow record batches; ctx.current_df in streaming
+    mode. map() chains per-batch work lazily, so a pipeline of transforms
+    holds one batch (plus the read-ahead) at a time. Only materialize()
+    collects everything, and it refuses to grow past memory_limit.
+    """
+
+    def __init__(self, batches, schema=None, memory_limit=DEFAULT_MEMORY_LIMIT, stats=None):
+        self._batches = batches
+        self.schema = schema
+        self.memory_limit = memory_limit
+        self._source = True  # map() results share stats without counting again
+        self.stats = stats if stats is not None else {'rows': 0, 'batches': 0, 'peak_buffered': 0}
+        self._consumed = False
+
+    def __iter__(self):
+        if self._consumed:
+            raise RuntimeError("BatchStream already consumed; materialize() it to reuse the data")
+        self._consumed = True
+        return self._iter()
+
+    @property
+    def consumed(self):
+        return self._consumed
+
+    def _iter(self):
+        if not self._source:
+            yield from self._batches
+            return
+        stats = self.stats
+        for batch in self._batches:
+            stats['rows'] += batch.num_rows
+            stats['batches'] += 1
+            yield batch
+
+    def map(self, fn):
+        """New stream of fn(batch); this one is consumed by it."""
+        return self.pipe(lambda batches: (fn(b) for b in batches))
+
+    def pipe(self, fn, schema=None):
+        """New stream over fn(iterator of batches), e.g. to time each pull; this one is consumed by it."""
+        out = BatchStream(fn(iter(self)), schema=schema, memory_limit=self.memory_limit, stats=self.stats)
+        out._source = False
+        return out
+
+    def chunks(self, max_rows):
+        """Tables of about max_rows rows (whole batches, zero-copy), e.g. for DSO data packages."""
+        import pyarrow as pa
+        buf, rows = [], 0
+        for batch in self:
+            buf.append(batch)
+            rows += batch.num_rows
+            if rows >= max_rows:
+                yield pa.Table.from_batches(buf)
+                buf, rows = [], 0
+        if buf:
+            yield pa.Table.from_batches(buf)
+
+    def materialize(self):
+        """Collect the remaining batches into one Table, within memory_limit."""
+        import pyarrow as pa
+        batches, nbytes = [], 0
+        for batch in self:
+            nbytes += batch.nbytes
+            if self.memory_limit and nbytes > self.memory_limit:
+                raise MemoryLimitExceeded(
+                    f"Materializing the stream needs more than {self.memory_limit >> 20} MiB "
+                    f"(stream.memory_limit_mb); process it batch by batch instead")
+            batches.append(batch)
+        if batches:
+            return pa.Table.from_batches(batches)
+        return self.schema.empty_table() if self.schema is not None else pa.table({})
+
+
+def prefetch(batches, memory_limit=DEFAULT_MEMORY_LIMIT, depth=DEFAULT_PREFETCH, stats=None):
+    """
+    Read batches on a background thread, at most `depth` batches and
+    `memory_limit` bytes ahead of the consumer: the reader blocks
+    (backpressure) until the consumer catches up. A single batch larger than
+    the limit still passes when nothing else is buffered.
+    """
+    cond = threading.Condition()
+    buf = deque()
+    state = {'bytes': 0, 'done': False, 'error': None, 'closed': False}
+
+    def produce():
+        try:
+            for batch in batches:
+                with cond:
+                    while buf and not state['closed'] and (
+                            len(buf) >= depth or state['bytes'] + batch.nbytes > memory_limit):
+                        cond.wait()
+                    if state['closed']:
+                        return
+                    buf.append(batch)
+                    state['bytes'] += batch.nbytes
+                    if stats is not None and state['bytes'] > stats['peak_buffered']:
+                        stats['peak_buffered'] = state['bytes']
+                    cond.notify_all()
+        except BaseException as ex:  # surfaced in the consumer
+            state['error'] = ex
+        finally:
+            with cond:
+                state['done'] = True
+                cond.notify_all()
+
+    thread = threading.Thread(target=produce, name='batch-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            with cond:
+                while not buf and not state['done']:
+                    cond.wait()
+                if not buf:
+                    if state['error'] is not None:
+                        raise state['error']
+                    return
+                batch = buf.popleft()
+                state['bytes'] -= batch.nbytes
+                cond.notify_all()
+            yield batch
+    finally:
+        with cond:
+            state['closed'] = True
+            cond.notify_all()
+
+
+def open_batches(source, batch_rows=DEFAULT_BATCH_ROWS, columns=None, readahead=DEFAULT_PREFETCH):
+    """
+    (schema, iterator of record batches) for a Table, RecordBatchReader,
+    Parquet/Arrow IPC file or directory, or an iterable of batches. Files are
+    scanned one at a time with `readahead` batches in flight, so the scanner
+    itself stays inside the stream's memory budget.
+    """
+    import pyarrow as pa
+    if isinstance(source, pa.Table):
+        if columns:
+            source = source.select(columns)
+        return source.schema, iter(source.to_batches(max_chunksize=batch_rows))
+    if isinstance(source, pa.RecordBatchReader):
+        return source.schema, iter(source)
+    if isinstance(source, (str, Path)):
+        import pyarrow.dataset as ds
+        path = Path(source)
+        if path.suffix.lower() in _IPC_SUFFIXES:
+            fmt = 'ipc'
+        else:
+            # pre_buffer caches every range read until the file is closed,
+            # which grows with the file instead of the batch
+            fmt = ds.ParquetFileFormat(
+                default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=False))
+        dataset = ds.dataset(str(path), format=fmt)
+        return (dataset.schema if not columns else pa.schema([dataset.schema.field(c) for c in columns]),
+                dataset.to_batches(columns=columns, batch_size=batch_rows,
+                                   batch_readahead=readahead, fragment_readahead=1))
+    return None, iter(source)
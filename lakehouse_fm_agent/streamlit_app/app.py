@@ -2,6 +2,89 @@
 import os, sys
 from pathlib import Path
 
-BASE = Path(__file__).resolve().parent.parent  # repo root
+BASE = Path(__file__).resolve().parent.parent.parent  # repo root (holds lakehouse_fm_agent/)
 if str(BASE) not in sys.path:
     sys.path.insert(0, str(BASE))
+
+import time
+
+import streamlit as st
+
+from lakehouse_fm_agent.runtime.cache import content_hash, load_graph
+from lakehouse_fm_agent.runtime.explore import (DEFAULT_HOPS, DEFAULT_LIMIT, DEFAULT_PAGE_SIZE,
+                                                Explorer)
+from lakehouse_fm_agent.runtime.schedule import DurationHistory, history_path
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _digest(path, size, mtime_ns):
+    # Re-hashed only when the file's size or mtime changes
+    return content_hash(path).hex()
+
+
+@st.cache_resource(max_entries=4, show_spinner='Indexing lineage...')
+def _explorer(digest, _path):
+    # One parsed graph, name index and layout per lineage content, shared by all sessions
+    return Explorer(load_graph(_path))
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _durations(path, mtime_ns):
+    return DurationHistory(path).stats
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+st.set_page_config(page_title='FM lineage explorer', layout='wide')
+st.title('FM lineage explorer')
+
+with st.sidebar:
+    lineage = st.text_input('Lineage file', os.environ.get('FMTOOL_LINEAGE', 'lineage.txt'))
+    durations_file = st.text_input('Run history', str(history_path()))
+    mode = st.radio('View', ['Neighborhood', 'Pages'], horizontal=True)
+
+if not os.path.isfile(lineage):
+    st.info(f"Lineage file not found: {lineage}")
+    st.stop()
+
+stat = os.stat(lineage)
+ex = _explorer(_digest(lineage, stat.st_size, stat.st_mtime_ns), lineage)
+ex = ex.with_durations(_durations(durations_file, _mtime(durations_file)))
+
+t0 = time.perf_counter()
+center = None
+truncated = False
+if mode == 'Neighborhood':
+    with st.sidebar:
+        prefix = st.text_input('Search FM', '')
+        matches = ex.search(prefix) if prefix.strip() else []
+        if prefix.strip() and not matches:
+            st.caption('No FM starts with that.')
+        center = st.selectbox('Center', matches, format_func=lambda i: ex.graph.names[i]) if matches else None
+        hops = st.slider('Hops', 1, 6, DEFAULT_HOPS)
+        direction = st.radio('Direction', ['both', 'up', 'down'], horizontal=True)
+        limit = st.number_input('Max nodes', 10, 2000, DEFAULT_LIMIT, step=50)
+    if center is None:
+        st.info(f"{len(ex):,} FMs indexed. Search for one to explore its neighborhood.")
+        st.stop()
+    nodes, truncated = ex.neighborhood(center, hops=hops, limit=int(limit), direction=direction)
+else:
+    with st.sidebar:
+        size = st.number_input('Page size', 20, 1000, DEFAULT_PAGE_SIZE, step=20)
+        number = st.number_input(f"Page (of {ex.pages(int(size))})", 1, ex.pages(int(size)), 1)
+    nodes = ex.page(int(number) - 1, int(size))
+
+dot = ex.to_dot(nodes, center)
+rows = ex.rows(nodes)
+elapsed = time.perf_counter() - t0
+
+if truncated:
+    st.warning(f"Showing the first {len(nodes)} FMs; raise the limit or lower the hops for the rest.")
+st.graphviz_chart(dot, width="stretch")
+st.dataframe(rows, width="stretch", hide_index=True)
+st.caption(f"{len(nodes):,} of {len(ex):,} FMs, view built in {elapsed * 1000:.0f} ms")